@@ -5,6 +5,8 @@ API连接器
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import atexit
 import json
 import time
 import logging
@@ -24,6 +26,18 @@ except ImportError:
     XML_PARSER_AVAILABLE = False
     xmltodict = None
 
+# urllib3只有在安装了brotli时才能解码br响应
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi as brotli
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+        brotli = None
+
 from .api_config_manager import api_config_manager
 
 logger = logging.getLogger(__name__)
@@ -47,6 +61,16 @@ class APIConnector:
         user_agent = default_settings.get("user_agent", "DataMaster-MCP/1.0")
         self.session.headers.update({"User-Agent": user_agent})
         
+        # 声明可接受的压缩格式，减小JSON响应体积
+        accept_encoding = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+        self.session.headers.update({"Accept-Encoding": accept_encoding})
+        
+        # 连接池：同一主机的请求复用TCP/TLS连接
+        pool_size = default_settings.get("pool_maxsize", 10)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
         # SSL验证设置
         self.session.verify = default_settings.get("verify_ssl", True)
         
@@ -384,4 +408,5 @@ class APIConnector:
             self.session.close()
 
 # 创建全局实例
-api_connector = APIConnector()
\ No newline at end of file
+api_connector = APIConnector()
+atexit.register(api_connector.close)
\ No newline at end of file
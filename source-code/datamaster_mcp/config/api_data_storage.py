@@ -13,9 +13,37 @@ from datetime import datetime
 from pathlib import Path
 import uuid
 import hashlib
+import threading
 
 logger = logging.getLogger(__name__)
 
+# JSON编解码：优先使用orjson
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+def _json_loads(text: str) -> Any:
+    """解析存储的JSON数据"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # 旧数据可能包含标准库写入的NaN/Infinity，orjson不接受
+            pass
+    return json.loads(text)
+
+def _json_dumps(obj: Any) -> str:
+    """序列化待存储的数据"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, default=str)
+
 class APIDataStorage:
     """API数据存储管理器"""
     
@@ -23,12 +51,34 @@ class APIDataStorage:
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_db = self.storage_dir / "metadata.db"
+        # 每个线程按文件路径复用连接，避免每次调用都重新打开数据库文件
+        self._conn_local = threading.local()
         self._init_metadata_db()
     
+    def _connect(self, db_path) -> sqlite3.Connection:
+        """获取指定数据库文件的连接（按线程复用；with语句只管理事务，不会关闭连接）"""
+        connections = getattr(self._conn_local, 'connections', None)
+        if connections is None:
+            connections = self._conn_local.connections = {}
+        key = str(db_path)
+        conn = connections.get(key)
+        if conn is None:
+            conn = sqlite3.connect(key, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            connections[key] = conn
+        return conn
+    
+    def _close_connection(self, db_path):
+        """关闭当前线程中指定数据库文件的连接（删除文件前调用）"""
+        connections = getattr(self._conn_local, 'connections', None) or {}
+        conn = connections.pop(str(db_path), None)
+        if conn is not None:
+            conn.close()
+    
     def _init_metadata_db(self):
         """初始化元数据数据库"""
         try:
-            with sqlite3.connect(self.metadata_db) as conn:
+            with self._connect(self.metadata_db) as conn:
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS storage_sessions (
                         session_id TEXT PRIMARY KEY,
@@ -83,7 +133,7 @@ class APIDataStorage:
             file_name = f"{api_name}_{endpoint_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
             file_path = self.storage_dir / file_name
             
-            with sqlite3.connect(self.metadata_db) as conn:
+            with self._connect(self.metadata_db) as conn:
                 conn.execute("""
                     INSERT INTO storage_sessions 
                     (session_id, session_name, description, api_name, endpoint_name, file_path)
@@ -92,7 +142,7 @@ class APIDataStorage:
                 conn.commit()
             
             # 创建数据存储文件
-            with sqlite3.connect(file_path) as data_conn:
+            with self._connect(file_path) as data_conn:
                 data_conn.execute("""
                     CREATE TABLE IF NOT EXISTS api_data (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -132,24 +182,24 @@ class APIDataStorage:
             data_str = json.dumps(raw_data, sort_keys=True, default=str)
             data_hash = hashlib.md5(data_str.encode()).hexdigest()
             
-            with sqlite3.connect(file_path) as conn:
+            with self._connect(file_path) as conn:
                 # 检查是否已存在相同数据
                 cursor = conn.execute("SELECT id FROM api_data WHERE data_hash = ?", (data_hash,))
                 if cursor.fetchone():
                     return True, 0, "数据已存在，跳过重复存储"
                 
                 # 存储数据
-                conn.execute("""
+                cursor = conn.execute("""
                     INSERT INTO api_data (data_hash, raw_data, processed_data, source_params)
                     VALUES (?, ?, ?, ?)
                 """, (
                     data_hash,
-                    json.dumps(raw_data, default=str),
-                    json.dumps(processed_data, default=str) if processed_data else None,
-                    json.dumps(source_params, default=str) if source_params else None
+                    _json_dumps(raw_data),
+                    _json_dumps(processed_data) if processed_data else None,
+                    _json_dumps(source_params) if source_params else None
                 ))
                 
-                records_added = conn.total_changes
+                records_added = cursor.rowcount
                 conn.commit()
             
             # 更新会话统计
@@ -178,9 +228,7 @@ class APIDataStorage:
             
             file_path = session_info['file_path']
             
-            with sqlite3.connect(file_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
+            with self._connect(file_path) as conn:
                 # 构建查询
                 query = "SELECT * FROM api_data ORDER BY timestamp DESC"
                 params = []
@@ -205,9 +253,9 @@ class APIDataStorage:
                 for row in rows:
                     item = {
                         'id': row['id'],
-                        'raw_data': json.loads(row['raw_data']),
-                        'processed_data': json.loads(row['processed_data']) if row['processed_data'] else None,
-                        'source_params': json.loads(row['source_params']) if row['source_params'] else None,
+                        'raw_data': _json_loads(row['raw_data']),
+                        'processed_data': _json_loads(row['processed_data']) if row['processed_data'] else None,
+                        'source_params': _json_loads(row['source_params']) if row['source_params'] else None,
                         'timestamp': row['timestamp']
                     }
                     data.append(item)
@@ -217,7 +265,7 @@ class APIDataStorage:
                 # 提取原始数据并转换为DataFrame
                 raw_data_list = []
                 for row in rows:
-                    raw_data = json.loads(row['raw_data'])
+                    raw_data = _json_loads(row['raw_data'])
                     if isinstance(raw_data, list):
                         raw_data_list.extend(raw_data)
                     else:
@@ -251,12 +299,11 @@ class APIDataStorage:
     
     def list_storage_sessions(self, 
                             api_name: str = None,
-                            status: str = "active") -> tuple[bool, List[Dict[str, Any]], str]:
-        """列出存储会话"""
+                            status: str = "active",
+                            endpoint_name: str = None) -> tuple[bool, List[Dict[str, Any]], str]:
+        """列出存储会话（endpoint_name按不区分大小写的包含关系匹配）"""
         try:
-            with sqlite3.connect(self.metadata_db) as conn:
-                conn.row_factory = sqlite3.Row
-                
+            with self._connect(self.metadata_db) as conn:
                 query = "SELECT * FROM storage_sessions WHERE status = ?"
                 params = [status]
                 
@@ -264,6 +311,12 @@ class APIDataStorage:
                     query += " AND api_name = ?"
                     params.append(api_name)
                 
+                if endpoint_name:
+                    # 转义LIKE通配符，端点名中的%和_按字面匹配
+                    escaped = endpoint_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    query += " AND endpoint_name LIKE ? ESCAPE '\\' COLLATE NOCASE"
+                    params.append(f"%{escaped}%")
+                
                 query += " ORDER BY created_at DESC"
                 
                 cursor = conn.execute(query, params)
@@ -302,10 +355,11 @@ class APIDataStorage:
             
             # 删除数据文件
             if file_path.exists():
+                self._close_connection(file_path)
                 file_path.unlink()
             
             # 更新会话状态
-            with sqlite3.connect(self.metadata_db) as conn:
+            with self._connect(self.metadata_db) as conn:
                 conn.execute(
                     "UPDATE storage_sessions SET status = 'deleted', updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
                     (session_id,)
@@ -355,8 +409,7 @@ class APIDataStorage:
     def _get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
         """获取会话信息"""
         try:
-            with sqlite3.connect(self.metadata_db) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect(self.metadata_db) as conn:
                 cursor = conn.execute(
                     "SELECT * FROM storage_sessions WHERE session_id = ?",
                     (session_id,)
@@ -376,11 +429,11 @@ class APIDataStorage:
             
             file_path = session_info['file_path']
             
-            with sqlite3.connect(file_path) as conn:
+            with self._connect(file_path) as conn:
                 cursor = conn.execute("SELECT COUNT(*) FROM api_data")
                 total_records = cursor.fetchone()[0]
             
-            with sqlite3.connect(self.metadata_db) as conn:
+            with self._connect(self.metadata_db) as conn:
                 conn.execute(
                     "UPDATE storage_sessions SET total_records = ?, updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
                     (total_records, session_id)
@@ -395,7 +448,7 @@ class APIDataStorage:
         """记录操作日志"""
         try:
             operation_id = str(uuid.uuid4())
-            with sqlite3.connect(self.metadata_db) as conn:
+            with self._connect(self.metadata_db) as conn:
                 conn.execute("""
                     INSERT INTO data_operations 
                     (operation_id, session_id, operation_type, records_affected, operation_details)
@@ -408,8 +461,7 @@ class APIDataStorage:
     def get_session_operations(self, session_id: str) -> tuple[bool, List[Dict[str, Any]], str]:
         """获取会话操作历史"""
         try:
-            with sqlite3.connect(self.metadata_db) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect(self.metadata_db) as conn:
                 cursor = conn.execute("""
                     SELECT * FROM data_operations 
                     WHERE session_id = ? 
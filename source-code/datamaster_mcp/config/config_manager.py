@@ -124,12 +124,12 @@ class ConfigManager:
             if not temp_configs:
                 return True, "没有找到临时配置"
             
-            removed_count = 0
             for config_name in temp_configs:
-                if self.remove_database_config(config_name):
-                    removed_count += 1
+                del self.config_data["databases"][config_name]
+            # 旧版本可能把临时配置写入了文件，统一保存一次
+            self._save_config()
             
-            return True, f"成功清理 {removed_count} 个临时配置: {', '.join(temp_configs)}"
+            return True, f"成功清理 {len(temp_configs)} 个临时配置: {', '.join(temp_configs)}"
         except Exception as e:
             return False, f"清理临时配置失败: {str(e)}"
     
@@ -200,13 +200,14 @@ class ConfigManager:
         return True, "配置验证通过"
     
     def add_database_config(self, database_name: str, config: Dict[str, Any]) -> bool:
-        """添加新的数据库配置"""
+        """添加新的数据库配置（临时配置只保存在内存中）"""
         try:
             if "databases" not in self.config_data:
                 self.config_data["databases"] = {}
             
             self.config_data["databases"][database_name] = config
-            self._save_config()
+            if not config.get("_is_temporary", False):
+                self._save_config()
             logger.info(f"数据库配置已添加: {database_name}")
             return True
         except Exception as e:
@@ -217,8 +218,9 @@ class ConfigManager:
         """删除数据库配置"""
         try:
             if database_name in self.config_data.get("databases", {}):
-                del self.config_data["databases"][database_name]
-                self._save_config()
+                removed = self.config_data["databases"].pop(database_name)
+                if not removed.get("_is_temporary", False):
+                    self._save_config()
                 logger.info(f"数据库配置已删除: {database_name}")
                 return True
             else:
@@ -232,8 +234,14 @@ class ConfigManager:
         """保存配置文件"""
         try:
             config_path = Path(self.config_file)
+            # 临时配置不写入文件
+            config_data = dict(self.config_data)
+            config_data["databases"] = {
+                name: config for name, config in self.config_data.get("databases", {}).items()
+                if not config.get("_is_temporary", False)
+            }
             with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config_data, f, indent=2, ensure_ascii=False)
+                json.dump(config_data, f, indent=2, ensure_ascii=False)
             logger.info("配置文件已保存")
         except Exception as e:
             logger.error(f"保存配置文件失败: {e}")
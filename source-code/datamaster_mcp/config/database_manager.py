@@ -12,6 +12,7 @@ import json
 from contextlib import contextmanager
 from datetime import datetime, date, time
 from decimal import Decimal
+from time import monotonic
 
 # 增强的MySQL驱动检测
 def detect_mysql_drivers():
@@ -152,6 +153,9 @@ from .config_manager import config_manager
 
 logger = logging.getLogger(__name__)
 
+# 外部数据库表列表的缓存有效期（秒）
+TABLE_LIST_CACHE_TTL = 30
+
 def json_serializer(obj):
     """JSON序列化函数，处理datetime等特殊对象类型"""
     if isinstance(obj, (datetime, date, time)):
@@ -169,11 +173,26 @@ class DatabaseManager:
     def __init__(self):
         self.connections = {}
         self.config_manager = config_manager
+        # 表列表缓存：{数据库名: (过期时间, 配置, 表列表)}，配置变化或过期后重新查询
+        self._table_list_cache = {}
     
     def get_available_databases(self) -> Dict[str, Dict[str, Any]]:
         """获取所有可用的数据库配置"""
         return self.config_manager.list_databases()
     
+    def create_temp_config(self, config_name: str, db_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """创建临时数据库配置（只保存在内存中，不写入配置文件）"""
+        temp_config = dict(config)
+        temp_config.update({
+            "type": db_type,
+            "enabled": True,
+            "_is_temporary": True,
+            "_created_at": datetime.now().isoformat()
+        })
+        if not self.config_manager.add_database_config(config_name, temp_config):
+            return {"success": False, "error": f"创建临时配置失败: {config_name}"}
+        return {"success": True, "config_name": config_name}
+    
     def test_connection(self, database_name: str) -> tuple[bool, str]:
         """测试数据库连接"""
         try:
@@ -514,6 +533,10 @@ class DatabaseManager:
             
             db_type = config["type"]
             
+            # 非查询语句可能建表或删表，使该库的表列表缓存失效
+            if not query.lstrip().upper().startswith(("SELECT", "SHOW", "DESCRIBE", "PRAGMA", "WITH")):
+                self._table_list_cache.pop(database_name, None)
+            
             if db_type in ["mysql", "postgresql", "sqlite"]:
                 return self._execute_sql_query(database_name, query, params)
             elif db_type == "mongodb":
@@ -925,19 +948,32 @@ class DatabaseManager:
                         f"实际输入: {pipeline_str}")
     
     def get_table_list(self, database_name: str) -> List[str]:
-        """获取数据库中的表列表"""
+        """获取数据库中的表列表（短时间内重复调用直接返回缓存）"""
+        config = self.config_manager.get_database_config(database_name)
+        if not config:
+            return []
+        
+        cached = self._table_list_cache.get(database_name)
+        if cached is not None:
+            expires_at, cached_config, tables = cached
+            if monotonic() < expires_at and cached_config == config:
+                return list(tables)
+        
+        tables = self._query_table_list(database_name, config)
+        if tables:
+            self._table_list_cache[database_name] = (monotonic() + TABLE_LIST_CACHE_TTL, config, tuple(tables))
+        return tables
+    
+    def _query_table_list(self, database_name: str, config: Dict[str, Any]) -> List[str]:
+        """查询数据库中的表列表"""
         try:
-            config = self.config_manager.get_database_config(database_name)
-            if not config:
-                return []
-            
             db_type = config["type"]
             
             if db_type == "mysql":
                 # 使用INFORMATION_SCHEMA查询，更可靠
                 db_name = config.get("database", "mysql")
                 result = self.execute_query(database_name, 
-                    f"SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = '{db_name}'")
+                    "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s", (db_name,))
             elif db_type == "postgresql":
                 result = self.execute_query(database_name, 
                     "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
@@ -981,9 +1017,11 @@ class DatabaseManager:
                 result = self.execute_query(database_name, f"DESCRIBE {table_name}")
             elif db_type == "postgresql":
                 result = self.execute_query(database_name, 
-                    f"SELECT column_name, data_type, is_nullable FROM information_schema.columns WHERE table_name = '{table_name}'")
+                    "SELECT column_name, data_type, is_nullable FROM information_schema.columns WHERE table_name = %s",
+                    (table_name,))
             elif db_type == "sqlite":
-                result = self.execute_query(database_name, f"PRAGMA table_info({table_name})")
+                # 表值函数形式可以绑定表名参数，且按SELECT返回结果行
+                result = self.execute_query(database_name, "SELECT * FROM pragma_table_info(?)", (table_name,))
             elif db_type == "mongodb":
                 # MongoDB 是无模式的，返回集合的示例文档结构
                 with self.get_connection(database_name) as db:
@@ -5,6 +5,7 @@ DataMaster MCP - 核心功能模块包
 这个包包含了DataMaster MCP的核心功能模块：
 - database.py: 数据库连接和操作
 - data_analysis.py: 数据分析功能
+- analytics_kernels.py: 数值分析计算内核
 - data_processing.py: 数据处理功能
 - api_manager.py: API管理功能
 """
@@ -16,6 +17,7 @@ __author__ = "DataMaster Team"
 __all__ = [
     'database',
     'data_analysis', 
+    'analytics_kernels',
     'data_processing',
     'api_manager'
 ]
\ No newline at end of file
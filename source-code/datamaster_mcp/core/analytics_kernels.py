@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+DataMaster MCP - 数值分析计算内核
+
+这个模块包含数据分析中逐元素计算的数值内核：
+- outside_mask: 区间外（异常值）掩码
+- zscore_outlier_mask: 均值、总体标准差和Z-score异常值掩码（忽略NaN）
+- pearson_matrix: 皮尔逊相关系数矩阵
+
+安装numba时使用JIT编译的并行内核，否则使用向量化的NumPy实现。
+"""
+
+import logging
+import numpy as np
+
+# 设置日志
+logger = logging.getLogger("DataMaster_MCP.AnalyticsKernels")
+
+# 可选：numba JIT编译
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+    prange = range
+
+# ================================
+# NumPy实现
+# ================================
+
+def _outside_mask_np(x: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """区间外掩码（NumPy）"""
+    return (x < lower) | (x > upper)
+
+def _zscore_outlier_mask_np(x: np.ndarray, threshold: float) -> tuple:
+    """Z-score异常值掩码、均值和总体标准差（NumPy）"""
+    mean = np.nanmean(x)
+    std = np.nanstd(x)
+    with np.errstate(invalid='ignore'):
+        mask = np.abs(x - mean) > threshold * std
+    return mask, mean, std
+
+def _pearson_matrix_np(X: np.ndarray) -> np.ndarray:
+    """皮尔逊相关系数矩阵（NumPy）"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.atleast_2d(np.corrcoef(X, rowvar=False))
+
+# ================================
+# numba实现
+# ================================
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True)
+    def _outside_mask_nb(x, lower, upper):
+        """区间外掩码（numba）"""
+        n = x.shape[0]
+        mask = np.empty(n, dtype=np.bool_)
+        for i in prange(n):
+            mask[i] = x[i] < lower or x[i] > upper
+        return mask
+
+    # 输入可能含NaN，不能开启fastmath的nnan假设，只允许重排求和顺序以便向量化
+    @njit(parallel=True, fastmath={'reassoc', 'contract'})
+    def _zscore_outlier_mask_nb(x, threshold):
+        """Z-score异常值掩码、均值和总体标准差（numba）：两次归约加一次判定，无中间数组"""
+        n = x.shape[0]
+        total = 0.0
+        count = 0
+        for i in prange(n):
+            if not np.isnan(x[i]):
+                total += x[i]
+                count += 1
+        mean = total / count if count > 0 else np.nan
+        sq_total = 0.0
+        for i in prange(n):
+            if not np.isnan(x[i]):
+                diff = x[i] - mean
+                sq_total += diff * diff
+        std = np.sqrt(sq_total / count) if count > 0 else np.nan
+        limit = threshold * std
+        mask = np.empty(n, dtype=np.bool_)
+        for i in prange(n):
+            mask[i] = abs(x[i] - mean) > limit
+        return mask, mean, std
+
+    # 零方差列会产生NaN，同样只允许重排求和顺序
+    @njit(parallel=True, fastmath={'reassoc', 'contract'})
+    def _pearson_matrix_nb(X):
+        """皮尔逊相关系数矩阵（numba）：先标准化各列，再求列间点积"""
+        n, k = X.shape
+        Z = np.empty((n, k))
+        for j in prange(k):
+            mean = 0.0
+            for i in range(n):
+                mean += X[i, j]
+            mean /= n
+            sq_total = 0.0
+            for i in range(n):
+                diff = X[i, j] - mean
+                sq_total += diff * diff
+            norm = np.sqrt(sq_total)
+            for i in range(n):
+                Z[i, j] = (X[i, j] - mean) / norm if norm > 0 else np.nan
+        R = np.empty((k, k))
+        for a in prange(k):
+            for b in range(k):
+                acc = 0.0
+                for i in range(n):
+                    acc += Z[i, a] * Z[i, b]
+                R[a, b] = acc
+        return R
+
+def _dispatch(nb_func_name: str, np_func, *args):
+    """优先调用numba内核，编译失败时回退到NumPy实现"""
+    global NUMBA_AVAILABLE
+    if NUMBA_AVAILABLE:
+        try:
+            return globals()[nb_func_name](*args)
+        except Exception as e:
+            NUMBA_AVAILABLE = False
+            logger.warning(f"numba内核不可用，回退到NumPy: {e}")
+    return np_func(*args)
+
+# ================================
+# 公共接口
+# ================================
+
+def outside_mask(x: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """返回落在[lower, upper]之外的元素掩码"""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    return _dispatch("_outside_mask_nb", _outside_mask_np, x, float(lower), float(upper))
+
+def zscore_outlier_mask(x: np.ndarray, threshold: float) -> tuple:
+    """返回(|z| > threshold的掩码, 均值, 总体标准差)，NaN不计入统计且不判为异常值"""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    mask, mean, std = _dispatch("_zscore_outlier_mask_nb", _zscore_outlier_mask_np, x, float(threshold))
+    return mask, float(mean), float(std)
+
+def pearson_matrix(X: np.ndarray) -> np.ndarray:
+    """返回各列之间的皮尔逊相关系数矩阵（输入不能包含NaN）"""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    return _dispatch("_pearson_matrix_nb", _pearson_matrix_np, X)
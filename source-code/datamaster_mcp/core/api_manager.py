@@ -14,19 +14,58 @@ DataMaster MCP - API管理核心模块
 
 import json
 import logging
+import time
+import pandas as pd
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 # 设置日志
 logger = logging.getLogger("DataMaster_MCP.APIManager")
 
-# 导入API相关模块
+# JSON序列化：优先使用orjson
 try:
-    from config.api_config_manager import APIConfigManager
-    from config.api_connector import APIConnector
-    from config.api_data_storage import APIDataStorage
-    from config.data_transformer import DataTransformer
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+if ORJSON_AVAILABLE:
+    _DUMP_OPT = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj) -> str:
+        """序列化工具返回结果"""
+        return orjson.dumps(obj, option=_DUMP_OPT, default=str).decode()
+else:
+    def _dumps(obj) -> str:
+        """序列化工具返回结果"""
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+
+# 导入API相关模块及其全局实例（模块加载时一次性导入，工具调用时不再走导入机制）
+# 复用全局实例，使配置变更对连接器立即可见，且整个进程共享同一个HTTP连接池
+try:
+    try:
+        from ..config.api_config_manager import APIConfigManager, api_config_manager
+        from ..config.api_connector import APIConnector, api_connector
+        from ..config.api_data_storage import APIDataStorage, api_data_storage
+        from ..config.data_transformer import DataTransformer, data_transformer
+    except ImportError:
+        # 如果相对导入失败，尝试绝对导入
+        import sys
+        from pathlib import Path
+        current_dir = Path(__file__).parent.parent.parent
+        if str(current_dir) not in sys.path:
+            sys.path.insert(0, str(current_dir))
+        
+        from datamaster_mcp.config.api_config_manager import APIConfigManager, api_config_manager
+        from datamaster_mcp.config.api_connector import APIConnector, api_connector
+        from datamaster_mcp.config.api_data_storage import APIDataStorage, api_data_storage
+        from datamaster_mcp.config.data_transformer import DataTransformer, data_transformer
+    API_MODULES_AVAILABLE = True
+    _api_import_error = None
 except ImportError as e:
+    API_MODULES_AVAILABLE = False
+    _api_import_error = str(e)
     logger.warning(f"API模块导入失败: {e}")
     # 定义空的占位类
     class APIConfigManager:
@@ -43,7 +82,7 @@ except ImportError as e:
     class APIDataStorage:
         def create_storage_session(self, **kwargs): return False, None, "API存储未初始化"
         def store_api_data(self, **kwargs): return False, 0, "API存储未初始化"
-        def list_storage_sessions(self): return False, [], "API存储未初始化"
+        def list_storage_sessions(self, **kwargs): return False, [], "API存储未初始化"
         def get_stored_data(self, **kwargs): return False, None, "API存储未初始化"
         def _get_session_info(self, session_id): return None
     
@@ -51,19 +90,83 @@ except ImportError as e:
         def transform_data(self, **kwargs): return False, None, "数据转换器未初始化"
         def get_data_summary(self, data): return False, None, "数据转换器未初始化"
 
-# 初始化API管理器
-try:
-    api_config_manager = APIConfigManager()
-    api_connector = APIConnector()
-    api_data_storage = APIDataStorage()
-    data_transformer = DataTransformer()
-except Exception as e:
-    logger.warning(f"API管理器初始化失败: {e}")
     api_config_manager = APIConfigManager()
     api_connector = APIConnector()
     api_data_storage = APIDataStorage()
     data_transformer = DataTransformer()
 
+# ================================
+# 响应构建辅助函数
+# ================================
+
+# 时间戳缓存：[生成时刻(monotonic), ISO字符串]，0.5秒内的连续调用复用同一字符串
+_ts_cache = [float("-inf"), ""]
+_TS_CACHE_TTL = 0.5
+
+def _now_iso() -> str:
+    """当前时间的ISO格式字符串"""
+    t = time.monotonic()
+    if t - _ts_cache[0] > _TS_CACHE_TTL:
+        _ts_cache[0] = t
+        _ts_cache[1] = datetime.now().isoformat()
+    return _ts_cache[1]
+
+def _make_response(
+    icon: str,
+    title: str,
+    status: str,
+    message: str,
+    data: Any = None,
+    metadata: dict = None,
+    text: str = None,
+    **extras
+) -> str:
+    """构建统一格式的工具返回结果，text为放在JSON之前的纯文本内容"""
+    result = {"status": status, "message": message}
+    if data is not None:
+        result["data"] = data
+    result.update(extras)
+    if metadata is not None:
+        result["metadata"] = {"timestamp": _now_iso(), **metadata}
+    if text is not None:
+        return f"{icon} {title}\n\n{text}\n\n{_dumps(result)}"
+    return f"{icon} {title}\n\n{_dumps(result)}"
+
+def _ok(title: str, message: str, data: Any = None, icon: str = "✅", **extras) -> str:
+    """构建成功结果"""
+    return _make_response(icon, title, "success", message, data, **extras)
+
+def _err(title: str, message: str, data: Any = None, **extras) -> str:
+    """构建错误结果"""
+    return _make_response("❌", title, "error", message, data, **extras)
+
+def _api_modules_unavailable() -> str:
+    """API模块导入失败时的统一提示"""
+    return _err(
+        "API功能不可用",
+        "API相关模块导入失败，请检查依赖是否安装完整后重启服务",
+        error_details=_api_import_error
+    )
+
+def _api_call_failed(api_name: str, endpoint_name: str, params: dict, message: str) -> str:
+    """构建API调用失败的友好提示"""
+    error_info = _format_user_friendly_error(
+        "api_call_failed",
+        message,
+        {"api_name": api_name, "endpoint_name": endpoint_name, "params": params}
+    )
+    result = {
+        "status": "error",
+        "message": error_info["friendly_message"],
+        "error_details": error_info,
+        "data": {
+            "api_name": api_name,
+            "endpoint_name": endpoint_name
+        }
+    }
+    solutions = "\n".join([f"• {solution}" for solution in error_info['solutions']])
+    return f"❌ {error_info['friendly_message']}\n\n💡 解决建议:\n{solutions}\n\n🔧 技术详情:\n{_dumps(result)}"
+
 # ================================
 # API管理工具函数
 # ================================
@@ -84,138 +187,83 @@ def manage_api_config_impl(
     Returns:
         str: 操作结果
     """
+    if not API_MODULES_AVAILABLE:
+        return _api_modules_unavailable()
+    
     try:
         if action == "list":
             apis = api_config_manager.list_apis()
             if not apis:
-                result = {
-                    "status": "success",
-                    "message": "当前没有配置任何API",
-                    "data": {"apis": []}
-                }
-                return f"📋 API配置列表\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _ok("API配置列表", "当前没有配置任何API", {"apis": []}, icon="📋")
             
             # apis已经是包含API信息的字典，直接转换为列表
             api_list = list(apis.values())
-            
-            result = {
-                "status": "success",
-                "message": f"找到 {len(api_list)} 个已配置的API",
-                "data": {"apis": api_list}
-            }
-            return f"📋 API配置列表\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _ok("API配置列表", f"找到 {len(api_list)} 个已配置的API", {"apis": api_list}, icon="📋")
         
         elif action == "test":
             if not api_name:
-                result = {
-                    "status": "error",
-                    "message": "测试API连接需要提供api_name参数"
-                }
-                return f"❌ 测试失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("测试失败", "测试API连接需要提供api_name参数")
             
             success, message = api_connector.test_api_connection(api_name)
-            result = {
-                "status": "success" if success else "error",
-                "message": message,
-                "data": {"api_name": api_name}
-            }
-            status_icon = "✅" if success else "❌"
-            return f"{status_icon} API连接测试\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _make_response(
+                "✅" if success else "❌", "API连接测试",
+                "success" if success else "error", message, {"api_name": api_name}
+            )
         
         elif action == "add":
             if not api_name or not config_data:
-                result = {
-                    "status": "error",
-                    "message": "添加API配置需要提供api_name和config_data参数"
-                }
-                return f"❌ 添加失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("添加失败", "添加API配置需要提供api_name和config_data参数")
             
             success = api_config_manager.add_api_config(api_name, config_data)
             message = f"API配置 '{api_name}' 添加成功" if success else f"API配置 '{api_name}' 添加失败"
-            result = {
-                "status": "success" if success else "error",
-                "message": message,
-                "data": {"api_name": api_name}
-            }
-            status_icon = "✅" if success else "❌"
-            return f"{status_icon} API配置添加\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _make_response(
+                "✅" if success else "❌", "API配置添加",
+                "success" if success else "error", message, {"api_name": api_name}
+            )
         
         elif action == "remove":
             if not api_name:
-                result = {
-                    "status": "error",
-                    "message": "删除API配置需要提供api_name参数"
-                }
-                return f"❌ 删除失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("删除失败", "删除API配置需要提供api_name参数")
             
             success = api_config_manager.remove_api_config(api_name)
             message = f"API配置 '{api_name}' 删除成功" if success else f"API配置 '{api_name}' 删除失败或不存在"
-            result = {
-                "status": "success" if success else "error",
-                "message": message,
-                "data": {"api_name": api_name}
-            }
-            status_icon = "✅" if success else "❌"
-            return f"{status_icon} API配置删除\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _make_response(
+                "✅" if success else "❌", "API配置删除",
+                "success" if success else "error", message, {"api_name": api_name}
+            )
         
         elif action == "reload":
             try:
                 api_config_manager.reload_config()
-                result = {
-                    "status": "success",
-                    "message": "API配置重载成功"
-                }
-                return f"✅ API配置重载\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _ok("API配置重载", "API配置重载成功")
             except Exception as e:
-                result = {
-                    "status": "error",
-                    "message": f"API配置重载失败: {str(e)}"
-                }
-                return f"❌ API配置重载\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("API配置重载", f"API配置重载失败: {str(e)}")
         
         elif action == "get_endpoints":
             if not api_name:
-                result = {
-                    "status": "error",
-                    "message": "获取API端点需要提供api_name参数"
-                }
-                return f"❌ 获取失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("获取失败", "获取API端点需要提供api_name参数")
             
             endpoints = api_connector.get_api_endpoints(api_name)
             if not endpoints:
-                result = {
-                    "status": "error",
-                    "message": f"API '{api_name}' 没有配置端点或API不存在",
-                    "data": {"api_name": api_name}
-                }
-                return f"❌ 获取失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("获取失败", f"API '{api_name}' 没有配置端点或API不存在", {"api_name": api_name})
             
-            result = {
-                "status": "success",
-                "message": f"API '{api_name}' 共有 {len(endpoints)} 个端点",
-                "data": {
-                    "api_name": api_name,
-                    "endpoints": endpoints
-                }
-            }
-            return f"📋 API端点列表\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _ok(
+                "API端点列表",
+                f"API '{api_name}' 共有 {len(endpoints)} 个端点",
+                {"api_name": api_name, "endpoints": endpoints},
+                icon="📋"
+            )
         
         else:
-            result = {
-                "status": "error",
-                "message": f"不支持的操作: {action}",
-                "supported_actions": ["list", "test", "add", "remove", "reload", "get_endpoints"]
-            }
-            return f"❌ 操作失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _err(
+                "操作失败",
+                f"不支持的操作: {action}",
+                supported_actions=["list", "test", "add", "remove", "reload", "get_endpoints"]
+            )
     
     except Exception as e:
-        logger.error(f"管理API配置失败: {e}")
-        result = {
-            "status": "error",
-            "message": f"管理API配置失败: {str(e)}",
-            "error_type": type(e).__name__
-        }
-        return f"❌ 操作失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        logger.error("管理API配置失败: %s", e, exc_info=True)
+        return _err("操作失败", f"管理API配置失败: {str(e)}", error_type=type(e).__name__)
 
 def fetch_api_data_impl(
     api_name: str,
@@ -243,13 +291,12 @@ def fetch_api_data_impl(
     Returns:
         str: 数据存储结果和会话信息
     """
+    if not API_MODULES_AVAILABLE:
+        return _api_modules_unavailable()
+    
     try:
         if not api_name or not endpoint_name:
-            result = {
-                "status": "error",
-                "message": "获取API数据需要提供api_name和endpoint_name参数"
-            }
-            return f"❌ 获取失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _err("获取失败", "获取API数据需要提供api_name和endpoint_name参数")
         
         # 调用API
         success, response_data, message = api_connector.call_api(
@@ -261,21 +308,7 @@ def fetch_api_data_impl(
         )
         
         if not success:
-            error_info = _format_user_friendly_error(
-                "api_call_failed", 
-                message,
-                {"api_name": api_name, "endpoint_name": endpoint_name, "params": params}
-            )
-            result = {
-                "status": "error",
-                "message": error_info["friendly_message"],
-                "error_details": error_info,
-                "data": {
-                    "api_name": api_name,
-                    "endpoint_name": endpoint_name
-                }
-            }
-            return f"❌ {error_info['friendly_message']}\n\n💡 解决建议:\n" + "\n".join([f"• {solution}" for solution in error_info['solutions']]) + f"\n\n🔧 技术详情:\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _api_call_failed(api_name, endpoint_name, params, message)
         
         # 自动持久化存储（方式二：默认流程）
         if not storage_session_id:
@@ -289,11 +322,7 @@ def fetch_api_data_impl(
             )
             
             if not create_success:
-                result = {
-                    "status": "error",
-                    "message": f"自动创建存储会话失败: {create_message}"
-                }
-                return f"❌ 会话创建失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err("会话创建失败", f"自动创建存储会话失败: {create_message}")
             
             storage_session_id = auto_session_id
             logger.info(f"自动创建存储会话: {session_name} (ID: {auto_session_id})")
@@ -310,12 +339,11 @@ def fetch_api_data_impl(
                 )
                 
                 if not create_success:
-                    result = {
-                        "status": "error",
-                        "message": f"指定的存储会话 '{storage_session_id}' 不存在，且自动创建失败: {create_message}",
-                        "suggestion": "请检查会话ID是否正确，或者不指定storage_session_id让系统自动创建"
-                    }
-                    return f"❌ 会话不存在\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                    return _err(
+                        "会话不存在",
+                        f"指定的存储会话 '{storage_session_id}' 不存在，且自动创建失败: {create_message}",
+                        suggestion="请检查会话ID是否正确，或者不指定storage_session_id让系统自动创建"
+                    )
                 
                 storage_session_id = new_session_id
                 logger.info(f"自动创建指定名称的存储会话: {storage_session_id} (新ID: {new_session_id})")
@@ -329,15 +357,11 @@ def fetch_api_data_impl(
                 transform_config=transform_config
             )
             if not transform_success:
-                result = {
-                    "status": "error",
-                    "message": f"数据转换失败: {transform_message}",
-                    "data": {
-                        "api_name": api_name,
-                        "endpoint_name": endpoint_name
-                    }
-                }
-                return f"❌ 转换失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return _err(
+                    "转换失败",
+                    f"数据转换失败: {transform_message}",
+                    {"api_name": api_name, "endpoint_name": endpoint_name}
+                )
         
         # 存储到临时数据库
         source_params = {
@@ -355,47 +379,41 @@ def fetch_api_data_impl(
         )
         
         if not success:
-            result = {
-                "status": "error",
-                "message": f"数据存储失败: {storage_message}",
-                "data": {
+            return _err(
+                "存储失败",
+                f"数据存储失败: {storage_message}",
+                {
                     "session_id": storage_session_id,
                     "api_name": api_name,
                     "endpoint_name": endpoint_name
                 }
-            }
-            return f"❌ 存储失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            )
         
-        result = {
-            "status": "success",
-            "message": "API数据已自动存储到数据库",
-            "data": {
+        return _ok(
+            "数据已自动存储到数据库",
+            "API数据已自动存储到数据库",
+            {
                 "session_id": storage_session_id,
                 "api_name": api_name,
                 "endpoint_name": endpoint_name,
                 "stored_records": count,
                 "storage_message": storage_message
             },
-            "metadata": {
-                "timestamp": datetime.now().isoformat(),
+            icon="💾",
+            metadata={
                 "transform_applied": bool(transform_config),
                 "auto_session_created": not storage_session_id
             }
-        }
-        return f"💾 数据已自动存储到数据库\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        )
     
     except Exception as e:
-        logger.error(f"获取API数据失败: {e}")
-        result = {
-            "status": "error",
-            "message": f"获取API数据失败: {str(e)}",
-            "error_type": type(e).__name__,
-            "data": {
-                "api_name": api_name,
-                "endpoint_name": endpoint_name
-            }
-        }
-        return f"❌ 获取失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        logger.error("获取API数据失败: %s", e, exc_info=True)
+        return _err(
+            "获取失败",
+            f"获取API数据失败: {str(e)}",
+            {"api_name": api_name, "endpoint_name": endpoint_name},
+            error_type=type(e).__name__
+        )
 
 def api_data_preview_impl(
     api_name: str,
@@ -433,13 +451,12 @@ def api_data_preview_impl(
     Returns:
         str: 数据预览结果
     """
+    if not API_MODULES_AVAILABLE:
+        return _api_modules_unavailable()
+    
     try:
         if not api_name or not endpoint_name:
-            result = {
-                "status": "error",
-                "message": "预览API数据需要提供api_name和endpoint_name参数"
-            }
-            return f"❌ 预览失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _err("预览失败", "预览API数据需要提供api_name和endpoint_name参数")
         
         # 调用API获取数据
         success, response_data, message = api_connector.call_api(
@@ -449,21 +466,7 @@ def api_data_preview_impl(
         )
         
         if not success:
-            error_info = _format_user_friendly_error(
-                "api_call_failed", 
-                message,
-                {"api_name": api_name, "endpoint_name": endpoint_name, "params": params}
-            )
-            result = {
-                "status": "error",
-                "message": error_info["friendly_message"],
-                "error_details": error_info,
-                "data": {
-                    "api_name": api_name,
-                    "endpoint_name": endpoint_name
-                }
-            }
-            return f"❌ {error_info['friendly_message']}\n\n💡 解决建议:\n" + "\n".join([f"• {solution}" for solution in error_info['solutions']]) + f"\n\n🔧 技术详情:\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _api_call_failed(api_name, endpoint_name, params, message)
         
         # 生成增强的数据预览
         preview_result = _generate_enhanced_preview(
@@ -483,18 +486,19 @@ def api_data_preview_impl(
             if not summary_success:
                 summary_data = {"error": summary_message}
         
-        result = {
-            "status": "success",
-            "message": f"API数据预览成功",
-            "data": {
+        return _ok(
+            "API数据预览",
+            "API数据预览成功",
+            {
                 "api_name": api_name,
                 "endpoint_name": endpoint_name,
-                "preview": preview_result["preview_text"],
                 "data_structure": preview_result["structure_info"],
                 "summary": summary_data if show_summary else None
             },
-            "metadata": {
-                "timestamp": datetime.now().isoformat(),
+            icon="👁️",
+            # 预览文本本身已是格式化好的表格，直接输出，避免在JSON中再转义一遍
+            text=f"📄 数据预览:\n{preview_result['preview_text']}",
+            metadata={
                 "max_rows": max_rows,
                 "max_cols": max_cols,
                 "preview_fields": preview_fields,
@@ -502,22 +506,16 @@ def api_data_preview_impl(
                 "show_data_types": show_data_types,
                 "truncate_length": truncate_length
             }
-        }
-        
-        return f"👁️ API数据预览\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        )
     
     except Exception as e:
-        logger.error(f"预览API数据失败: {e}")
-        result = {
-            "status": "error",
-            "message": f"预览API数据失败: {str(e)}",
-            "error_type": type(e).__name__,
-            "data": {
-                "api_name": api_name,
-                "endpoint_name": endpoint_name
-            }
-        }
-        return f"❌ 预览失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        logger.error("预览API数据失败: %s", e, exc_info=True)
+        return _err(
+            "预览失败",
+            f"预览API数据失败: {str(e)}",
+            {"api_name": api_name, "endpoint_name": endpoint_name},
+            error_type=type(e).__name__
+        )
 
 def create_api_storage_session_impl(
     session_name: str,
@@ -537,13 +535,12 @@ def create_api_storage_session_impl(
     Returns:
         str: 创建结果
     """
+    if not API_MODULES_AVAILABLE:
+        return _api_modules_unavailable()
+    
     try:
         if not session_name or not api_name or not endpoint_name:
-            result = {
-                "status": "error",
-                "message": "创建存储会话需要提供session_name、api_name和endpoint_name参数"
-            }
-            return f"❌ 创建失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _err("创建失败", "创建存储会话需要提供session_name、api_name和endpoint_name参数")
         
         success, session_id, message = api_data_storage.create_storage_session(
             session_name=session_name,
@@ -552,35 +549,25 @@ def create_api_storage_session_impl(
             description=description
         )
         
-        if success:
-            result = {
-                "status": "success",
-                "message": message,
-                "data": {
-                    "session_id": session_id,
-                    "session_name": session_name,
-                    "api_name": api_name,
-                    "endpoint_name": endpoint_name
-                }
-            }
-            return f"✅ 存储会话创建成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
-        else:
-            result = {
-                "status": "error",
-                "message": message
+        if not success:
+            return _err("创建失败", message)
+
+        return _ok(
+            "存储会话创建成功",
+            message,
+            {
+                "session_id": session_id,
+                "session_name": session_name,
+                "api_name": api_name,
+                "endpoint_name": endpoint_name
             }
-            return f"❌ 创建失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        )
     
     except Exception as e:
-        logger.error(f"创建API存储会话失败: {e}")
-        result = {
-            "status": "error",
-            "message": f"创建API存储会话失败: {str(e)}",
-            "error_type": type(e).__name__
-        }
-        return f"❌ 创建失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        logger.error("创建API存储会话失败: %s", e, exc_info=True)
+        return _err("创建失败", f"创建API存储会话失败: {str(e)}", error_type=type(e).__name__)
 
-def list_api_storage_sessions_impl() -> str:
+def list_api_storage_sessions_impl(api_name: str = None, endpoint_name: str = None) -> str:
     """
     📋 API存储会话列表工具 - 查看所有API数据存储会话
     
@@ -588,6 +575,10 @@ def list_api_storage_sessions_impl() -> str:
     - 列出所有API数据存储会话
     - 显示会话详细信息和数据统计
     - 为API数据导入提供会话选择
+
+    Args:
+        api_name: 按API名称过滤 (可选)
+        endpoint_name: 按端点名称过滤，不区分大小写的模糊匹配 (可选)
     
     Returns:
         str: JSON格式的会话列表，包含会话信息和数据统计
@@ -597,29 +588,27 @@ def list_api_storage_sessions_impl() -> str:
     - 选择合适的会话进行数据导入
     - 了解每个会话的数据量和结构
     """
+    if not API_MODULES_AVAILABLE:
+        return _api_modules_unavailable()
+    
     try:
         # 获取所有会话
-        success, sessions, message = api_data_storage.list_storage_sessions()
+        success, sessions, message = api_data_storage.list_storage_sessions(
+            api_name=api_name,
+            endpoint_name=endpoint_name
+        )
         
         if not success:
-            result = {
-                "status": "error",
-                "message": f"获取会话列表失败: {message}",
-                "error_details": message
-            }
-            return f"❌ 获取失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _err("获取失败", f"获取会话列表失败: {message}", error_details=message)
         
         if not sessions:
-            result = {
-                "status": "success",
-                "message": "暂无API存储会话",
-                "data": {
-                    "sessions_count": 0,
-                    "sessions": []
-                },
-                "suggestion": "使用fetch_api_data工具创建API数据存储会话"
-            }
-            return f"📋 暂无API存储会话\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return _ok(
+                "暂无API存储会话",
+                "暂无API存储会话",
+                {"sessions_count": 0, "sessions": []},
+                icon="📋",
+                suggestion="使用fetch_api_data工具创建API数据存储会话"
+            )
         
         # 为每个会话获取数据统计
         sessions_with_stats = []
@@ -654,34 +643,25 @@ def list_api_storage_sessions_impl() -> str:
                 }
                 sessions_with_stats.append(session_info)
         
-        result = {
-            "status": "success",
-            "message": f"找到 {len(sessions)} 个API存储会话",
-            "data": {
+        return _ok(
+            "API存储会话列表",
+            f"找到 {len(sessions)} 个API存储会话",
+            {
                 "sessions_count": len(sessions),
                 "sessions": sessions_with_stats
             },
-            "usage_tips": {
+            icon="📋",
+            usage_tips={
                 "import_data": "使用import_api_data_to_main_db导入数据到主数据库",
                 "preview_data": "会话数据已包含在data_statistics中",
                 "analyze_data": "导入后可使用analyze_data等工具分析"
             },
-            "metadata": {
-                "timestamp": datetime.now().isoformat(),
-                "operation_type": "list_api_sessions"
-            }
-        }
-        
-        return f"📋 API存储会话列表\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            metadata={"operation_type": "list_api_sessions"}
+        )
         
     except Exception as e:
-        logger.error(f"获取API存储会话列表失败: {e}")
-        result = {
-            "status": "error",
-            "message": f"获取会话列表失败: {str(e)}",
-            "error_type": type(e).__name__
-        }
-        return f"❌ 获取失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        logger.error("获取API存储会话列表失败: %s", e, exc_info=True)
+        return _err("获取失败", f"获取会话列表失败: {str(e)}", error_type=type(e).__name__)
 
 # ================================
 # API管理辅助函数
@@ -735,8 +715,6 @@ def _generate_enhanced_preview(data, max_rows=10, max_cols=10, preview_fields=No
                              preview_depth=3, show_data_types=True, truncate_length=100) -> dict:
     """生成增强的数据预览"""
     try:
-        import pandas as pd
-        
         # 如果数据是字典或列表，尝试转换为DataFrame
         if isinstance(data, dict):
             if preview_fields:
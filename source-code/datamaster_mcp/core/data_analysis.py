@@ -16,7 +16,16 @@ import numpy as np
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import logging
-from scipy import stats
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 可选：DuckDB列式引擎，用于加速数值统计
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+    duckdb = None
 
 # 设置日志
 logger = logging.getLogger("DataMaster_MCP.DataAnalysis")
@@ -36,9 +45,51 @@ except ImportError:
 
 # 导入数据库相关函数
 try:
-    from .database import get_db_connection, _escape_identifier, _table_exists
+    from .database import (
+        get_db_connection, _escape_identifier, _table_exists, _cached_result,
+        _get_table_columns, _declared_storage_type, _record_row_count, _dumps,
+        _row_counts_current, _mark_row_counts_current
+    )
 except ImportError:
     # 如果相对导入失败，定义本地版本
+    def _dumps(obj) -> str:
+        """序列化工具返回结果"""
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+    
+    def _record_row_count(conn, table_name: str, row_count: int):
+        """本地版本不维护行数记录"""
+        pass
+    
+    def _row_counts_current(conn) -> bool:
+        """本地版本每次都重新计数"""
+        return False
+    
+    def _mark_row_counts_current(conn):
+        """本地版本不记录核对状态"""
+        pass
+    
+    def _get_table_columns(table_name: str) -> tuple:
+        """获取表的列名列表和{列名: 声明类型}映射"""
+        with get_db_connection() as conn:
+            rows = conn.execute(f"PRAGMA table_info({_escape_identifier(table_name)})").fetchall()
+        return [row[1] for row in rows], {row[1]: row[2] for row in rows}
+    
+    def _declared_storage_type(declared_type: str) -> Optional[str]:
+        """按SQLite类型亲和性规则把声明类型映射为存储类型，无法确定时返回None"""
+        declared_type = (declared_type or "").upper()
+        if "INT" in declared_type:
+            return 'integer'
+        if any(key in declared_type for key in ("CHAR", "CLOB", "TEXT")):
+            return 'text'
+        if any(key in declared_type for key in ("REAL", "FLOA", "DOUB")):
+            return 'real'
+        # 无声明类型、BLOB和NUMERIC亲和性的列需要看实际存储的值
+        return None
+    
+    def _cached_result(func):
+        """本地版本不缓存结果"""
+        return func
+    
     def get_db_connection():
         """获取数据库连接"""
         import sqlite3
@@ -62,10 +113,120 @@ except ImportError:
         except Exception:
             return False
 
+# 导入数值计算内核
+try:
+    from .analytics_kernels import outside_mask, zscore_outlier_mask, pearson_matrix
+except ImportError:
+    from datamaster_mcp.core.analytics_kernels import outside_mask, zscore_outlier_mask, pearson_matrix
+
+# ================================
+# DuckDB 加速
+# ================================
+
+_duckdb_conn = None
+_duckdb_db_path = None
+_duckdb_failed = False
+_duckdb_lock = threading.Lock()
+
+def _get_duckdb_cursor():
+    """获取挂载本地SQLite数据库的DuckDB游标，不可用时返回None"""
+    global _duckdb_conn, _duckdb_db_path, _duckdb_failed
+    if not DUCKDB_AVAILABLE or _duckdb_failed:
+        return None
+    # 以SQLite连接实际打开的文件为准，数据库路径变更后重新挂载
+    with get_db_connection() as sqlite_conn:
+        db_path = sqlite_conn.execute("PRAGMA database_list").fetchone()[2]
+    with _duckdb_lock:
+        if _duckdb_conn is None or _duckdb_db_path != db_path:
+            try:
+                # 只加载本地已安装的sqlite扩展，不联网下载
+                conn = duckdb.connect(config={"autoinstall_known_extensions": False})
+                conn.execute("LOAD sqlite")
+            except Exception as e:
+                # 扩展未安装时不再重试，回退到SQLite实现
+                _duckdb_failed = True
+                logger.warning(f"DuckDB sqlite扩展不可用，使用SQLite计算统计: {e}")
+                return None
+            try:
+                escaped_path = db_path.replace("'", "''")
+                conn.execute(f"ATTACH '{escaped_path}' AS sqlite_db (TYPE SQLITE, READ_ONLY)")
+            except Exception as e:
+                conn.close()
+                logger.warning(f"DuckDB挂载数据库失败，使用SQLite计算统计: {e}")
+                return None
+            # 旧连接不主动关闭，其他线程可能仍在使用它的游标
+            _duckdb_conn = conn
+            _duckdb_db_path = db_path
+        # 每次调用使用独立游标，保证多线程安全
+        return _duckdb_conn.cursor()
+
+def _duckdb_numeric_summary(table_name: str, columns: list) -> Optional[dict]:
+    """用DuckDB一次扫描计算多个数值列的中位数、标准差和四分位数"""
+    cursor = _get_duckdb_cursor()
+    if cursor is None or not columns:
+        return None
+    try:
+        escaped_table = _escape_identifier(table_name)
+        select_parts = []
+        for col in columns:
+            c = _escape_identifier(col)
+            select_parts.extend([
+                f"median({c})",
+                f"stddev_pop({c})",
+                f"quantile_cont({c}, 0.25)",
+                f"quantile_cont({c}, 0.75)"
+            ])
+        row = cursor.execute(
+            f"SELECT {', '.join(select_parts)} FROM sqlite_db.{escaped_table}"
+        ).fetchone()
+        return {
+            col: {
+                "median": row[i * 4],
+                "std_dev": row[i * 4 + 1],
+                "q25": row[i * 4 + 2],
+                "q75": row[i * 4 + 3]
+            }
+            for i, col in enumerate(columns)
+        }
+    except Exception as e:
+        logger.warning(f"DuckDB统计失败，回退到SQLite: {e}")
+        return None
+    finally:
+        cursor.close()
+
+def _duckdb_correlation(table_name: str, columns: list) -> Optional[dict]:
+    """用DuckDB的corr聚合一次扫描计算两两皮尔逊相关系数"""
+    cursor = _get_duckdb_cursor()
+    if cursor is None:
+        return None
+    try:
+        escaped_table = _escape_identifier(table_name)
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i + 1, len(columns))]
+        select_parts = [
+            f"corr({_escape_identifier(columns[i])}, {_escape_identifier(columns[j])})"
+            for i, j in pairs
+        ]
+        row = cursor.execute(
+            f"SELECT {', '.join(select_parts)} FROM sqlite_db.{escaped_table}"
+        ).fetchone()
+        result = {col: {col: 1.0} for col in columns}
+        for (i, j), value in zip(pairs, row):
+            value = round(value, 4) if value is not None else None
+            result[columns[i]][columns[j]] = value
+            result[columns[j]][columns[i]] = value
+        # 保持与列顺序一致的矩阵结构
+        return {col1: {col2: result[col1][col2] for col2 in columns} for col1 in columns}
+    except Exception as e:
+        logger.warning(f"DuckDB相关性计算失败，回退到pandas: {e}")
+        return None
+    finally:
+        cursor.close()
+
 # ================================
 # 数据分析工具函数
 # ================================
 
+@_cached_result
 def analyze_data_impl(
     analysis_type: str,
     table_name: str,
@@ -107,7 +268,7 @@ def analyze_data_impl(
                 "status": "error",
                 "message": f"表 '{table_name}' 不存在"
             }
-            return f"❌ 表不存在\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"❌ 表不存在\n\n{_dumps(result)}"
         
         # 路由到具体的分析函数
         analysis_map = {
@@ -124,7 +285,7 @@ def analyze_data_impl(
                 "message": f"不支持的分析类型: {analysis_type}",
                 "supported_types": list(analysis_map.keys())
             }
-            return f"❌ 分析类型错误\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"❌ 分析类型错误\n\n{_dumps(result)}"
         
         # 执行分析
         analysis_result = analysis_map[analysis_type](table_name, columns or [], options or {})
@@ -134,7 +295,7 @@ def analyze_data_impl(
                 "status": "error",
                 "message": analysis_result["error"]
             }
-            return f"❌ 分析失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"❌ 分析失败\n\n{_dumps(result)}"
         
         # 返回成功结果
         result = {
@@ -149,7 +310,7 @@ def analyze_data_impl(
             }
         }
         
-        return f"✅ 分析完成\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"✅ 分析完成\n\n{_dumps(result)}"
         
     except Exception as e:
         logger.error(f"数据分析失败: {e}")
@@ -158,8 +319,9 @@ def analyze_data_impl(
             "message": f"数据分析失败: {str(e)}",
             "error_type": type(e).__name__
         }
-        return f"❌ 分析失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 分析失败\n\n{_dumps(result)}"
 
+@_cached_result
 def get_data_info_impl(
     info_type: str = "tables",
     table_name: str = None,
@@ -209,7 +371,7 @@ def get_data_info_impl(
                             "data_source": data_source
                         }
                     }
-                    return f"✅ 表列表获取成功（数据源: {data_source}）\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                    return f"✅ 表列表获取成功（数据源: {data_source}）\n\n{_dumps(result)}"
                     
                 elif info_type == "schema":
                     if not table_name:
@@ -232,7 +394,7 @@ def get_data_info_impl(
                             "data_source": data_source
                         }
                     }
-                    return f"✅ 表结构获取成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                    return f"✅ 表结构获取成功\n\n{_dumps(result)}"
                     
                 elif info_type == "stats":
                     if not table_name:
@@ -255,7 +417,7 @@ def get_data_info_impl(
                             "data_source": data_source
                         }
                     }
-                    return f"✅ 表统计获取成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                    return f"✅ 表统计获取成功\n\n{_dumps(result)}"
                     
                 else:
                     raise ValueError(f"外部数据库不支持 '{info_type}' 操作")
@@ -266,7 +428,7 @@ def get_data_info_impl(
                     "message": f"外部数据库操作失败: {str(e)}",
                     "data_source": data_source
                 }
-                return f"❌ 外部数据库操作失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return f"❌ 外部数据库操作失败\n\n{_dumps(result)}"
         else:
             # 使用本地SQLite数据库
             if info_type == "tables":
@@ -287,7 +449,7 @@ def get_data_info_impl(
                     "message": f"不支持的信息类型: {info_type}",
                     "supported_types": ["tables", "schema", "stats", "cleanup"]
                 }
-                return f"❌ 信息类型错误\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return f"❌ 信息类型错误\n\n{_dumps(result)}"
                 
     except Exception as e:
         logger.error(f"获取数据信息失败: {e}")
@@ -296,147 +458,292 @@ def get_data_info_impl(
             "message": f"获取数据信息失败: {str(e)}",
             "error_type": type(e).__name__
         }
-        return f"❌ 获取信息失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 获取信息失败\n\n{_dumps(result)}"
 
 # ================================
 # 数据分析辅助函数
 # ================================
 
+# basic_stats单条聚合查询最多涉及的列数（SQLite结果列数上限为2000）
+_STATS_COLUMNS_PER_QUERY = 100
+
+# 缺失值统计每列只需一个聚合表达式，单条查询可容纳更多列
+_MISSING_COLUMNS_PER_QUERY = 500
+
+def _fused_column_aggregates(conn, escaped_table: str, columns: list, declared_types: dict) -> tuple:
+    """按声明类型确定列类型（无法确定的列一次查询探测），再用一次表扫描计算所有列的计数、均值、极值和长度统计"""
+    escaped_columns = [_escape_identifier(col) for col in columns]
+    
+    column_types = {col: _declared_storage_type(declared_types.get(col)) for col in columns}
+    
+    # 声明类型无法确定的列，取第一个非空值的存储类型
+    unknown = [(col, c) for col, c in zip(columns, escaped_columns) if column_types[col] is None]
+    if unknown:
+        probes = ", ".join(
+            f"(SELECT typeof({c}) FROM {escaped_table} WHERE {c} IS NOT NULL LIMIT 1)"
+            for _, c in unknown
+        )
+        row = conn.execute(f"SELECT {probes}").fetchone()
+        for (col, _), col_type in zip(unknown, row):
+            column_types[col] = col_type or 'null'
+    
+    select_parts = ["COUNT(*)"]
+    for col, c in zip(columns, escaped_columns):
+        if column_types[col] in ('integer', 'real'):
+            select_parts += [f"COUNT({c})", f"AVG({c})", f"MIN({c})", f"MAX({c})"]
+        else:
+            select_parts += [
+                f"COUNT({c})", f"COUNT(DISTINCT {c})",
+                f"AVG(LENGTH({c}))", f"MIN(LENGTH({c}))", f"MAX(LENGTH({c}))"
+            ]
+    values = iter(conn.execute(f"SELECT {', '.join(select_parts)} FROM {escaped_table}").fetchone())
+    
+    total_count = next(values)
+    aggregates = {}
+    for col in columns:
+        if column_types[col] in ('integer', 'real'):
+            keys = ("non_null_count", "mean", "min", "max")
+        else:
+            keys = ("non_null_count", "unique_count", "avg_length", "min_length", "max_length")
+        aggregates[col] = {"total_count": total_count}
+        aggregates[col].update(zip(keys, values))
+    return column_types, aggregates
+
+# sqlean的stats扩展：提供median、percentile_25/75、stddev_pop等C实现的聚合函数
+SQLEAN_STATS_EXTENSION = "stats"
+_stats_extension_failed = False
+
+def _load_stats_extension(conn) -> bool:
+    """确保连接上已加载stats扩展，扩展不可用时返回False且不再重试"""
+    global _stats_extension_failed
+    if _stats_extension_failed:
+        return False
+    try:
+        conn.execute("SELECT median(1)").fetchone()
+        return True
+    except sqlite3.OperationalError:
+        pass
+    try:
+        conn.enable_load_extension(True)
+        try:
+            conn.load_extension(SQLEAN_STATS_EXTENSION)
+        finally:
+            conn.enable_load_extension(False)
+        return True
+    except Exception as e:
+        _stats_extension_failed = True
+        logger.info(f"SQLite stats扩展不可用，使用numpy计算分位数: {e}")
+        return False
+
+def _sqlite_stats_numeric_summary(conn, escaped_table: str, numeric_columns: list) -> Optional[dict]:
+    """用stats扩展的聚合函数在SQLite内计算中位数、标准差和四分位数，不把数据读入Python"""
+    if not numeric_columns or not _load_stats_extension(conn):
+        return None
+    try:
+        summary = {}
+        for start in range(0, len(numeric_columns), _STATS_COLUMNS_PER_QUERY):
+            batch = numeric_columns[start:start + _STATS_COLUMNS_PER_QUERY]
+            select_parts = []
+            for col in batch:
+                c = _escape_identifier(col)
+                select_parts.extend([
+                    f"median({c})",
+                    f"stddev_pop({c})",
+                    f"percentile_25({c})",
+                    f"percentile_75({c})"
+                ])
+            row = conn.execute(f"SELECT {', '.join(select_parts)} FROM {escaped_table}").fetchone()
+            for i, col in enumerate(batch):
+                summary[col] = {
+                    "median": row[i * 4],
+                    "std_dev": row[i * 4 + 1],
+                    "q25": row[i * 4 + 2],
+                    "q75": row[i * 4 + 3]
+                }
+        return summary
+    except Exception as e:
+        logger.warning(f"stats扩展统计失败，回退到numpy: {e}")
+        return None
+
+def _read_float_matrix(conn, escaped_table: str, columns: list) -> tuple:
+    """一次读取多列，返回(DataFrame, float64二维数组)，NULL和无法转为数值的值为NaN"""
+    columns_str = ", ".join(_escape_identifier(col) for col in columns)
+    df = pd.read_sql(f"SELECT {columns_str} FROM {escaped_table}", conn)
+    # SQLite允许数值列混存文本，这类列逐列转换，无法转换的值按缺失处理
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object:
+            df.isetitem(i, pd.to_numeric(df.iloc[:, i], errors='coerce'))
+    return df, df.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _numpy_numeric_summary(conn, escaped_table: str, numeric_columns: list) -> dict:
+    """一次读取所有数值列为float64二维数组，向量化计算中位数、标准差和四分位数"""
+    if not numeric_columns:
+        return {}
+    
+    arr = _read_float_matrix(conn, escaped_table, numeric_columns)[1]
+    
+    # 全为NULL的列不参与计算，避免nan*函数的All-NaN警告
+    has_values = ~np.isnan(arr).all(axis=0)
+    summary = {col: {"median": None, "std_dev": None, "q25": None, "q75": None} for col in numeric_columns}
+    if has_values.any():
+        valid = arr[:, has_values]
+        # nanpercentile基于np.partition做部分排序，无需SQLite先ORDER BY
+        q25, median, q75 = np.nanpercentile(valid, [25, 50, 75], axis=0)
+        std_dev = np.nanstd(valid, axis=0)
+        valid_columns = [col for col, keep in zip(numeric_columns, has_values) if keep]
+        for i, col in enumerate(valid_columns):
+            summary[col] = {
+                "median": float(median[i]),
+                "std_dev": float(std_dev[i]),
+                "q25": float(q25[i]),
+                "q75": float(q75[i])
+            }
+    return summary
+
+# 按列并行执行分析查询的最大线程数
+COLUMN_WORKERS = 8
+
+_column_executor = None
+_column_executor_lock = threading.Lock()
+
+def _map_columns(func, columns: list) -> dict:
+    """对每列执行func并返回{列名: 结果}，多列时在常驻线程池中并行执行"""
+    global _column_executor
+    if len(columns) <= 1:
+        return {col: func(col) for col in columns}
+    with _column_executor_lock:
+        if _column_executor is None:
+            # 线程常驻，每个线程复用自己的数据库连接；SQLite执行查询时会释放GIL
+            _column_executor = ThreadPoolExecutor(
+                max_workers=COLUMN_WORKERS, thread_name_prefix="datamaster-column"
+            )
+    return dict(zip(columns, _column_executor.map(func, columns)))
+
+def _top_values(escaped_table: str, col: str) -> list:
+    """获取列中最常见的值（前5个）及频次"""
+    escaped_col = _escape_identifier(col)
+    conn = get_db_connection()
+    cursor = conn.execute(f"""
+        SELECT {escaped_col}, COUNT(*) as freq 
+        FROM {escaped_table} 
+        WHERE {escaped_col} IS NOT NULL 
+        GROUP BY {escaped_col} 
+        ORDER BY freq DESC 
+        LIMIT 5
+    """)
+    return cursor.fetchall()
+
 def _calculate_basic_stats(table_name: str, columns: list, options: dict) -> dict:
     """计算基础统计信息 - 智能处理数值和文本列"""
     try:
         escaped_table = _escape_identifier(table_name)
         
         with get_db_connection() as conn:
-            # 获取列信息
+            # 获取列信息（列名和声明类型来自表结构缓存）
+            column_names, declared_types = _get_table_columns(table_name)
             if columns:
                 target_columns = columns
             else:
-                cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
-                target_columns = [col[1] for col in cursor.fetchall()]
+                target_columns = list(column_names)
             
             if not target_columns:
                 return {"error": "没有找到可分析的列"}
             
+            # 分批确定列类型并在一次扫描中计算所有列的聚合
+            column_types = {}
+            aggregates = {}
+            for start in range(0, len(target_columns), _STATS_COLUMNS_PER_QUERY):
+                batch = target_columns[start:start + _STATS_COLUMNS_PER_QUERY]
+                batch_types, batch_aggregates = _fused_column_aggregates(conn, escaped_table, batch, declared_types)
+                column_types.update(batch_types)
+                aggregates.update(batch_aggregates)
+            
+            # 各文本列的最常见值分组查询互不依赖，在线程池中并行执行
+            categorical_columns = [col for col in target_columns if column_types[col] not in ('integer', 'real')]
+            top_values_by_column = _map_columns(
+                lambda col: _top_values(escaped_table, col), categorical_columns
+            )
+            
             # 分析每一列
             stats_result = {}
             numeric_columns = []
             text_columns = []
             
             for col in target_columns:
-                escaped_col = _escape_identifier(col)
-                
-                # 检测列类型
-                cursor = conn.execute(f"SELECT typeof({escaped_col}) FROM {escaped_table} WHERE {escaped_col} IS NOT NULL LIMIT 1")
-                result = cursor.fetchone()
-                col_type = result[0] if result else 'null'
-                
-                # 获取基本信息
-                cursor = conn.execute(f"""
-                    SELECT 
-                        COUNT(*) as total_count,
-                        COUNT({escaped_col}) as non_null_count,
-                        COUNT(CASE WHEN {escaped_col} IS NULL THEN 1 END) as null_count
-                    FROM {escaped_table}
-                """)
-                basic_info = cursor.fetchone()
+                col_type = column_types[col]
+                agg = aggregates[col]
+                total_count = agg["total_count"]
+                non_null_count = agg["non_null_count"]
+                null_count = total_count - non_null_count
+                null_percentage = round((null_count / total_count) * 100, 2) if total_count > 0 else 0
                 
                 if col_type in ['integer', 'real']:
-                    # 数值列统计
+                    # 数值列统计（中位数和标准差在循环结束后统一计算）
                     numeric_columns.append(col)
-                    cursor = conn.execute(f"""
-                        SELECT 
-                            AVG({escaped_col}) as mean,
-                            MIN({escaped_col}) as min_val,
-                            MAX({escaped_col}) as max_val
-                        FROM {escaped_table}
-                        WHERE {escaped_col} IS NOT NULL
-                    """)
-                    numeric_stats = cursor.fetchone()
-                    
-                    # 计算中位数和标准差
-                    cursor = conn.execute(f"SELECT {escaped_col} FROM {escaped_table} WHERE {escaped_col} IS NOT NULL ORDER BY {escaped_col}")
-                    values = [row[0] for row in cursor.fetchall()]
-                    
-                    if values:
-                        median = np.median(values)
-                        std_dev = np.std(values)
-                        q25 = np.percentile(values, 25)
-                        q75 = np.percentile(values, 75)
-                    else:
-                        median = std_dev = q25 = q75 = None
-                    
                     stats_result[col] = {
                         "column_type": "numeric",
                         "data_type": col_type,
-                        "total_count": basic_info[0],
-                        "non_null_count": basic_info[1],
-                        "null_count": basic_info[2],
-                        "null_percentage": round((basic_info[2] / basic_info[0]) * 100, 2) if basic_info[0] > 0 else 0,
-                        "mean": round(numeric_stats[0], 4) if numeric_stats[0] else None,
-                        "median": round(median, 4) if median is not None else None,
-                        "std_dev": round(std_dev, 4) if std_dev is not None else None,
-                        "min": numeric_stats[1],
-                        "max": numeric_stats[2],
-                        "q25": round(q25, 4) if q25 is not None else None,
-                        "q75": round(q75, 4) if q75 is not None else None
+                        "total_count": total_count,
+                        "non_null_count": non_null_count,
+                        "null_count": null_count,
+                        "null_percentage": null_percentage,
+                        "mean": round(agg["mean"], 4) if agg["mean"] is not None else None,
+                        "min": agg["min"],
+                        "max": agg["max"]
                     }
                     
                 else:
-                    # 文本列统计
+                    # 文本列统计（最常见的值已在循环前并行查询）
                     text_columns.append(col)
+                    unique_count = agg["unique_count"]
+                    top_values = top_values_by_column[col]
                     
-                    # 获取唯一值数量
-                    cursor = conn.execute(f"SELECT COUNT(DISTINCT {escaped_col}) FROM {escaped_table} WHERE {escaped_col} IS NOT NULL")
-                    unique_count = cursor.fetchone()[0]
-                    
-                    # 获取最常见的值（前5个）
-                    cursor = conn.execute(f"""
-                        SELECT {escaped_col}, COUNT(*) as freq 
-                        FROM {escaped_table} 
-                        WHERE {escaped_col} IS NOT NULL 
-                        GROUP BY {escaped_col} 
-                        ORDER BY freq DESC 
-                        LIMIT 5
-                    """)
-                    top_values = cursor.fetchall()
-                    
-                    # 计算字符串长度统计（如果是文本）
+                    # 字符串长度统计（如果是文本）
                     length_stats = None
-                    if col_type == 'text':
-                        cursor = conn.execute(f"""
-                            SELECT 
-                                AVG(LENGTH({escaped_col})) as avg_length,
-                                MIN(LENGTH({escaped_col})) as min_length,
-                                MAX(LENGTH({escaped_col})) as max_length
-                            FROM {escaped_table}
-                            WHERE {escaped_col} IS NOT NULL
-                        """)
-                        length_result = cursor.fetchone()
-                        if length_result[0] is not None:
-                            length_stats = {
-                                "avg_length": round(length_result[0], 2),
-                                "min_length": length_result[1],
-                                "max_length": length_result[2]
-                            }
+                    if col_type == 'text' and agg["avg_length"] is not None:
+                        length_stats = {
+                            "avg_length": round(agg["avg_length"], 2),
+                            "min_length": agg["min_length"],
+                            "max_length": agg["max_length"]
+                        }
                     
                     stats_result[col] = {
                         "column_type": "categorical",
                         "data_type": col_type,
-                        "total_count": basic_info[0],
-                        "non_null_count": basic_info[1],
-                        "null_count": basic_info[2],
-                        "null_percentage": round((basic_info[2] / basic_info[0]) * 100, 2) if basic_info[0] > 0 else 0,
+                        "total_count": total_count,
+                        "non_null_count": non_null_count,
+                        "null_count": null_count,
+                        "null_percentage": null_percentage,
                         "unique_count": unique_count,
-                        "unique_percentage": round((unique_count / basic_info[1]) * 100, 2) if basic_info[1] > 0 else 0,
+                        "unique_percentage": round((unique_count / non_null_count) * 100, 2) if non_null_count > 0 else 0,
                         "top_values": [{
                             "value": str(val[0]),
                             "frequency": val[1],
-                            "percentage": round((val[1] / basic_info[1]) * 100, 2) if basic_info[1] > 0 else 0
+                            "percentage": round((val[1] / non_null_count) * 100, 2) if non_null_count > 0 else 0
                         } for val in top_values],
                         "length_stats": length_stats
                     }
             
+            # 数值列的中位数和标准差：优先DuckDB单次扫描，其次SQLite stats扩展，否则一次读取所有数值列用numpy计算
+            numeric_summary = _duckdb_numeric_summary(table_name, numeric_columns)
+            if numeric_summary is None:
+                numeric_summary = _sqlite_stats_numeric_summary(conn, escaped_table, numeric_columns)
+            if numeric_summary is None:
+                numeric_summary = _numpy_numeric_summary(conn, escaped_table, numeric_columns)
+            for col in numeric_columns:
+                col_summary = numeric_summary[col]
+                median = col_summary["median"]
+                std_dev = col_summary["std_dev"]
+                q25 = col_summary["q25"]
+                q75 = col_summary["q75"]
+                
+                stats_result[col].update({
+                    "median": round(median, 4) if median is not None else None,
+                    "std_dev": round(std_dev, 4) if std_dev is not None else None,
+                    "q25": round(q25, 4) if q25 is not None else None,
+                    "q75": round(q75, 4) if q75 is not None else None
+                })
+            
             # 添加汇总信息
             summary = {
                 "total_columns": len(target_columns),
@@ -464,30 +771,39 @@ def _calculate_correlation(table_name: str, columns: list, options: dict) -> dic
             if columns and len(columns) >= 2:
                 numeric_columns = columns[:10]  # 限制最多10列
             else:
-                cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
-                all_columns = cursor.fetchall()
-                numeric_columns = [col[1] for col in all_columns if col[2] in ['INTEGER', 'REAL', 'NUMERIC']][:10]
+                column_names, column_types = _get_table_columns(table_name)
+                numeric_columns = [col for col in column_names if column_types[col] in ['INTEGER', 'REAL', 'NUMERIC']][:10]
             
             if len(numeric_columns) < 2:
                 return {"error": "需要至少2个数值列来计算相关性"}
             
-            # 获取数据
-            escaped_columns = [_escape_identifier(col) for col in numeric_columns]
-            columns_str = ", ".join(escaped_columns)
-            df = pd.read_sql(f"SELECT {columns_str} FROM {escaped_table}", conn)
+            # 优先使用DuckDB聚合计算，避免把整列数据读入pandas
+            duckdb_result = _duckdb_correlation(table_name, numeric_columns)
+            if duckdb_result is not None:
+                return {
+                    "correlation_matrix": duckdb_result,
+                    "columns": numeric_columns,
+                    "method": "pearson"
+                }
             
-            # 重命名列为原始名称（去掉转义符号）
-            df.columns = numeric_columns
+            # 获取数据：直接读取为float64二维数组
+            df, arr = _read_float_matrix(conn, escaped_table, numeric_columns)
             
-            # 计算相关系数矩阵
-            correlation_matrix = df.corr().round(4)
+            # 与DuckDB的corr一致，每对列只使用两列都不缺失的行：
+            # 没有缺失值时交给计算内核，否则由pandas逐对计算
+            if np.isnan(arr).any():
+                correlation_matrix = df.astype(np.float64).corr().to_numpy().round(4)
+            elif arr.shape[0] > 1:
+                correlation_matrix = pearson_matrix(arr).round(4)
+            else:
+                correlation_matrix = np.full((len(numeric_columns), len(numeric_columns)), np.nan)
             
-            # 转换为字典格式
-            result = {}
-            for i, col1 in enumerate(numeric_columns):
-                result[col1] = {}
-                for j, col2 in enumerate(numeric_columns):
-                    result[col1][col2] = correlation_matrix.iloc[i, j]
+            # 转换为字典格式（tolist一次性转为Python浮点数）
+            matrix_rows = correlation_matrix.tolist()
+            result = {
+                col1: dict(zip(numeric_columns, row))
+                for col1, row in zip(numeric_columns, matrix_rows)
+            }
             
             return {
                 "correlation_matrix": result,
@@ -511,43 +827,51 @@ def _detect_outliers(table_name: str, columns: list, options: dict) -> dict:
             if columns:
                 numeric_columns = columns[:5]  # 限制最多5列
             else:
-                cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
-                all_columns = cursor.fetchall()
-                numeric_columns = [col[1] for col in all_columns if col[2] in ['INTEGER', 'REAL', 'NUMERIC']][:5]
+                column_names, column_types = _get_table_columns(table_name)
+                numeric_columns = [col for col in column_names if column_types[col] in ['INTEGER', 'REAL', 'NUMERIC']][:5]
             
             if not numeric_columns:
                 return {"error": "没有找到数值列来检测异常值"}
             
             outliers_result = {}
             
-            for col in numeric_columns:
-                escaped_col = _escape_identifier(col)
-                
-                # 获取数据
-                cursor = conn.execute(f"SELECT {escaped_col} FROM {escaped_table} WHERE {escaped_col} IS NOT NULL")
-                values = [row[0] for row in cursor.fetchall()]
+            # 一次读取所有目标列为float64二维数组（NULL为NaN）
+            df, arr = _read_float_matrix(conn, escaped_table, numeric_columns)
+            valid_counts = (~np.isnan(arr)).sum(axis=0)
+            
+            # IQR四分位数按列向量化计算（数据点太少的列不参与计算）
+            enough = valid_counts >= 4
+            if enough.any() and method == "iqr":
+                q1_all, q3_all = np.nanpercentile(arr[:, enough], [25, 75], axis=0)
+            
+            stat_index = 0
+            for i, col in enumerate(numeric_columns):
+                total_count = int(valid_counts[i])
                 
-                if len(values) < 4:  # 需要足够的数据点
+                if not enough[i]:  # 需要足够的数据点
                     outliers_result[col] = {
                         "method": method,
                         "outliers": [],
                         "outlier_count": 0,
-                        "total_count": len(values),
+                        "total_count": total_count,
                         "note": "数据点太少，无法检测异常值"
                     }
                     continue
                 
-                outliers = []
+                # NaN与任何边界比较都为False，不会被判为异常值
+                array = arr[:, i]
+                original_values = df.iloc[:, i].to_numpy()
+                j = stat_index
+                stat_index += 1
                 
                 if method == "iqr":
                     # IQR方法
-                    q1 = np.percentile(values, 25)
-                    q3 = np.percentile(values, 75)
+                    q1, q3 = float(q1_all[j]), float(q3_all[j])
                     iqr = q3 - q1
                     lower_bound = q1 - threshold * iqr
                     upper_bound = q3 + threshold * iqr
                     
-                    outliers = [v for v in values if v < lower_bound or v > upper_bound]
+                    outliers = original_values[outside_mask(array, lower_bound, upper_bound)].tolist()
                     
                     outliers_result[col] = {
                         "method": "IQR",
@@ -559,27 +883,25 @@ def _detect_outliers(table_name: str, columns: list, options: dict) -> dict:
                         "upper_bound": round(upper_bound, 4),
                         "outliers": sorted(set(outliers)),
                         "outlier_count": len(outliers),
-                        "total_count": len(values),
-                        "outlier_percentage": round((len(outliers) / len(values)) * 100, 2)
+                        "total_count": total_count,
+                        "outlier_percentage": round((len(outliers) / total_count) * 100, 2)
                     }
                     
                 elif method == "zscore":
-                    # Z-score方法
-                    mean_val = np.mean(values)
-                    std_val = np.std(values)
+                    # Z-score方法：均值、标准差和异常值掩码由计算内核一次完成
+                    mask, mean_val, std_val = zscore_outlier_mask(array, threshold)
                     
                     if std_val == 0:
                         outliers_result[col] = {
                             "method": "Z-score",
                             "outliers": [],
                             "outlier_count": 0,
-                            "total_count": len(values),
+                            "total_count": total_count,
                             "note": "标准差为0，无法使用Z-score方法"
                         }
                         continue
                     
-                    z_scores = [(v - mean_val) / std_val for v in values]
-                    outliers = [values[i] for i, z in enumerate(z_scores) if abs(z) > threshold]
+                    outliers = original_values[mask].tolist()
                     
                     outliers_result[col] = {
                         "method": "Z-score",
@@ -588,8 +910,8 @@ def _detect_outliers(table_name: str, columns: list, options: dict) -> dict:
                         "std": round(std_val, 4),
                         "outliers": sorted(set(outliers)),
                         "outlier_count": len(outliers),
-                        "total_count": len(values),
-                        "outlier_percentage": round((len(outliers) / len(values)) * 100, 2)
+                        "total_count": total_count,
+                        "outlier_percentage": round((len(outliers) / total_count) * 100, 2)
                     }
             
             return {
@@ -611,37 +933,29 @@ def _check_missing_values(table_name: str, columns: list, options: dict) -> dict
             if columns:
                 target_columns = columns
             else:
-                cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
-                target_columns = [col[1] for col in cursor.fetchall()]
+                target_columns = list(_get_table_columns(table_name)[0])
             
             if not target_columns:
                 return {"error": "没有找到可分析的列"}
             
-            # 获取总行数
-            cursor = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}")
-            total_rows = cursor.fetchone()[0]
+            # 一次表扫描统计总行数和各列非空数（按批拆分以免表达式过多）
+            total_rows = 0
+            non_null_counts = []
+            for start in range(0, len(target_columns), _MISSING_COLUMNS_PER_QUERY):
+                batch = target_columns[start:start + _MISSING_COLUMNS_PER_QUERY]
+                counts = ", ".join(f"COUNT({_escape_identifier(col)})" for col in batch)
+                row = conn.execute(f"SELECT COUNT(*), {counts} FROM {escaped_table}").fetchone()
+                total_rows = row[0]
+                non_null_counts.extend(row[1:])
             
             missing_result = {}
-            
-            for col in target_columns:
-                escaped_col = _escape_identifier(col)
-                
-                # 计算缺失值
-                cursor = conn.execute(f"""
-                    SELECT 
-                        COUNT(*) as total,
-                        COUNT({escaped_col}) as non_null,
-                        COUNT(CASE WHEN {escaped_col} IS NULL THEN 1 END) as null_count
-                    FROM {escaped_table}
-                """)
-                stats = cursor.fetchone()
-                
-                null_count = stats[2]
+            for col, non_null_count in zip(target_columns, non_null_counts):
+                null_count = total_rows - non_null_count
                 null_percentage = (null_count / total_rows) * 100 if total_rows > 0 else 0
                 
                 missing_result[col] = {
                     "total_count": total_rows,
-                    "non_null_count": stats[1],
+                    "non_null_count": non_null_count,
                     "null_count": null_count,
                     "null_percentage": round(null_percentage, 2),
                     "completeness": round(100 - null_percentage, 2)
@@ -676,38 +990,32 @@ def _check_duplicates(table_name: str, columns: list, options: dict) -> dict:
         escaped_table = _escape_identifier(table_name)
         
         with get_db_connection() as conn:
-            # 获取总行数
-            cursor = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}")
-            total_rows = cursor.fetchone()[0]
+            # 未指定列时检查所有列的完全重复
+            group_columns = columns or list(_get_table_columns(table_name)[0])
+            columns_str = ", ".join(_escape_identifier(col) for col in group_columns)
+            
+            # 一次分组扫描：窗口函数在每行附带分组数和总行数，LIMIT在窗口计算之后生效
+            cursor = conn.execute(f"""
+                WITH grp AS (
+                    SELECT {columns_str}, COUNT(*) AS __freq
+                    FROM {escaped_table}
+                    GROUP BY {columns_str}
+                )
+                SELECT *, COUNT(*) OVER () AS __groups, SUM(__freq) OVER () AS __total
+                FROM grp
+                ORDER BY __freq DESC
+                LIMIT 10
+            """)
+            top_groups = cursor.fetchall()
             
-            if total_rows == 0:
+            if not top_groups:
                 return {"error": "表为空，无法检查重复值"}
             
-            # 检查完全重复的行
+            unique_rows = top_groups[0][-2]
+            total_rows = top_groups[0][-1]
+            duplicate_count = total_rows - unique_rows
+            
             if columns:
-                # 检查指定列的重复
-                escaped_columns = [_escape_identifier(col) for col in columns]
-                columns_str = ", ".join(escaped_columns)
-                
-                cursor = conn.execute(f"""
-                    SELECT COUNT(*) as unique_count
-                    FROM (SELECT DISTINCT {columns_str} FROM {escaped_table})
-                """)
-                unique_rows = cursor.fetchone()[0]
-                
-                # 获取重复的组合
-                cursor = conn.execute(f"""
-                    SELECT {columns_str}, COUNT(*) as freq
-                    FROM {escaped_table}
-                    GROUP BY {columns_str}
-                    HAVING COUNT(*) > 1
-                    ORDER BY freq DESC
-                    LIMIT 10
-                """)
-                duplicates = cursor.fetchall()
-                
-                duplicate_count = total_rows - unique_rows
-                
                 result = {
                     "check_type": "specified_columns",
                     "columns_checked": columns,
@@ -716,18 +1024,12 @@ def _check_duplicates(table_name: str, columns: list, options: dict) -> dict:
                     "duplicate_rows": duplicate_count,
                     "duplicate_percentage": round((duplicate_count / total_rows) * 100, 2) if total_rows > 0 else 0,
                     "duplicate_groups": [{
-                        "values": dict(zip(columns, dup[:-1])),
-                        "frequency": dup[-1]
-                    } for dup in duplicates]
+                        "values": dict(zip(columns, group[:-3])),
+                        "frequency": group[-3]
+                    } for group in top_groups if group[-3] > 1]
                 }
                 
             else:
-                # 检查完全重复的行（所有列）
-                cursor = conn.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT * FROM {escaped_table})")
-                unique_rows = cursor.fetchone()[0]
-                
-                duplicate_count = total_rows - unique_rows
-                
                 result = {
                     "check_type": "complete_rows",
                     "total_rows": total_rows,
@@ -750,25 +1052,36 @@ def _get_local_tables() -> str:
     """获取本地数据库表列表"""
     try:
         with get_db_connection() as conn:
+            # 导入和数据处理时已在_metadata中记录行数，列数由pragma_table_info给出，一次查询取出
             cursor = conn.execute("""
-                SELECT name, sql FROM sqlite_master 
-                WHERE type='table' AND name NOT LIKE 'sqlite_%'
-                ORDER BY name
+                SELECT m.name, m.sql, md.row_count,
+                       (SELECT COUNT(*) FROM pragma_table_info(m.name)) AS column_count
+                FROM sqlite_master m
+                LEFT JOIN _metadata md ON md.table_name = m.name
+                WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name
             """)
             tables = cursor.fetchall()
             
-            # 获取每个表的行数
+            # 获取每个表的行数：其他连接修改过数据库后，记录的行数可能过期，全部重新计数
+            counts_current = _row_counts_current(conn)
             table_info = []
-            for table_name, create_sql in tables:
+            bookkeeping = []
+            recounted = False
+            for table_name, create_sql, row_count, column_count in tables:
                 try:
-                    escaped_table = _escape_identifier(table_name)
-                    cursor = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}")
-                    row_count = cursor.fetchone()[0]
-                    
-                    # 获取列数
-                    cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
-                    columns = cursor.fetchall()
-                    column_count = len(columns)
+                    if table_name in ('_metadata', 'data_metadata'):
+                        # 元数据表本身在补记行数后再计数
+                        row_count = None
+                    elif row_count is None or not counts_current:
+                        # 没有行数记录或记录可能过期时全表计数，变化时更新_metadata
+                        recorded_count = row_count
+                        escaped_table = _escape_identifier(table_name)
+                        cursor = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}")
+                        row_count = cursor.fetchone()[0]
+                        if row_count != recorded_count:
+                            _record_row_count(conn, table_name, row_count)
+                            recounted = True
                     
                     table_info.append({
                         "table_name": table_name,
@@ -776,6 +1089,8 @@ def _get_local_tables() -> str:
                         "column_count": column_count,
                         "create_sql": create_sql
                     })
+                    if row_count is None:
+                        bookkeeping.append(table_info[-1])
                 except Exception as e:
                     table_info.append({
                         "table_name": table_name,
@@ -783,6 +1098,12 @@ def _get_local_tables() -> str:
                         "column_count": "error",
                         "error": str(e)
                     })
+            if recounted:
+                conn.commit()
+            for info in bookkeeping:
+                escaped_table = _escape_identifier(info["table_name"])
+                info["row_count"] = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}").fetchone()[0]
+            _mark_row_counts_current(conn)
             
             result = {
                 "status": "success",
@@ -798,7 +1119,7 @@ def _get_local_tables() -> str:
                 }
             }
             
-            return f"✅ 表列表获取成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"✅ 表列表获取成功\n\n{_dumps(result)}"
             
     except Exception as e:
         logger.error(f"获取表列表失败: {e}")
@@ -806,7 +1127,7 @@ def _get_local_tables() -> str:
             "status": "error",
             "message": f"获取表列表失败: {str(e)}"
         }
-        return f"❌ 获取表列表失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 获取表列表失败\n\n{_dumps(result)}"
 
 def _get_table_schema(table_name: str) -> str:
     """获取表结构信息"""
@@ -816,43 +1137,43 @@ def _get_table_schema(table_name: str) -> str:
                 "status": "error",
                 "message": f"表 '{table_name}' 不存在"
             }
-            return f"❌ 表不存在\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
-        
-        escaped_table = _escape_identifier(table_name)
+            return f"❌ 表不存在\n\n{_dumps(result)}"
         
         with get_db_connection() as conn:
+            # 表值PRAGMA函数可以绑定表名参数，语句文本固定，能复用预编译语句
             # 获取列信息
-            cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
+            cursor = conn.execute(
+                'SELECT cid, name, type, "notnull", dflt_value, pk FROM pragma_table_info(?)', (table_name,)
+            )
             columns = cursor.fetchall()
             
             # 获取索引信息
-            cursor = conn.execute(f"PRAGMA index_list({escaped_table})")
+            cursor = conn.execute('SELECT seq, name, "unique", origin FROM pragma_index_list(?)', (table_name,))
             indexes = cursor.fetchall()
             
             # 获取外键信息
-            cursor = conn.execute(f"PRAGMA foreign_key_list({escaped_table})")
+            cursor = conn.execute(
+                'SELECT id, seq, "table", "from", "to", on_update, on_delete, "match" FROM pragma_foreign_key_list(?)',
+                (table_name,)
+            )
             foreign_keys = cursor.fetchall()
             
             # 格式化列信息
-            column_info = []
-            for col in columns:
-                column_info.append({
-                    "column_id": col[0],
-                    "name": col[1],
-                    "type": col[2],
-                    "not_null": bool(col[3]),
-                    "default_value": col[4],
-                    "primary_key": bool(col[5])
-                })
+            column_info = [{
+                "column_id": cid,
+                "name": name,
+                "type": col_type,
+                "not_null": bool(not_null),
+                "default_value": default_value,
+                "primary_key": bool(pk)
+            } for cid, name, col_type, not_null, default_value, pk in columns]
             
             # 格式化索引信息
-            index_info = []
-            for idx in indexes:
-                index_info.append({
-                    "name": idx[1],
-                    "unique": bool(idx[2]),
-                    "origin": idx[3]
-                })
+            index_info = [{
+                "name": name,
+                "unique": bool(unique),
+                "origin": origin
+            } for _, name, unique, origin in indexes]
             
             result = {
                 "status": "success",
@@ -872,7 +1193,7 @@ def _get_table_schema(table_name: str) -> str:
                 }
             }
             
-            return f"✅ 表结构获取成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"✅ 表结构获取成功\n\n{_dumps(result)}"
             
     except Exception as e:
         logger.error(f"获取表结构失败: {e}")
@@ -880,7 +1201,7 @@ def _get_table_schema(table_name: str) -> str:
             "status": "error",
             "message": f"获取表结构失败: {str(e)}"
         }
-        return f"❌ 获取表结构失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 获取表结构失败\n\n{_dumps(result)}"
 
 def _get_table_stats(table_name: str) -> str:
     """获取表统计信息"""
@@ -890,7 +1211,7 @@ def _get_table_stats(table_name: str) -> str:
                 "status": "error",
                 "message": f"表 '{table_name}' 不存在"
             }
-            return f"❌ 表不存在\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"❌ 表不存在\n\n{_dumps(result)}"
         
         escaped_table = _escape_identifier(table_name)
         
@@ -900,7 +1221,9 @@ def _get_table_stats(table_name: str) -> str:
             row_count = cursor.fetchone()[0]
             
             # 获取列信息
-            cursor = conn.execute(f"PRAGMA table_info({escaped_table})")
+            cursor = conn.execute(
+                'SELECT cid, name, type, "notnull", dflt_value, pk FROM pragma_table_info(?)', (table_name,)
+            )
             columns = cursor.fetchall()
             column_count = len(columns)
             
@@ -938,7 +1261,7 @@ def _get_table_stats(table_name: str) -> str:
                 }
             }
             
-            return f"✅ 表统计获取成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"✅ 表统计获取成功\n\n{_dumps(result)}"
             
     except Exception as e:
         logger.error(f"获取表统计失败: {e}")
@@ -946,7 +1269,7 @@ def _get_table_stats(table_name: str) -> str:
             "status": "error",
             "message": f"获取表统计失败: {str(e)}"
         }
-        return f"❌ 获取表统计失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 获取表统计失败\n\n{_dumps(result)}"
 
 def _analyze_database_cleanup() -> str:
     """分析数据库并提供清理建议"""
@@ -967,7 +1290,7 @@ def _analyze_database_cleanup() -> str:
                         "cleanup_suggestions": []
                     }
                 }
-                return f"✅ 数据库清理分析完成\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+                return f"✅ 数据库清理分析完成\n\n{_dumps(result)}"
             
             cleanup_suggestions = []
             empty_tables = []
@@ -978,11 +1301,11 @@ def _analyze_database_cleanup() -> str:
                 try:
                     escaped_table = _escape_identifier(table_name)
                     
-                    # 检查表是否为空
-                    cursor = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}")
-                    row_count = cursor.fetchone()[0]
+                    # 检查表是否为空（只需判断是否存在任意一行，无需COUNT全表扫描）
+                    cursor = conn.execute(f"SELECT EXISTS(SELECT 1 FROM {escaped_table})")
+                    has_rows = cursor.fetchone()[0]
                     
-                    if row_count == 0:
+                    if not has_rows:
                         empty_tables.append(table_name)
                     
                     # 检查是否是测试表或临时表
@@ -1044,7 +1367,7 @@ def _analyze_database_cleanup() -> str:
                 }
             }
             
-            return f"✅ 数据库清理分析完成\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"✅ 数据库清理分析完成\n\n{_dumps(result)}"
             
     except Exception as e:
         logger.error(f"数据库清理分析失败: {e}")
@@ -1052,7 +1375,7 @@ def _analyze_database_cleanup() -> str:
             "status": "error",
             "message": f"数据库清理分析失败: {str(e)}"
         }
-        return f"❌ 数据库清理分析失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 数据库清理分析失败\n\n{_dumps(result)}"
 
 # ================================
 # 模块初始化函数
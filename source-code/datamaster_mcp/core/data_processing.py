@@ -9,11 +9,16 @@ DataMaster MCP - 数据处理核心模块
 以及相关的处理辅助函数。
 """
 
+import ast
+import csv
+import io
 import json
 import sqlite3
 import pandas as pd
 import numpy as np
 import os
+import tokenize
+import warnings
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import logging
@@ -22,11 +27,97 @@ from pathlib import Path
 # 设置日志
 logger = logging.getLogger("DataMaster_MCP.DataProcessing")
 
+# Excel流式导出：openpyxl只写模式
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    Workbook = None
+
+# 可选：ADBC + pyarrow，CSV导出时按Arrow批次读取并由C++写入器写出
+try:
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    import pyarrow.csv as pa_csv
+    ARROW_EXPORT_AVAILABLE = True
+except ImportError:
+    ARROW_EXPORT_AVAILABLE = False
+    adbc_sqlite = None
+    pa_csv = None
+
+# 可选：polars，批量填充缺失值（与pandas互相转换需要pyarrow）
+try:
+    import polars as pl
+    import pyarrow  # noqa: F401
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+    pl = None
+
 # 导入数据库相关函数
 try:
-    from .database import get_db_connection, _escape_identifier, _table_exists
+    from .database import (
+        get_db_connection, _escape_identifier, _table_exists, _bump_data_version,
+        _write_dataframe_fast, _append_dataframe_fast, _get_table_columns, _declared_storage_type,
+        _estimate_row_bytes, _pick_chunk_size, _to_sql_kwargs, _record_row_count, DB_PATH, _dumps
+    )
 except ImportError:
     # 如果相对导入失败，定义本地版本
+    DB_PATH = "data/analysis.db"
+    
+    def _dumps(obj) -> str:
+        """序列化工具返回结果"""
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+    
+    def _record_row_count(conn, table_name: str, row_count: int):
+        """本地版本不维护行数记录"""
+        pass
+    
+    def _to_sql_kwargs(conn, column_count: int) -> dict:
+        """本地版本使用pandas默认写入方式"""
+        return {}
+    
+    def _get_table_columns(table_name: str) -> tuple:
+        """获取表的列名列表和{列名: 声明类型}映射"""
+        with get_db_connection() as conn:
+            rows = conn.execute(f"PRAGMA table_info({_escape_identifier(table_name)})").fetchall()
+        return [row[1] for row in rows], {row[1]: row[2] for row in rows}
+    
+    def _declared_storage_type(declared_type: str) -> Optional[str]:
+        """按SQLite类型亲和性规则把声明类型映射为存储类型，无法确定时返回None"""
+        declared_type = (declared_type or "").upper()
+        if "INT" in declared_type:
+            return 'integer'
+        if any(key in declared_type for key in ("CHAR", "CLOB", "TEXT")):
+            return 'text'
+        if any(key in declared_type for key in ("REAL", "FLOA", "DOUB")):
+            return 'real'
+        # 无声明类型、BLOB和NUMERIC亲和性的列需要看实际存储的值
+        return None
+    
+    def _estimate_row_bytes(column_types) -> int:
+        """本地版本不估算行大小"""
+        return 0
+    
+    def _pick_chunk_size(row_bytes: int, default: int) -> int:
+        """本地版本使用固定分批大小"""
+        return default
+    
+    def _write_dataframe_fast(conn, df, table_name) -> bool:
+        """本地版本不使用快速写入"""
+        return False
+    
+    def _append_dataframe_fast(conn, df, table_name) -> bool:
+        """本地版本不使用快速追加"""
+        return False
+    
+    def _bump_data_version():
+        """本地版本没有结果缓存，无需处理"""
+        pass
+    
     def get_db_connection():
         """获取数据库连接"""
         import sqlite3
@@ -50,10 +141,11 @@ except ImportError:
         except Exception:
             return False
 
-# 确保导出目录存在
+# 导出目录（在模块初始化和每次导出时创建）
 EXPORTS_DIR = "exports"
-if not os.path.exists(EXPORTS_DIR):
-    os.makedirs(EXPORTS_DIR)
+
+# 逐行操作分块处理时每块的行数（无法获取可用内存时使用）
+PROCESS_CHUNK_SIZE = 50000
 
 # ================================
 # 数据处理工具函数
@@ -115,6 +207,9 @@ def process_data_impl(
         # 路由到对应处理器
         process_result = processors[operation_type](data_source, config, target_table)
         
+        # 处理结果会写回数据库，使缓存的查询结果失效
+        _bump_data_version()
+        
         if "error" in process_result:
             result = {
                 "status": "error",
@@ -216,7 +311,7 @@ def export_data_impl(
                 "message": f"不支持的导出类型: {export_type}",
                 "supported_types": list(export_map.keys())
             }
-            return f"❌ 导出类型错误\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"❌ 导出类型错误\n\n{_dumps(result)}"
         
         # 执行导出
         export_result = export_map[export_type](data_source, file_path, options or {})
@@ -226,7 +321,7 @@ def export_data_impl(
                 "status": "error",
                 "message": export_result["error"]
             }
-            return f"❌ 导出失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+            return f"❌ 导出失败\n\n{_dumps(result)}"
         
         result = {
             "status": "success",
@@ -244,7 +339,7 @@ def export_data_impl(
             }
         }
         
-        return f"✅ 数据导出成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"✅ 数据导出成功\n\n{_dumps(result)}"
         
     except Exception as e:
         logger.error(f"数据导出失败: {e}")
@@ -253,22 +348,299 @@ def export_data_impl(
             "message": f"数据导出失败: {str(e)}",
             "error_type": type(e).__name__
         }
-        return f"❌ 导出失败\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"❌ 导出失败\n\n{_dumps(result)}"
 
 # ================================
 # 数据处理辅助函数
 # ================================
 
+def _save_dataframe(conn, df: pd.DataFrame, table_name: str):
+    """用处理结果替换目标表：窄表走executemany快速路径，其余交给to_sql"""
+    if not _write_dataframe_fast(conn, df, table_name):
+        df.to_sql(table_name, conn, if_exists='replace', index=False,
+                  **_to_sql_kwargs(conn, len(df.columns)))
+    _record_row_count(conn, table_name, len(df))
+    conn.commit()
+
+def _has_untyped_columns(chunks: list) -> bool:
+    """暂存的各块中是否仍有整列为空的object列"""
+    for col in chunks[0].columns:
+        if chunks[0][col].dtype == object and not any(chunk[col].notna().any() for chunk in chunks):
+            return True
+    return False
+
+def _merge_pending_chunks(chunks: list) -> pd.DataFrame:
+    """合并暂存的块，空值与非空值拼接成的object列按整体取值重新推断类型"""
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True).infer_objects()
+
+def _write_staging_chunk(conn, chunk: pd.DataFrame, staging_table: str, create: bool):
+    """写入一块数据到临时表：窄表各块在同一个事务中用executemany写入，其余交给to_sql"""
+    written = (_write_dataframe_fast(conn, chunk, staging_table) if create
+               else _append_dataframe_fast(conn, chunk, staging_table))
+    if not written:
+        chunk.to_sql(staging_table, conn, if_exists='append', index=False,
+                     **_to_sql_kwargs(conn, len(chunk.columns)))
+
+def _stream_process(conn, data_source: str, final_table: str, apply_chunk, params: tuple = ()) -> dict:
+    """分块读取数据源，逐块处理后写入临时表，完成后替换目标表"""
+    if data_source.upper().startswith('SELECT'):
+        query = data_source
+        # 查询结果没有声明类型，只取列数按对象估算
+        column_count = len(conn.execute(f"SELECT * FROM ({query.strip().rstrip(';')}) LIMIT 0", params).description)
+        row_bytes = _estimate_row_bytes([None] * column_count)
+    else:
+        query = f'SELECT * FROM {_escape_identifier(data_source)}'
+        row_bytes = _estimate_row_bytes(_get_table_columns(data_source)[1].values())
+    chunk_size = _pick_chunk_size(row_bytes, PROCESS_CHUNK_SIZE)
+    
+    staging_table = f"_staging_{final_table}"
+    escaped_staging = _escape_identifier(staging_table)
+    conn.execute(f"DROP TABLE IF EXISTS {escaped_staging}")
+    
+    original_count = 0
+    processed_count = 0
+    columns = None
+    # 临时表的列类型由首次写入的数据决定；整列为空的object列无法判断类型，
+    # 先暂存这些块，等后续块出现非空值后合并写入，避免数值列被建成TEXT
+    pending = []
+    created = False
+    try:
+        for i, chunk in enumerate(pd.read_sql_query(query, conn, params=params, chunksize=chunk_size)):
+            original_count += len(chunk)
+            chunk = apply_chunk(chunk, i == 0)
+            if columns is None:
+                columns = list(chunk.columns)
+            processed_count += len(chunk)
+            if not created:
+                pending.append(chunk)
+                if _has_untyped_columns(pending):
+                    continue
+                chunk = _merge_pending_chunks(pending)
+                pending = []
+            _write_staging_chunk(conn, chunk, staging_table, create=not created)
+            created = True
+        
+        if columns is None:
+            return {"error": "数据源没有返回任何列"}
+        if pending:
+            # 整个数据源中都为空的列，与一次性写入时一样按to_sql的默认类型建表
+            _write_staging_chunk(conn, _merge_pending_chunks(pending), staging_table, create=True)
+        
+        # 数据写完后再替换目标表，源表和目标表相同时也不会读到半成品
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {_escape_identifier(final_table)}")
+        conn.execute(f"ALTER TABLE {escaped_staging} RENAME TO {_escape_identifier(final_table)}")
+        _record_row_count(conn, final_table, processed_count)
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"DROP TABLE IF EXISTS {escaped_staging}")
+        raise
+    
+    return {
+        "original_rows": original_count,
+        "processed_rows": processed_count,
+        "columns": columns
+    }
+
+# 需要整列统计（均值、中位数、众数）或向后查看的填充方式，无法分块处理
+_WHOLE_COLUMN_FILL_METHODS = frozenset({'mean', 'median', 'mode', 'backward'})
+
+def _clean_is_streamable(config: dict) -> bool:
+    """清洗配置是否只包含可以逐块完成的操作"""
+    if 'remove_outliers' in config:
+        return False
+    return all(
+        fill_method.get('method', 'mean') not in _WHOLE_COLUMN_FILL_METHODS
+        for fill_method in config.get('fill_missing', {}).values()
+    )
+
+def _table_rows_unique(conn, table_name: str) -> bool:
+    """表上有INTEGER PRIMARY KEY或由非空列组成的唯一索引时，各行必然互不相同"""
+    table_info = conn.execute('SELECT name, type, "notnull", pk FROM pragma_table_info(?)', (table_name,)).fetchall()
+    pk_columns = [row[1] for row in table_info if row[3]]
+    if len(pk_columns) == 1 and pk_columns[0].upper() == 'INTEGER':
+        return True
+    
+    # 唯一索引允许多个NULL，只有索引列都声明NOT NULL时才能保证整行不重复
+    not_null = {row[0] for row in table_info if row[2]}
+    for index_name, is_unique, is_partial in conn.execute(
+            'SELECT name, "unique", partial FROM pragma_index_list(?)', (table_name,)).fetchall():
+        if not is_unique or is_partial:
+            continue
+        index_columns = [row[0] for row in conn.execute('SELECT name FROM pragma_index_info(?)', (index_name,))]
+        if index_columns and all(col in not_null for col in index_columns):
+            return True
+    return False
+
+def _make_clean_chunk(config: dict, counters: dict):
+    """构造逐块清洗函数：去重时记录已出现的行，向前填充时在块之间传递最后一个有效值"""
+    remove_duplicates = config.get('remove_duplicates', False)
+    fill_config = config.get('fill_missing', {})
+    seen_rows = set()
+    last_valid = {}
+    
+    def apply_chunk(chunk, is_first):
+        # 删除重复行（包括与之前各块重复的行）
+        if remove_duplicates:
+            # 按行的原始取值比较，不用哈希代替相等判断：大整数不会因转为浮点数而合并，1和'1'也不相等；
+            # 不同块中同一列分别推断为整数和浮点数时，Python的int/float只在数值完全相等时才相等
+            rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+            # set.add返回None，未出现过的行记录下来并保留
+            keep = np.fromiter((row not in seen_rows and not seen_rows.add(row) for row in rows),
+                               dtype=bool, count=len(chunk))
+            counters["duplicates"] += len(chunk) - int(keep.sum())
+            chunk = chunk[keep].copy()
+        
+        # 处理缺失值
+        for column, fill_method in fill_config.items():
+            if column not in chunk.columns:
+                continue
+            counters["missing"][column] = counters["missing"].get(column, 0) + int(chunk[column].isnull().sum())
+            if fill_method.get('method', 'mean') == 'forward':
+                filled = chunk[column].ffill()
+                if column in last_valid:
+                    filled = filled.fillna(last_valid[column])
+                last_index = filled.last_valid_index()
+                if last_index is not None:
+                    last_valid[column] = filled.at[last_index]
+                chunk[column] = filled
+            else:
+                # 自定义值
+                chunk[column] = chunk[column].fillna(fill_method.get('value', ''))
+        return chunk
+    
+    return apply_chunk
+
+def _polars_fill_expressions(df: pd.DataFrame, fill_config: dict) -> list:
+    """把填充配置转换为polars表达式，规则与pandas实现一致"""
+    expressions = []
+    for column, fill_method in fill_config.items():
+        if column not in df.columns:
+            continue
+        method = fill_method.get('method', 'mean')
+        col = pl.col(column)
+        is_numeric = df[column].dtype in ['int64', 'float64']
+        
+        if method == 'mean' and is_numeric:
+            expressions.append(col.fill_null(col.mean()))
+        elif method == 'median' and is_numeric:
+            expressions.append(col.fill_null(col.median()))
+        elif method == 'mode':
+            # pandas的mode按排序返回，取最小的众数
+            expressions.append(col.fill_null(col.drop_nulls().mode().sort().first()))
+        elif method == 'forward':
+            expressions.append(col.fill_null(strategy='forward'))
+        elif method == 'backward':
+            expressions.append(col.fill_null(strategy='backward'))
+        else:
+            # 自定义值
+            expressions.append(col.fill_null(pl.lit(fill_method.get('value', ''))))
+    return expressions
+
+def _fill_missing_values(df: pd.DataFrame, fill_config: dict, operations_performed: list) -> pd.DataFrame:
+    """按配置填充缺失值：有polars时一次with_columns完成所有列，否则按填充方式分组用pandas批量填充"""
+    if POLARS_AVAILABLE:
+        try:
+            expressions = _polars_fill_expressions(df, fill_config)
+            if expressions:
+                missing_counts = df.isnull().sum()
+                df = pl.from_pandas(df).with_columns(expressions).to_pandas()
+                for column in fill_config:
+                    if column in df.columns:
+                        operations_performed.append(f"填充缺失值 {column}: {missing_counts[column]}个")
+            return df
+        except Exception as e:
+            logger.warning(f"polars填充缺失值失败，使用pandas: {e}")
+    
+    # 按填充方式把列分组，每组一次完成填充
+    groups = {'mean': [], 'median': [], 'mode': [], 'forward': [], 'backward': []}
+    custom_values = {}
+    for column, fill_method in fill_config.items():
+        if column not in df.columns:
+            continue
+        method = fill_method.get('method', 'mean')
+        if method not in groups or (method in ('mean', 'median') and df[column].dtype not in ['int64', 'float64']):
+            # 自定义值（非数值列的均值/中位数同样按自定义值处理）
+            custom_values[column] = fill_method.get('value', '')
+        else:
+            groups[method].append(column)
+    
+    fill_columns = [column for column in fill_config if column in df.columns]
+    missing_counts = df[fill_columns].isnull().sum()
+    
+    if groups['mean']:
+        cols = groups['mean']
+        df[cols] = df[cols].fillna(df[cols].mean())
+    if groups['median']:
+        cols = groups['median']
+        df[cols] = df[cols].fillna(df[cols].median())
+    if groups['mode']:
+        cols = groups['mode']
+        modes = df[cols].mode()
+        if not modes.empty:
+            df[cols] = df[cols].fillna(modes.iloc[0])
+    if groups['forward']:
+        cols = groups['forward']
+        df[cols] = df[cols].ffill()
+    if groups['backward']:
+        cols = groups['backward']
+        df[cols] = df[cols].bfill()
+    if custom_values:
+        df = df.fillna(custom_values)
+    
+    for column in fill_columns:
+        operations_performed.append(f"填充缺失值 {column}: {missing_counts[column]}个")
+    return df
+
 def _process_clean(data_source: str, config: dict, target_table: str = None) -> dict:
     """数据清洗处理器"""
     try:
         with get_db_connection() as conn:
+            if data_source.upper().startswith('SELECT'):
+                if not target_table:
+                    return {"error": "处理查询结果时必须指定target_table"}
+            elif not _table_exists(data_source):
+                return {"error": f"表 '{data_source}' 不存在"}
+            
+            final_table = target_table or data_source
+            
+            # 表的唯一约束已保证没有重复行时跳过去重
+            rows_unique = (config.get('remove_duplicates', False) and not data_source.upper().startswith('SELECT')
+                           and _table_rows_unique(conn, data_source))
+            
+            # 只有去重、向前填充和固定值填充时逐块处理以控制内存
+            if _clean_is_streamable(config):
+                counters = {"duplicates": 0, "missing": {}}
+                chunk_config = dict(config, remove_duplicates=False) if rows_unique else config
+                stream_result = _stream_process(conn, data_source, final_table, _make_clean_chunk(chunk_config, counters))
+                if "error" in stream_result:
+                    return stream_result
+                
+                operations_performed = []
+                if rows_unique:
+                    operations_performed.append("删除重复行: 0行 (已唯一)")
+                elif config.get('remove_duplicates', False):
+                    operations_performed.append(f"删除重复行: {counters['duplicates']}行")
+                for column, missing_count in counters["missing"].items():
+                    operations_performed.append(f"填充缺失值 {column}: {missing_count}个")
+                
+                return {
+                    "target_table": final_table,
+                    "processed_rows": stream_result["processed_rows"],
+                    "original_rows": stream_result["original_rows"],
+                    "operations": operations_performed,
+                    "columns": stream_result["columns"]
+                }
+            
             # 获取数据
             if data_source.upper().startswith('SELECT'):
                 df = pd.read_sql(data_source, conn)
             else:
-                if not _table_exists(data_source):
-                    return {"error": f"表 '{data_source}' 不存在"}
                 escaped_table = _escape_identifier(data_source)
                 df = pd.read_sql(f'SELECT * FROM {escaped_table}', conn)
             
@@ -276,7 +648,9 @@ def _process_clean(data_source: str, config: dict, target_table: str = None) ->
             operations_performed = []
             
             # 删除重复行
-            if config.get('remove_duplicates', False):
+            if rows_unique:
+                operations_performed.append("删除重复行: 0行 (已唯一)")
+            elif config.get('remove_duplicates', False):
                 before_count = len(df)
                 df = df.drop_duplicates()
                 removed_count = before_count - len(df)
@@ -284,30 +658,7 @@ def _process_clean(data_source: str, config: dict, target_table: str = None) ->
             
             # 处理缺失值
             if 'fill_missing' in config:
-                fill_config = config['fill_missing']
-                for column, fill_method in fill_config.items():
-                    if column in df.columns:
-                        method = fill_method.get('method', 'mean')
-                        missing_count = df[column].isnull().sum()
-                        
-                        if method == 'mean' and df[column].dtype in ['int64', 'float64']:
-                            df[column] = df[column].fillna(df[column].mean())
-                        elif method == 'median' and df[column].dtype in ['int64', 'float64']:
-                            df[column] = df[column].fillna(df[column].median())
-                        elif method == 'mode':
-                            mode_val = df[column].mode()
-                            if not mode_val.empty:
-                                df[column] = df[column].fillna(mode_val.iloc[0])
-                        elif method == 'forward':
-                            df[column] = df[column].fillna(method='ffill')
-                        elif method == 'backward':
-                            df[column] = df[column].fillna(method='bfill')
-                        else:
-                            # 自定义值
-                            fill_value = fill_method.get('value', '')
-                            df[column] = df[column].fillna(fill_value)
-                        
-                        operations_performed.append(f"填充缺失值 {column}: {missing_count}个")
+                df = _fill_missing_values(df, config['fill_missing'], operations_performed)
             
             # 异常值处理
             if 'remove_outliers' in config:
@@ -316,34 +667,30 @@ def _process_clean(data_source: str, config: dict, target_table: str = None) ->
                 method = outlier_config.get('method', 'iqr')
                 threshold = outlier_config.get('threshold', 1.5)
                 
-                for col in columns:
-                    if col in df.columns and df[col].dtype in ['int64', 'float64']:
-                        before_count = len(df)
-                        
+                numeric_cols = [col for col in columns if col in df.columns and df[col].dtype in ['int64', 'float64']]
+                if numeric_cols:
+                    # 所有列的统计量在二维数组上一次算出，各列的保留条件合并后只做一次布尔索引
+                    values = df[numeric_cols].to_numpy(dtype=np.float64)
+                    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+                        warnings.simplefilter('ignore', RuntimeWarning)
                         if method == 'iqr':
-                            Q1 = df[col].quantile(0.25)
-                            Q3 = df[col].quantile(0.75)
-                            IQR = Q3 - Q1
-                            lower_bound = Q1 - threshold * IQR
-                            upper_bound = Q3 + threshold * IQR
-                            df = df[(df[col] >= lower_bound) & (df[col] <= upper_bound)]
+                            q1, q3 = np.nanpercentile(values, [25, 75], axis=0)
+                            iqr = q3 - q1
+                            inside = (values >= q1 - threshold * iqr) & (values <= q3 + threshold * iqr)
                         elif method == 'zscore':
-                            z_scores = np.abs((df[col] - df[col].mean()) / df[col].std())
-                            df = df[z_scores <= threshold]
-                        
-                        removed_count = before_count - len(df)
+                            z_scores = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+                            inside = np.abs(z_scores) <= threshold
+                        else:
+                            inside = np.ones(values.shape, dtype=bool)
+                    
+                    # 缺失值与边界比较结果为False，和逐列筛选时一样会被移除
+                    removed_counts = (~inside).sum(axis=0)
+                    for col, removed_count in zip(numeric_cols, removed_counts.tolist()):
                         operations_performed.append(f"移除异常值 {col}: {removed_count}行")
+                    df = df[inside.all(axis=1)]
             
             # 保存结果
-            final_table = target_table or data_source
-            if not data_source.upper().startswith('SELECT'):
-                # 如果是表名，保存到目标表
-                df.to_sql(final_table, conn, if_exists='replace', index=False)
-            else:
-                # 如果是查询，必须指定目标表
-                if not target_table:
-                    return {"error": "处理查询结果时必须指定target_table"}
-                df.to_sql(target_table, conn, if_exists='replace', index=False)
+            _save_dataframe(conn, df, final_table)
             
             return {
                 "target_table": final_table,
@@ -356,80 +703,123 @@ def _process_clean(data_source: str, config: dict, target_table: str = None) ->
     except Exception as e:
         return {"error": f"数据清洗失败: {str(e)}"}
 
+def _transform_rename(df: pd.DataFrame, config: dict, operations: list = None) -> pd.DataFrame:
+    """列重命名"""
+    if 'rename_columns' in config:
+        rename_map = config['rename_columns']
+        df = df.rename(columns=rename_map)
+        if operations is not None:
+            operations.append(f"重命名列: {list(rename_map.keys())} -> {list(rename_map.values())}")
+    return df
+
+def _transform_normalize(df: pd.DataFrame, config: dict, operations: list = None) -> pd.DataFrame:
+    """数据标准化（依赖整列统计量，不能分块）"""
+    if 'normalize' in config:
+        normalize_config = config['normalize']
+        columns = normalize_config.get('columns', [])
+        method = normalize_config.get('method', 'minmax')  # minmax, zscore
+        
+        numeric_cols = [col for col in columns if col in df.columns and df[col].dtype in ['int64', 'float64']]
+        if numeric_cols and method in ('minmax', 'zscore'):
+            # 取出二维数组按列一次算出统计量，整块计算后写回，不逐列生成中间Series
+            values = df[numeric_cols].to_numpy(dtype=np.float64)
+            # 全为缺失或取值相同的列结果为NaN，与pandas逐列计算一致，不输出警告
+            with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+                warnings.simplefilter('ignore', RuntimeWarning)
+                if method == 'minmax':
+                    low = np.nanmin(values, axis=0)
+                    values = (values - low) / (np.nanmax(values, axis=0) - low)
+                else:
+                    values = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+            df[numeric_cols] = values
+        
+        if operations is not None:
+            for col in numeric_cols:
+                operations.append(f"标准化列 {col} (方法: {method})")
+    return df
+
+def _transform_compute(df: pd.DataFrame, config: dict, operations: list = None) -> pd.DataFrame:
+    """新列计算和数据类型转换（逐行操作）"""
+    def record(message):
+        if operations is not None:
+            operations.append(message)
+    
+    # 新列计算
+    if 'add_columns' in config:
+        add_config = config['add_columns']
+        for new_col, formula in add_config.items():
+            try:
+                # 公式交给DataFrame.eval解析（不走Python eval，只支持列名和基本运算）；
+                # 安装numexpr时pandas自动用它融合整条表达式，不产生中间数组
+                df[new_col] = df.eval(formula)
+                record(f"添加新列 {new_col}: {formula}")
+            except Exception as e:
+                record(f"添加新列 {new_col} 失败: {str(e)}")
+    
+    # 数据类型转换
+    if 'convert_types' in config:
+        type_config = config['convert_types']
+        for col, new_type in type_config.items():
+            if col in df.columns:
+                try:
+                    if new_type == 'int':
+                        df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+                    elif new_type == 'float':
+                        df[col] = pd.to_numeric(df[col], errors='coerce')
+                    elif new_type == 'str':
+                        df[col] = df[col].astype(str)
+                    elif new_type == 'datetime':
+                        df[col] = pd.to_datetime(df[col], errors='coerce')
+                    
+                    record(f"转换列类型 {col} -> {new_type}")
+                except Exception as e:
+                    record(f"转换列类型 {col} 失败: {str(e)}")
+    return df
+
 def _process_transform(data_source: str, config: dict, target_table: str = None) -> dict:
     """数据转换处理器"""
     try:
         with get_db_connection() as conn:
+            if data_source.upper().startswith('SELECT'):
+                if not target_table:
+                    return {"error": "处理查询结果时必须指定target_table"}
+            elif not _table_exists(data_source):
+                return {"error": f"表 '{data_source}' 不存在"}
+            
+            final_table = target_table or data_source
+            operations_performed = []
+            
+            # 不含标准化时全部是逐行操作，分块处理以控制内存
+            if 'normalize' not in config:
+                def apply_chunk(chunk, is_first):
+                    operations = operations_performed if is_first else None
+                    chunk = _transform_rename(chunk, config, operations)
+                    return _transform_compute(chunk, config, operations)
+                
+                stream_result = _stream_process(conn, data_source, final_table, apply_chunk)
+                if "error" in stream_result:
+                    return stream_result
+                
+                return {
+                    "target_table": final_table,
+                    "processed_rows": stream_result["processed_rows"],
+                    "operations": operations_performed,
+                    "columns": stream_result["columns"]
+                }
+            
             # 获取数据
             if data_source.upper().startswith('SELECT'):
                 df = pd.read_sql(data_source, conn)
             else:
-                if not _table_exists(data_source):
-                    return {"error": f"表 '{data_source}' 不存在"}
                 escaped_table = _escape_identifier(data_source)
                 df = pd.read_sql(f'SELECT * FROM {escaped_table}', conn)
             
-            operations_performed = []
-            
-            # 列重命名
-            if 'rename_columns' in config:
-                rename_map = config['rename_columns']
-                df = df.rename(columns=rename_map)
-                operations_performed.append(f"重命名列: {list(rename_map.keys())} -> {list(rename_map.values())}")
-            
-            # 数据标准化
-            if 'normalize' in config:
-                normalize_config = config['normalize']
-                columns = normalize_config.get('columns', [])
-                method = normalize_config.get('method', 'minmax')  # minmax, zscore
-                
-                for col in columns:
-                    if col in df.columns and df[col].dtype in ['int64', 'float64']:
-                        if method == 'minmax':
-                            df[col] = (df[col] - df[col].min()) / (df[col].max() - df[col].min())
-                        elif method == 'zscore':
-                            df[col] = (df[col] - df[col].mean()) / df[col].std()
-                        
-                        operations_performed.append(f"标准化列 {col} (方法: {method})")
-            
-            # 新列计算
-            if 'add_columns' in config:
-                add_config = config['add_columns']
-                for new_col, formula in add_config.items():
-                    try:
-                        # 简单的公式计算（安全性考虑，只支持基本运算）
-                        df[new_col] = df.eval(formula)
-                        operations_performed.append(f"添加新列 {new_col}: {formula}")
-                    except Exception as e:
-                        operations_performed.append(f"添加新列 {new_col} 失败: {str(e)}")
-            
-            # 数据类型转换
-            if 'convert_types' in config:
-                type_config = config['convert_types']
-                for col, new_type in type_config.items():
-                    if col in df.columns:
-                        try:
-                            if new_type == 'int':
-                                df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
-                            elif new_type == 'float':
-                                df[col] = pd.to_numeric(df[col], errors='coerce')
-                            elif new_type == 'str':
-                                df[col] = df[col].astype(str)
-                            elif new_type == 'datetime':
-                                df[col] = pd.to_datetime(df[col], errors='coerce')
-                            
-                            operations_performed.append(f"转换列类型 {col} -> {new_type}")
-                        except Exception as e:
-                            operations_performed.append(f"转换列类型 {col} 失败: {str(e)}")
+            df = _transform_rename(df, config, operations_performed)
+            df = _transform_normalize(df, config, operations_performed)
+            df = _transform_compute(df, config, operations_performed)
             
             # 保存结果
-            final_table = target_table or data_source
-            if not data_source.upper().startswith('SELECT'):
-                df.to_sql(final_table, conn, if_exists='replace', index=False)
-            else:
-                if not target_table:
-                    return {"error": "处理查询结果时必须指定target_table"}
-                df.to_sql(target_table, conn, if_exists='replace', index=False)
+            _save_dataframe(conn, df, final_table)
             
             return {
                 "target_table": final_table,
@@ -441,66 +831,277 @@ def _process_transform(data_source: str, config: dict, target_table: str = None)
     except Exception as e:
         return {"error": f"数据转换失败: {str(e)}"}
 
+def _filter_rows(df: pd.DataFrame, config: dict, operations: list = None) -> pd.DataFrame:
+    """条件筛选和列选择（逐行操作）"""
+    # 条件筛选
+    if 'filter_condition' in config:
+        condition = config['filter_condition']
+        try:
+            df = df.query(condition)
+        except Exception as e:
+            raise ValueError(f"筛选条件错误: {str(e)}")
+        if operations is not None:
+            operations.append(f"条件筛选: {condition}")
+    
+    # 列选择
+    if 'select_columns' in config:
+        columns = config['select_columns']
+        available_columns = [col for col in columns if col in df.columns]
+        if not available_columns:
+            raise ValueError("指定的列都不存在")
+        df = df[available_columns]
+        if operations is not None:
+            operations.append(f"选择列: {available_columns}")
+    
+    return df
+
+# 可以下推到SQLite的比较运算符（列与常量的!=翻译为IS NOT，缺失值和pandas一样视为不相等）
+_PUSHDOWN_COMPARISONS = {'==': '=', '!=': 'IS NOT', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+_PUSHDOWN_CONNECTIVES = {'and': 'AND', 'or': 'OR', '&': 'AND', '|': 'OR'}
+# 比较两侧的存储类型必须一致，否则SQLite的类型亲和性转换会得到和pandas不同的结果
+_NUMERIC_STORAGE_TYPES = frozenset({'integer', 'real'})
+
+class _NotPushable(Exception):
+    """筛选条件无法等价翻译为SQL"""
+
+def _translate_filter_condition(condition: str, column_types: dict) -> Optional[tuple]:
+    """把"列 比较 常量/列"经and/or组合的query条件翻译为SQL，返回(where子句, 参数)，无法等价翻译时返回None
+
+    column_types为{列名: _declared_storage_type的结果}
+    """
+    try:
+        tokens = [
+            tok for tok in tokenize.generate_tokens(io.StringIO(condition.strip()).readline)
+            if tok.type not in (tokenize.NEWLINE, tokenize.NL, tokenize.ENDMARKER)
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    
+    params = []
+    pos = 0
+    
+    def peek() -> str:
+        return tokens[pos].string if pos < len(tokens) else ''
+    
+    def take():
+        nonlocal pos
+        if pos >= len(tokens):
+            raise _NotPushable()
+        pos += 1
+        return tokens[pos - 1]
+    
+    def operand() -> tuple:
+        """列名或常量，返回(SQL片段, 类型)；常量作为参数绑定"""
+        tok = take()
+        negate = tok.type == tokenize.OP and tok.string == '-'
+        if negate:
+            tok = take()
+            if tok.type != tokenize.NUMBER:
+                raise _NotPushable()
+        if tok.type == tokenize.NAME:
+            # not、in、@变量、True/None等语义和SQL不一致；未知列交给pandas报错
+            if tok.string not in column_types or column_types[tok.string] is None:
+                raise _NotPushable()
+            return _escape_identifier(tok.string), column_types[tok.string]
+        if tok.type not in (tokenize.NUMBER, tokenize.STRING):
+            raise _NotPushable()
+        try:
+            value = ast.literal_eval(tok.string)
+        except (ValueError, SyntaxError):
+            raise _NotPushable()
+        if tok.type == tokenize.NUMBER and type(value) in (int, float):
+            params.append(-value if negate else value)
+            return '?', 'number'
+        if tok.type == tokenize.STRING and isinstance(value, str):
+            params.append(value)
+            return '?', 'string'
+        raise _NotPushable()
+    
+    def comparable(left: str, right: str) -> bool:
+        if 'number' in (left, right) or 'string' in (left, right):
+            literal, other = (left, right) if left in ('number', 'string') else (right, left)
+            if literal == 'number':
+                return other in _NUMERIC_STORAGE_TYPES
+            return other == 'text'
+        return left == right or (left in _NUMERIC_STORAGE_TYPES and right in _NUMERIC_STORAGE_TYPES)
+    
+    def term() -> str:
+        """括号内的条件，或单个"操作数 比较 操作数"（不支持链式比较）"""
+        if peek() == '(':
+            take()
+            inner = expression()
+            if take().string != ')':
+                raise _NotPushable()
+            return f"({inner})"
+        left_sql, left_type = operand()
+        op = take().string
+        if op not in _PUSHDOWN_COMPARISONS:
+            raise _NotPushable()
+        right_sql, right_type = operand()
+        if left_type in ('number', 'string') and right_type in ('number', 'string'):
+            raise _NotPushable()
+        if not comparable(left_type, right_type):
+            raise _NotPushable()
+        if peek() in _PUSHDOWN_COMPARISONS:
+            # 1 < a < 5在Python中是链式比较，SQLite会按(1 < a) < 5计算
+            raise _NotPushable()
+        if op == '!=' and left_type not in ('number', 'string') and right_type not in ('number', 'string'):
+            # pandas中NaN != NaN为True，而NULL IS NOT NULL为假；任一侧缺失都视为不相等
+            return f"({left_sql} IS NULL OR {right_sql} IS NULL OR {left_sql} <> {right_sql})"
+        return f"{left_sql} {_PUSHDOWN_COMPARISONS[op]} {right_sql}"
+    
+    def expression() -> str:
+        parts = [term()]
+        while peek() in _PUSHDOWN_CONNECTIVES:
+            parts.append(_PUSHDOWN_CONNECTIVES[take().string])
+            parts.append(term())
+        return ' '.join(parts)
+    
+    try:
+        where_sql = expression()
+    except _NotPushable:
+        return None
+    if pos != len(tokens):
+        return None
+    return where_sql, params
+
+def _build_pushdown_sql(conn, data_source: str, config: dict) -> Optional[tuple]:
+    """把表数据源的条件筛选、列选择和采样合成一条SQL，返回(sql, 参数, 操作记录)，需要pandas处理时返回None"""
+    if data_source.upper().startswith('SELECT'):
+        return None
+    
+    table_columns, declared_types = _get_table_columns(data_source)
+    operations = []
+    where_sql = ''
+    params = []
+    if 'filter_condition' in config:
+        condition = config['filter_condition']
+        column_types = {col: _declared_storage_type(declared_types.get(col)) for col in table_columns}
+        translated = _translate_filter_condition(condition, column_types)
+        if translated is None:
+            return None
+        where_sql = f" WHERE {translated[0]}"
+        params = translated[1]
+        operations.append(f"条件筛选: {condition}")
+    
+    columns = table_columns
+    if 'select_columns' in config:
+        columns = [col for col in config['select_columns'] if col in table_columns]
+        if not columns:
+            raise ValueError("指定的列都不存在")
+        operations.append(f"选择列: {columns}")
+    
+    escaped_table = _escape_identifier(data_source)
+    select_list = ', '.join(_escape_identifier(col) for col in columns)
+    query = f"SELECT {select_list} FROM {escaped_table}{where_sql}"
+    
+    sample_config = config.get('sample')
+    if sample_config is None:
+        return query, params, operations
+    
+    sample_type = sample_config.get('type', 'random')
+    sample_size = sample_config.get('size', 1000)
+    if sample_type == 'head':
+        query += " ORDER BY rowid LIMIT ?"
+        operations.append(f"头部采样: {sample_size}行")
+    elif sample_type == 'tail':
+        query = (f'SELECT {select_list} FROM (SELECT rowid AS "__row_order", {select_list} '
+                 f'FROM {escaped_table}{where_sql} ORDER BY rowid DESC LIMIT ?) ORDER BY "__row_order"')
+        operations.append(f"尾部采样: {sample_size}行")
+    elif sample_type == 'random':
+        # 筛选后的行数不超过采样数时保留全部行
+        rowids = [row[0] for row in conn.execute(f"SELECT rowid FROM {escaped_table}{where_sql} ORDER BY rowid", params)]
+        if sample_size >= len(rowids):
+            return query, params, operations
+        # 与pandas路径的df.sample(random_state=42)使用同一随机序列，按筛选后的行序选取相同的行
+        positions = np.random.RandomState(42).choice(len(rowids), size=sample_size, replace=False)
+        conn.execute('DROP TABLE IF EXISTS temp."_sample_rowids"')
+        conn.execute('CREATE TEMP TABLE "_sample_rowids" ("__sample_order" INTEGER, "__sample_rowid" INTEGER)')
+        conn.executemany('INSERT INTO temp."_sample_rowids" VALUES (?, ?)',
+                         ((order, rowids[position]) for order, position in enumerate(positions.tolist())))
+        operations.append(f"随机采样: {sample_size}行")
+        return (f'SELECT {select_list} FROM temp."_sample_rowids" JOIN {escaped_table} '
+                f'ON {escaped_table}.rowid = "__sample_rowid" ORDER BY "__sample_order"'), [], operations
+    else:
+        return query, params, operations
+    return query, params + [sample_size], operations
+
 def _process_filter(data_source: str, config: dict, target_table: str = None) -> dict:
     """数据筛选处理器"""
     try:
         with get_db_connection() as conn:
+            if data_source.upper().startswith('SELECT'):
+                if not target_table:
+                    return {"error": "处理查询结果时必须指定target_table"}
+            elif not _table_exists(data_source):
+                return {"error": f"表 '{data_source}' 不存在"}
+            
+            final_table = target_table or data_source
+            operations_performed = []
+            
+            # 条件能翻译为SQL时由SQLite完成筛选、选列和采样，只读取保留下来的行
+            pushdown = _build_pushdown_sql(conn, data_source, config)
+            if pushdown is not None:
+                query, params, operations_performed = pushdown
+                escaped_table = _escape_identifier(data_source)
+                original_count = conn.execute(f"SELECT COUNT(*) FROM {escaped_table}").fetchone()[0]
+                stream_result = _stream_process(conn, query, final_table, lambda chunk, is_first: chunk, params)
+                if "error" in stream_result:
+                    return stream_result
+                
+                return {
+                    "target_table": final_table,
+                    "filtered_rows": stream_result["processed_rows"],
+                    "original_rows": original_count,
+                    "operations": operations_performed,
+                    "columns": stream_result["columns"]
+                }
+            
+            # 不采样时只有逐行筛选，分块处理以控制内存
+            if 'sample' not in config:
+                def apply_chunk(chunk, is_first):
+                    return _filter_rows(chunk, config, operations_performed if is_first else None)
+                
+                stream_result = _stream_process(conn, data_source, final_table, apply_chunk)
+                if "error" in stream_result:
+                    return stream_result
+                
+                return {
+                    "target_table": final_table,
+                    "filtered_rows": stream_result["processed_rows"],
+                    "original_rows": stream_result["original_rows"],
+                    "operations": operations_performed,
+                    "columns": stream_result["columns"]
+                }
+            
             # 获取数据
             if data_source.upper().startswith('SELECT'):
                 df = pd.read_sql(data_source, conn)
             else:
-                if not _table_exists(data_source):
-                    return {"error": f"表 '{data_source}' 不存在"}
                 escaped_table = _escape_identifier(data_source)
                 df = pd.read_sql(f'SELECT * FROM {escaped_table}', conn)
             
             original_count = len(df)
-            operations_performed = []
-            
-            # 条件筛选
-            if 'filter_condition' in config:
-                condition = config['filter_condition']
-                try:
-                    df = df.query(condition)
-                    operations_performed.append(f"条件筛选: {condition}")
-                except Exception as e:
-                    return {"error": f"筛选条件错误: {str(e)}"}
-            
-            # 列选择
-            if 'select_columns' in config:
-                columns = config['select_columns']
-                available_columns = [col for col in columns if col in df.columns]
-                if available_columns:
-                    df = df[available_columns]
-                    operations_performed.append(f"选择列: {available_columns}")
-                else:
-                    return {"error": "指定的列都不存在"}
+            df = _filter_rows(df, config, operations_performed)
             
             # 数据采样
-            if 'sample' in config:
-                sample_config = config['sample']
-                sample_type = sample_config.get('type', 'random')  # random, head, tail
-                sample_size = sample_config.get('size', 1000)
-                
-                if sample_type == 'random':
-                    if sample_size < len(df):
-                        df = df.sample(n=sample_size, random_state=42)
-                        operations_performed.append(f"随机采样: {sample_size}行")
-                elif sample_type == 'head':
-                    df = df.head(sample_size)
-                    operations_performed.append(f"头部采样: {sample_size}行")
-                elif sample_type == 'tail':
-                    df = df.tail(sample_size)
-                    operations_performed.append(f"尾部采样: {sample_size}行")
+            sample_config = config['sample']
+            sample_type = sample_config.get('type', 'random')  # random, head, tail
+            sample_size = sample_config.get('size', 1000)
+            
+            if sample_type == 'random':
+                if sample_size < len(df):
+                    df = df.sample(n=sample_size, random_state=42)
+                    operations_performed.append(f"随机采样: {sample_size}行")
+            elif sample_type == 'head':
+                df = df.head(sample_size)
+                operations_performed.append(f"头部采样: {sample_size}行")
+            elif sample_type == 'tail':
+                df = df.tail(sample_size)
+                operations_performed.append(f"尾部采样: {sample_size}行")
             
             # 保存结果
-            final_table = target_table or data_source
-            if not data_source.upper().startswith('SELECT'):
-                df.to_sql(final_table, conn, if_exists='replace', index=False)
-            else:
-                if not target_table:
-                    return {"error": "处理查询结果时必须指定target_table"}
-                df.to_sql(target_table, conn, if_exists='replace', index=False)
+            _save_dataframe(conn, df, final_table)
             
             return {
                 "target_table": final_table,
@@ -510,13 +1111,79 @@ def _process_filter(data_source: str, config: dict, target_table: str = None) ->
                 "columns": list(df.columns)
             }
             
+    except ValueError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"数据筛选失败: {str(e)}"}
 
+# 可以由SQLite直接计算的聚合函数（sum对全缺失分组与pandas一样返回0）
+_SQL_AGGREGATES = {
+    'sum': 'COALESCE(SUM({column}), 0)',
+    'mean': 'AVG({column})',
+    'min': 'MIN({column})',
+    'max': 'MAX({column})',
+    'count': 'COUNT({column})',
+}
+# sum/mean只下推声明为INTEGER/REAL的列：文本列以及按ISO文本存储的DATE/TIMESTAMP列
+# 在pandas中会拼接或报错，SQL却会按数值计算
+_NUMERIC_ONLY_AGGREGATES = frozenset({'sum', 'mean'})
+
+def _build_aggregate_sql(data_source: str, group_columns: list, agg_config: dict) -> Optional[str]:
+    """把表的分组聚合翻译为GROUP BY查询，列名与pandas结果一致；含其它聚合函数时返回None"""
+    table_columns, column_types = _get_table_columns(data_source)
+    if any(col not in table_columns for col in list(group_columns) + list(agg_config)):
+        return None
+    
+    # 任一聚合为列表时pandas结果为多级列名，扁平化后统一为"列名_函数"
+    multi_level = any(isinstance(funcs, (list, tuple)) for funcs in agg_config.values())
+    select_items = [_escape_identifier(col) for col in group_columns]
+    for col, funcs in agg_config.items():
+        if col in group_columns:
+            return None
+        func_names = list(funcs) if isinstance(funcs, (list, tuple)) else [funcs]
+        if not func_names:
+            return None
+        for func in func_names:
+            if func not in _SQL_AGGREGATES:
+                return None
+            if (func in _NUMERIC_ONLY_AGGREGATES
+                    and _declared_storage_type(column_types.get(col)) not in _NUMERIC_STORAGE_TYPES):
+                return None
+            alias = f"{col}_{func}" if multi_level else col
+            expression = _SQL_AGGREGATES[func].format(column=_escape_identifier(col))
+            select_items.append(f"{expression} AS {_escape_identifier(alias)}")
+    if not agg_config:
+        # 默认计数
+        select_items.append(f"COUNT(*) AS {_escape_identifier('count')}")
+    
+    # pandas默认丢弃分组键缺失的行，并按分组键排序
+    group_list = ', '.join(_escape_identifier(col) for col in group_columns)
+    not_null = ' AND '.join(f"{_escape_identifier(col)} IS NOT NULL" for col in group_columns)
+    return (f"SELECT {', '.join(select_items)} FROM {_escape_identifier(data_source)} "
+            f"WHERE {not_null} GROUP BY {group_list} ORDER BY {group_list}")
+
 def _process_aggregate(data_source: str, config: dict, target_table: str = None) -> dict:
     """数据聚合处理器"""
     try:
         with get_db_connection() as conn:
+            # 表的分组聚合只用内置聚合函数时交给SQLite计算，只读取聚合结果
+            group_config = config.get('group_by')
+            if (not data_source.upper().startswith('SELECT') and group_config
+                    and group_config.get('columns') and _table_exists(data_source)):
+                aggregate_sql = _build_aggregate_sql(data_source, group_config['columns'], group_config.get('agg', {}))
+                if aggregate_sql is not None:
+                    df = pd.read_sql(aggregate_sql, conn)
+                    agg_config = group_config.get('agg', {})
+                    final_table = target_table or f"{data_source}_aggregated"
+                    _save_dataframe(conn, df, final_table)
+                    
+                    return {
+                        "target_table": final_table,
+                        "processed_rows": len(df),
+                        "operations": [f"分组聚合: {group_config['columns']} -> {list(agg_config.keys()) if agg_config else ['count']}"],
+                        "columns": list(df.columns)
+                    }
+            
             # 获取数据
             if data_source.upper().startswith('SELECT'):
                 df = pd.read_sql(data_source, conn)
@@ -561,7 +1228,7 @@ def _process_aggregate(data_source: str, config: dict, target_table: str = None)
             if data_source.upper().startswith('SELECT') and not target_table:
                 final_table = "query_aggregated"
             
-            df.to_sql(final_table, conn, if_exists='replace', index=False)
+            _save_dataframe(conn, df, final_table)
             
             return {
                 "target_table": final_table,
@@ -573,10 +1240,110 @@ def _process_aggregate(data_source: str, config: dict, target_table: str = None)
     except Exception as e:
         return {"error": f"数据聚合失败: {str(e)}"}
 
+def _has_leading_index(conn, table_name: str, columns: list) -> bool:
+    """表上是否已有以这些列（任意顺序）开头的完整索引，或这些列就是INTEGER PRIMARY KEY"""
+    table_info = conn.execute('SELECT name, type, pk FROM pragma_table_info(?)', (table_name,)).fetchall()
+    pk_rows = [row for row in table_info if row[2]]
+    if len(pk_rows) == 1 and columns == [pk_rows[0][0]] and pk_rows[0][1].upper() == 'INTEGER':
+        return True
+    
+    wanted = set(columns)
+    for index_name, is_partial in conn.execute(
+            'SELECT name, partial FROM pragma_index_list(?)', (table_name,)).fetchall():
+        if is_partial:
+            continue
+        index_columns = [row[0] for row in conn.execute(
+            'SELECT name FROM pragma_index_info(?) ORDER BY seqno', (index_name,))]
+        if set(index_columns[:len(columns)]) == wanted:
+            return True
+    return False
+
+def _ensure_index(conn, table_name: str, columns: list):
+    """为关联列建立索引，已有可用索引时不重复创建"""
+    if _has_leading_index(conn, table_name, columns):
+        return
+    
+    # 按名称拼接可能与其它列组合重名（如["b_c"]和["b", "c"]），重名时追加序号
+    base_name = f"idx_{table_name}_{'_'.join(columns)}"
+    index_name = base_name
+    suffix = 1
+    while conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (index_name,)).fetchone():
+        suffix += 1
+        index_name = f"{base_name}_{suffix}"
+    
+    column_list = ', '.join(_escape_identifier(col) for col in columns)
+    conn.execute(f"CREATE INDEX {_escape_identifier(index_name)} ON {_escape_identifier(table_name)} ({column_list})")
+    conn.commit()
+
+def _build_merge_sql(left_table: str, right_table: str, on_columns: list, how: str) -> Optional[str]:
+    """把两表合并翻译为JOIN查询，列名、行顺序与pd.merge一致；无法对应时返回None"""
+    # outer join在pandas中按键排序，且旧版SQLite不支持FULL JOIN，交给pandas处理
+    if how not in ('inner', 'left', 'right'):
+        return None
+    left_columns = _get_table_columns(left_table)[0]
+    right_columns = _get_table_columns(right_table)[0]
+    if any(col not in left_columns or col not in right_columns for col in on_columns):
+        return None
+    
+    # 与pd.merge相同：关联列只保留一份，其余重名列加_left/_right后缀
+    overlap = (set(left_columns) & set(right_columns)) - set(on_columns)
+    driving = 'r' if how == 'right' else 'l'
+    select_items = []
+    output_names = []
+    for col in left_columns:
+        source = driving if col in on_columns else 'l'
+        name = f"{col}_left" if col in overlap else col
+        select_items.append(f'"{source}".{_escape_identifier(col)} AS {_escape_identifier(name)}')
+        output_names.append(name)
+    for col in right_columns:
+        if col in on_columns:
+            continue
+        name = f"{col}_right" if col in overlap else col
+        select_items.append(f'"r".{_escape_identifier(col)} AS {_escape_identifier(name)}')
+        output_names.append(name)
+    if len(set(output_names)) != len(output_names):
+        return None
+    
+    # IS与pandas一样让缺失键互相匹配；按驱动表行顺序输出，同一键的匹配行保持原顺序
+    condition = ' AND '.join(f'"l".{_escape_identifier(col)} IS "r".{_escape_identifier(col)}' for col in on_columns)
+    escaped_left = f'{_escape_identifier(left_table)} AS "l"'
+    escaped_right = f'{_escape_identifier(right_table)} AS "r"'
+    if how == 'inner':
+        from_clause = f"{escaped_left} JOIN {escaped_right} ON {condition}"
+    elif how == 'left':
+        from_clause = f"{escaped_left} LEFT JOIN {escaped_right} ON {condition}"
+    else:
+        from_clause = f"{escaped_right} LEFT JOIN {escaped_left} ON {condition}"
+    lookup = 'l' if driving == 'r' else 'r'
+    return (f"SELECT {', '.join(select_items)} FROM {from_clause} "
+            f'ORDER BY "{driving}".rowid, "{lookup}".rowid')
+
 def _process_merge(data_source: str, config: dict, target_table: str = None) -> dict:
     """数据合并处理器"""
     try:
         with get_db_connection() as conn:
+            # 两侧都是表时由SQLite在关联列索引上完成连接，分块写入结果
+            right_table = config.get('right_table')
+            on_columns = config.get('on', [])
+            how = config.get('how', 'inner')
+            if (not data_source.upper().startswith('SELECT') and right_table and isinstance(on_columns, list)
+                    and on_columns and _table_exists(data_source) and _table_exists(right_table)):
+                merge_sql = _build_merge_sql(data_source, right_table, on_columns, how)
+                if merge_sql is not None:
+                    # 被逐行查找的一侧需要关联列索引
+                    _ensure_index(conn, data_source if how == 'right' else right_table, on_columns)
+                    final_table = target_table or f"{data_source}_merged"
+                    stream_result = _stream_process(conn, merge_sql, final_table, lambda chunk, is_first: chunk)
+                    if "error" in stream_result:
+                        return stream_result
+                    
+                    return {
+                        "target_table": final_table,
+                        "processed_rows": stream_result["processed_rows"],
+                        "operations": [f"表合并: {data_source} {how} join {right_table} on {on_columns}"],
+                        "columns": stream_result["columns"]
+                    }
+            
             # 获取左表数据
             if data_source.upper().startswith('SELECT'):
                 left_df = pd.read_sql(data_source, conn)
@@ -625,7 +1392,7 @@ def _process_merge(data_source: str, config: dict, target_table: str = None) ->
             if data_source.upper().startswith('SELECT') and not target_table:
                 final_table = "query_merged"
             
-            merged_df.to_sql(final_table, conn, if_exists='replace', index=False)
+            _save_dataframe(conn, merged_df, final_table)
             
             return {
                 "target_table": final_table,
@@ -697,7 +1464,7 @@ def _process_reshape(data_source: str, config: dict, target_table: str = None) -
             if data_source.upper().startswith('SELECT') and not target_table:
                 final_table = "query_reshaped"
             
-            df.to_sql(final_table, conn, if_exists='replace', index=False)
+            _save_dataframe(conn, df, final_table)
             
             return {
                 "target_table": final_table,
@@ -713,18 +1480,28 @@ def _process_reshape(data_source: str, config: dict, target_table: str = None) -
 # 数据导出辅助函数
 # ================================
 
+# Excel单个工作表最多1048576行（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+# JSON分块导出时每块读取的行数
+JSON_EXPORT_CHUNK_SIZE = 50000
+
+def _source_query(data_source: str) -> str:
+    """将表名或SELECT语句转换为查询语句"""
+    if data_source.upper().startswith('SELECT'):
+        return data_source.strip().rstrip(';')
+    return f'SELECT * FROM {_escape_identifier(data_source)}'
+
 def _export_to_excel(data_source: str, file_path: str, options: dict) -> dict:
-    """导出到Excel文件"""
+    """导出到Excel文件（只写模式逐行写入，不在内存中构建完整工作簿）"""
     try:
+        if not OPENPYXL_AVAILABLE:
+            return {"error": "Excel导出需要安装openpyxl"}
+        
         with get_db_connection() as conn:
-            # 获取数据
-            if data_source.upper().startswith('SELECT'):
-                df = pd.read_sql(data_source, conn)
-            else:
-                if not _table_exists(data_source):
-                    return {"error": f"表 '{data_source}' 不存在"}
-                escaped_table = _escape_identifier(data_source)
-                df = pd.read_sql(f'SELECT * FROM {escaped_table}', conn)
+            if not data_source.upper().startswith('SELECT') and not _table_exists(data_source):
+                return {"error": f"表 '{data_source}' 不存在"}
+            query = _source_query(data_source)
             
             # 确保目录存在
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -733,49 +1510,73 @@ def _export_to_excel(data_source: str, file_path: str, options: dict) -> dict:
             sheet_name = options.get('sheet_name', 'Sheet1')
             auto_adjust = options.get('auto_adjust_columns', True)
             
-            # 导出到Excel
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                # 自动调整列宽
-                if auto_adjust:
-                    worksheet = writer.sheets[sheet_name]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
+            cursor = conn.execute(query)
+            columns = [description[0] for description in cursor.description]
+            
+            workbook = Workbook(write_only=True)
+            worksheet = workbook.create_sheet(title=sheet_name)
+            
+            # 只写模式下列宽必须在写入数据前设置，用一次聚合查询得到每列最大长度
+            if auto_adjust and columns:
+                length_exprs = ", ".join(
+                    f"MAX(LENGTH(CAST(src.{_escape_identifier(col)} AS TEXT)))" for col in columns
+                )
+                max_lengths = conn.execute(f"SELECT {length_exprs} FROM ({query}) AS src").fetchone()
+                for index, (col, max_length) in enumerate(zip(columns, max_lengths), start=1):
+                    column_letter = get_column_letter(index)
+                    adjusted_width = min(max(len(str(col)), max_length or 0) + 2, 50)
+                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            
+            # 表头加粗，与pandas导出的表头一致
+            header = []
+            for col in columns:
+                cell = WriteOnlyCell(worksheet, value=col)
+                cell.font = Font(bold=True)
+                header.append(cell)
+            worksheet.append(header)
+            
+            record_count = 0
+            for row in cursor:
+                record_count += 1
+                if record_count >= EXCEL_MAX_ROWS:
+                    raise ValueError(f"数据超过Excel单个工作表的最大行数 {EXCEL_MAX_ROWS - 1}")
+                worksheet.append(tuple(row))
+            
+            workbook.save(file_path)
             
             # 获取文件大小
             file_size = os.path.getsize(file_path)
             
             return {
                 "file_size": file_size,
-                "record_count": len(df),
-                "columns": list(df.columns)
+                "record_count": record_count,
+                "columns": columns
             }
             
     except Exception as e:
         return {"error": f"Excel导出失败: {str(e)}"}
 
+def _write_csv_arrow(query: str, file_path: str, separator: str) -> tuple:
+    """通过ADBC按Arrow批次读取查询结果，由pyarrow的CSV写入器直接写出，返回(记录数, 列名)"""
+    with adbc_sqlite.connect(DB_PATH) as adbc_conn:
+        with adbc_conn.cursor() as cursor:
+            cursor.execute(query)
+            reader = cursor.fetch_record_batch()
+            write_options = pa_csv.WriteOptions(delimiter=separator, quoting_style='needed')
+            record_count = 0
+            with pa_csv.CSVWriter(file_path, reader.schema, write_options=write_options) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    record_count += batch.num_rows
+    return record_count, list(reader.schema.names)
+
 def _export_to_csv(data_source: str, file_path: str, options: dict) -> dict:
-    """导出到CSV文件"""
+    """导出到CSV文件（有ADBC驱动时按Arrow批次写出，否则从游标逐行写出，内存占用与结果大小无关）"""
     try:
         with get_db_connection() as conn:
-            # 获取数据
-            if data_source.upper().startswith('SELECT'):
-                df = pd.read_sql(data_source, conn)
-            else:
-                if not _table_exists(data_source):
-                    return {"error": f"表 '{data_source}' 不存在"}
-                escaped_table = _escape_identifier(data_source)
-                df = pd.read_sql(f'SELECT * FROM {escaped_table}', conn)
+            if not data_source.upper().startswith('SELECT') and not _table_exists(data_source):
+                return {"error": f"表 '{data_source}' 不存在"}
+            query = _source_query(data_source)
             
             # 确保目录存在
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -784,33 +1585,52 @@ def _export_to_csv(data_source: str, file_path: str, options: dict) -> dict:
             encoding = options.get('encoding', 'utf-8')
             separator = options.get('separator', ',')
             
+            # pyarrow只输出UTF-8，其它编码仍逐行写出
+            if ARROW_EXPORT_AVAILABLE and encoding.lower().replace('-', '') == 'utf8':
+                try:
+                    record_count, columns = _write_csv_arrow(query, file_path, separator)
+                    return {
+                        "file_size": os.path.getsize(file_path),
+                        "record_count": record_count,
+                        "columns": columns
+                    }
+                except Exception as e:
+                    logger.warning(f"Arrow导出CSV失败，改为逐行写出: {e}")
+            
             # 导出到CSV
-            df.to_csv(file_path, index=False, encoding=encoding, sep=separator)
+            cursor = conn.execute(query)
+            columns = [description[0] for description in cursor.description]
+            
+            record_count = 0
+            with open(file_path, 'w', newline='', encoding=encoding) as f:
+                writer = csv.writer(f, delimiter=separator, lineterminator=os.linesep)
+                writer.writerow(columns)
+                while True:
+                    rows = cursor.fetchmany(10000)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    record_count += len(rows)
             
             # 获取文件大小
             file_size = os.path.getsize(file_path)
             
             return {
                 "file_size": file_size,
-                "record_count": len(df),
-                "columns": list(df.columns)
+                "record_count": record_count,
+                "columns": columns
             }
             
     except Exception as e:
         return {"error": f"CSV导出失败: {str(e)}"}
 
 def _export_to_json(data_source: str, file_path: str, options: dict) -> dict:
-    """导出到JSON文件"""
+    """导出到JSON文件（records格式分块写出，不在内存中构建完整结果；时间统一输出ISO格式）"""
     try:
         with get_db_connection() as conn:
-            # 获取数据
-            if data_source.upper().startswith('SELECT'):
-                df = pd.read_sql(data_source, conn)
-            else:
-                if not _table_exists(data_source):
-                    return {"error": f"表 '{data_source}' 不存在"}
-                escaped_table = _escape_identifier(data_source)
-                df = pd.read_sql(f'SELECT * FROM {escaped_table}', conn)
+            if not data_source.upper().startswith('SELECT') and not _table_exists(data_source):
+                return {"error": f"表 '{data_source}' 不存在"}
+            query = _source_query(data_source)
             
             # 确保目录存在
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -819,16 +1639,36 @@ def _export_to_json(data_source: str, file_path: str, options: dict) -> dict:
             orient = options.get('orient', 'records')  # records, index, values, split, table
             indent = options.get('indent', 2)
             
-            # 导出到JSON
-            df.to_json(file_path, orient=orient, indent=indent, force_ascii=False)
+            if orient != 'records':
+                # 其它格式需要完整的DataFrame
+                df = pd.read_sql(query, conn)
+                df.to_json(file_path, orient=orient, indent=indent, force_ascii=False, date_format='iso')
+                record_count = len(df)
+                columns = list(df.columns)
+            else:
+                # 每块单独序列化后去掉首尾方括号，拼接成一个数组
+                record_count = 0
+                columns = []
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write('[')
+                    for chunk in pd.read_sql(query, conn, chunksize=JSON_EXPORT_CHUNK_SIZE):
+                        columns = list(chunk.columns)
+                        if chunk.empty:
+                            continue
+                        body = chunk.to_json(
+                            orient='records', indent=indent, force_ascii=False, date_format='iso'
+                        )[1:-1].rstrip()
+                        f.write((',' if record_count else '') + body)
+                        record_count += len(chunk)
+                    f.write('\n]' if indent and record_count else ']')
             
             # 获取文件大小
             file_size = os.path.getsize(file_path)
             
             return {
                 "file_size": file_size,
-                "record_count": len(df),
-                "columns": list(df.columns)
+                "record_count": record_count,
+                "columns": columns
             }
             
     except Exception as e:
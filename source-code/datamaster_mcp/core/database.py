@@ -13,15 +13,22 @@ DataMaster MCP - 数据库核心模块
 """
 
 import json
+import re
 import sqlite3
 import pandas as pd
 import os
 import time
-from datetime import datetime
+import threading
+import functools
+import inspect
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, date, time as dt_time
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import logging
 import numpy as np
+from itertools import islice
 
 # 设置日志
 logger = logging.getLogger("DataMaster_MCP.Database")
@@ -34,6 +41,80 @@ except ImportError:
     SQLALCHEMY_AVAILABLE = False
     logger.warning("SQLAlchemy not available. External database import may not work properly.")
 
+# Excel流式导入：优先使用calamine（Rust实现），其次openpyxl只读模式
+try:
+    from python_calamine import CalamineWorkbook
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+    CalamineWorkbook = None
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    openpyxl = None
+
+# 可选：Parquet/Arrow文件导入，安装ADBC SQLite驱动时按Arrow批次直接写入
+try:
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pq = None
+    feather = None
+
+try:
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    ADBC_SQLITE_AVAILABLE = True
+except ImportError:
+    ADBC_SQLITE_AVAILABLE = False
+    adbc_sqlite = None
+
+# 可选：psutil用于按可用内存选择分批大小
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    psutil = None
+
+# 查询结果序列化：优先使用orjson
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+if ORJSON_AVAILABLE:
+    _DUMP_OPT = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def _dumps(obj) -> str:
+        """序列化查询结果"""
+        try:
+            return orjson.dumps(obj, option=_DUMP_OPT, default=str).decode()
+        except TypeError:
+            # 超过64位的整数等orjson不支持的值，回退到标准库
+            return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+
+    def _dumps_compact(obj) -> str:
+        """序列化单行数据（不缩进）"""
+        try:
+            return orjson.dumps(obj, default=str).decode()
+        except TypeError:
+            return json.dumps(obj, ensure_ascii=False, default=str)
+else:
+    def _dumps(obj) -> str:
+        """序列化查询结果"""
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+
+    def _dumps_compact(obj) -> str:
+        """序列化单行数据（不缩进）"""
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
 # 导入配置管理器
 try:
     from ..config.database_manager import database_manager
@@ -57,20 +138,50 @@ DB_PATH = "data/analysis.db"
 DATA_DIR = "data"
 EXPORTS_DIR = "exports"
 
-# 确保目录存在
-for directory in [DATA_DIR, EXPORTS_DIR]:
-    Path(directory).mkdir(exist_ok=True)
+# 目录在第一次打开数据库连接时创建，避免导入模块时的文件系统调用
+_dirs_ready = False
+
+def _ensure_dirs():
+    """确保数据和导出目录存在（只检查一次）"""
+    global _dirs_ready
+    if _dirs_ready:
+        return
+    for directory in [DATA_DIR, EXPORTS_DIR]:
+        Path(directory).mkdir(exist_ok=True)
+    _dirs_ready = True
+
+# 每个连接都要设置的PRAGMA（journal_mode=WAL会持久化到数据库文件，在init_database中设置）
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-131072",  # 128MB页缓存
+    "PRAGMA mmap_size=268435456",  # 256MB内存映射，分析时反复扫描的表直接从页缓存读取
+)
+
+# 每个线程复用一个连接，避免每次工具调用都重新连接、加载schema
+_conn_local = threading.local()
 
 def get_db_connection():
-    """获取数据库连接"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
+    """获取数据库连接（按线程复用；with语句只管理事务，不会关闭连接）"""
+    conn = getattr(_conn_local, 'conn', None)
+    if conn is None or getattr(_conn_local, 'db_path', None) != DB_PATH:
+        _ensure_dirs()
+        # 导入时反复执行相同的INSERT/建表语句，加大预编译语句缓存（默认128）
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        _conn_local.conn = conn
+        _conn_local.db_path = DB_PATH
     return conn
 
 def init_database():
     """初始化数据库"""
     try:
         with get_db_connection() as conn:
+            # WAL模式：批量写入时减少fsync，且读写互不阻塞
+            conn.execute("PRAGMA journal_mode=WAL")
+            
             # 创建元数据表
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS _metadata (
@@ -113,50 +224,139 @@ def _safe_table_query(table_name: str, query_template: str) -> str:
     escaped_table = _escape_identifier(table_name)
     return query_template.format(table=escaped_table)
 
+# 表名快照：按schema_version失效，避免每次检查都查询sqlite_master
+_table_names_cache = {"db_path": None, "schema_version": None, "tables": frozenset()}
+_table_names_lock = threading.Lock()
+
+def _get_table_names() -> frozenset:
+    """获取本地数据库的表名集合（表结构未变化时直接返回快照）"""
+    with get_db_connection() as conn:
+        # schema_version在任何建表、删表、改表后都会变化，包括其他连接的修改
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with _table_names_lock:
+            if (_table_names_cache["schema_version"] == schema_version
+                    and _table_names_cache["db_path"] == DB_PATH):
+                return _table_names_cache["tables"]
+        
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = frozenset(row[0] for row in cursor)
+    
+    with _table_names_lock:
+        _table_names_cache.update(db_path=DB_PATH, schema_version=schema_version, tables=tables)
+    return tables
+
+# 表结构快照：{表名: (列名列表, {列名: 声明类型})}，同样按schema_version整体失效
+_table_columns_cache = {"db_path": None, "schema_version": None, "tables": {}}
+
+def _get_table_columns(table_name: str) -> tuple:
+    """获取表的列名列表和{列名: 声明类型}映射（表结构未变化时直接返回缓存）"""
+    with get_db_connection() as conn:
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with _table_names_lock:
+            if (_table_columns_cache["schema_version"] != schema_version
+                    or _table_columns_cache["db_path"] != DB_PATH):
+                _table_columns_cache.update(db_path=DB_PATH, schema_version=schema_version, tables={})
+            cached = _table_columns_cache["tables"].get(table_name)
+        if cached is not None:
+            return cached
+        
+        rows = conn.execute(f"PRAGMA table_info({_escape_identifier(table_name)})").fetchall()
+    
+    column_names = [row[1] for row in rows]
+    column_types = {row[1]: row[2] for row in rows}
+    result = (column_names, column_types)
+    with _table_names_lock:
+        if _table_columns_cache["schema_version"] == schema_version:
+            _table_columns_cache["tables"][table_name] = result
+    return result
+
+def _declared_storage_type(declared_type: str) -> Optional[str]:
+    """按SQLite类型亲和性规则把声明类型映射为存储类型，无法确定时返回None"""
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return 'integer'
+    if any(key in declared_type for key in ("CHAR", "CLOB", "TEXT")):
+        return 'text'
+    if any(key in declared_type for key in ("REAL", "FLOA", "DOUB")):
+        return 'real'
+    # 无声明类型、BLOB和NUMERIC亲和性的列需要看实际存储的值
+    return None
+
 def _table_exists(table_name: str) -> bool:
     """检查表是否存在"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-                (table_name,)
-            )
-            return cursor.fetchone() is not None
+        return table_name in _get_table_names()
     except Exception:
         return False
 
+# 语句的第一个关键字
+_LEADING_KEYWORD_RE = re.compile(r'^\s*(\w+)')
+# 非SELECT语句中不允许出现的关键字（按整词匹配，避免误伤created_at等列名）
+_DANGEROUS_KEYWORD_RE = re.compile(r'\b(DROP|DELETE|UPDATE|INSERT|ALTER|CREATE|TRUNCATE)\b', re.IGNORECASE)
+# LIMIT关键字（按整词匹配）
+_LIMIT_KEYWORD_RE = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+# 可以在末尾追加LIMIT的语句类型
+_LIMITABLE_KEYWORDS = frozenset({'SELECT', 'WITH', 'VALUES'})
+
+def _leading_keyword(query: str) -> str:
+    """返回语句的第一个关键字（大写）"""
+    match = _LEADING_KEYWORD_RE.match(query)
+    return match.group(1).upper() if match else ""
+
 def _preprocess_sql(query: str) -> str:
     """预处理SQL语句"""
     # 移除多余的空白字符
     query = ' '.join(query.split())
     
     # 基本的SQL注入防护
-    dangerous_keywords = ['DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 'TRUNCATE']
-    query_upper = query.upper()
-    
-    for keyword in dangerous_keywords:
-        if keyword in query_upper and not query_upper.strip().startswith('SELECT'):
-            raise ValueError(f"不允许执行 {keyword} 操作，仅支持 SELECT 查询")
+    if _leading_keyword(query) != 'SELECT':
+        match = _DANGEROUS_KEYWORD_RE.search(query)
+        if match:
+            raise ValueError(f"不允许执行 {match.group(1).upper()} 操作，仅支持 SELECT 查询")
     
     return query
 
+def _has_outer_limit(query: str) -> bool:
+    """最后一个LIMIT是否位于最外层（子查询里的LIMIT不限制外层结果），值可以是数字、参数或表达式"""
+    matches = list(_LIMIT_KEYWORD_RE.finditer(query))
+    if not matches:
+        return False
+    depth = 0
+    for char in query[matches[-1].end():]:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+def _apply_limit(query: str, limit: int) -> str:
+    """查询语句末尾没有LIMIT时追加LIMIT限制"""
+    if not limit or limit <= 0 or _leading_keyword(query) not in _LIMITABLE_KEYWORDS:
+        return query
+    if _has_outer_limit(query):
+        return query
+    return f"{query.rstrip().rstrip(';')} LIMIT {int(limit)}"
+
+# 常见错误识别规则：(错误信息关键字, 错误类型, 建议)，按顺序匹配第一条
+_SQL_ERROR_RULES = (
+    ("no such table", "表不存在", "请使用 get_data_info() 查看可用的表"),
+    ("no such column", "列不存在", "请使用 get_data_info(info_type='schema', table_name='表名') 查看表结构"),
+    ("syntax error", "SQL语法错误", "请检查SQL语法是否正确"),
+)
+
 def _format_sql_error(error: Exception, query: str) -> dict:
     """格式化SQL错误信息"""
     error_msg = str(error)
     
     # 常见错误类型识别
-    if "no such table" in error_msg.lower():
-        error_type = "表不存在"
-        suggestion = "请使用 get_data_info() 查看可用的表"
-    elif "no such column" in error_msg.lower():
-        error_type = "列不存在"
-        suggestion = "请使用 get_data_info(info_type='schema', table_name='表名') 查看表结构"
-    elif "syntax error" in error_msg.lower():
-        error_type = "SQL语法错误"
-        suggestion = "请检查SQL语法是否正确"
-    else:
-        error_type = "未知错误"
-        suggestion = "请检查查询语句和数据库连接"
+    error_msg_lower = error_msg.lower()
+    error_type, suggestion = "未知错误", "请检查查询语句和数据库连接"
+    for keyword, rule_type, rule_suggestion in _SQL_ERROR_RULES:
+        if keyword in error_msg_lower:
+            error_type, suggestion = rule_type, rule_suggestion
+            break
     
     return {
         "status": "error",
@@ -166,10 +366,99 @@ def _format_sql_error(error: Exception, query: str) -> dict:
         "query": query
     }
 
+# ================================
+# 只读工具结果缓存
+# ================================
+
+# 是否复用相同参数、相同数据版本下的只读查询结果
+USE_CACHED_RESULT = True
+RESULT_CACHE_SIZE = 256
+
+_result_cache: "OrderedDict[str, str]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+_data_generation = 0
+
+def _bump_data_version():
+    """本进程写入数据后调用，使已缓存的查询结果失效"""
+    global _data_generation
+    with _result_cache_lock:
+        _data_generation += 1
+        _result_cache.clear()
+
+def _get_data_version() -> tuple:
+    """当前数据版本：本进程写入计数 + 本连接变更数 + 其它连接提交计数"""
+    conn = get_db_connection()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    return (_data_generation, conn.total_changes, data_version)
+
+def _is_error_result(result: str) -> bool:
+    """判断工具返回是否为错误结果（错误结果不缓存）"""
+    return result.startswith("❌") or '"status": "error"' in result[:64]
+
+# 结果随调用时间或每次执行而变化的SQL（随机数、当前时间、变更计数），不缓存
+_VOLATILE_SQL_RE = re.compile(
+    r"\b(random|randomblob|changes|total_changes|last_insert_rowid)\s*\(|'now'|\bCURRENT_(DATE|TIME|TIMESTAMP)\b",
+    re.IGNORECASE
+)
+_TIMESTAMP_FIELD = '"timestamp": "'
+
+def _refresh_timestamp(result: str) -> str:
+    """缓存命中时把结果中最后一个timestamp字段（响应的生成时间）更新为当前时间"""
+    start = result.rfind(_TIMESTAMP_FIELD)
+    if start < 0:
+        return result
+    start += len(_TIMESTAMP_FIELD)
+    end = result.find('"', start)
+    if end < 0:
+        return result
+    return result[:start] + datetime.now().isoformat() + result[end:]
+
+def _cached_result(func):
+    """缓存本地只读工具的返回结果，数据版本变化后自动失效（外部数据源和易变SQL不缓存）"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if not USE_CACHED_RESULT or bound.arguments.get('data_source'):
+            return func(*args, **kwargs)
+        query = bound.arguments.get('query')
+        if isinstance(query, str) and _VOLATILE_SQL_RE.search(query):
+            return func(*args, **kwargs)
+
+        try:
+            cache_key = json.dumps(
+                [func.__name__, bound.arguments, _get_data_version()],
+                sort_keys=True, ensure_ascii=False, default=str
+            )
+        except Exception:
+            return func(*args, **kwargs)
+
+        with _result_cache_lock:
+            cached = _result_cache.get(cache_key)
+            if cached is not None:
+                _result_cache.move_to_end(cache_key)
+                return _refresh_timestamp(cached)
+
+        result = func(*args, **kwargs)
+        if isinstance(result, str) and not _is_error_result(result):
+            with _result_cache_lock:
+                _result_cache[cache_key] = result
+                if len(_result_cache) > RESULT_CACHE_SIZE:
+                    _result_cache.popitem(last=False)
+        return result
+
+    return wrapper
+
 # ================================
 # 数据导入辅助函数
 # ================================
 
+def _default_table_name(prefix: str, file_path: str) -> str:
+    """未指定目标表时按"前缀_文件名_时间"生成表名"""
+    return f"{prefix}_{Path(file_path).stem}_{time.strftime('%Y%m%d_%H%M%S')}"
+
 def _import_excel(config: dict, target_table: str = None, target_database: str = None) -> str:
     """导入Excel文件到本地SQLite或外部数据库"""
     try:
@@ -183,16 +472,19 @@ def _import_excel(config: dict, target_table: str = None, target_database: str =
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
         
-        # 读取Excel文件
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
-        
         # 生成表名
         if not target_table:
-            file_name = Path(file_path).stem
-            target_table = f"excel_{file_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            target_table = _default_table_name('excel', file_path)
+        
+        # 导入本地时流式读取并分批写入，不把整个工作簿载入内存
+        if not target_database and _excel_streaming_supported(file_path):
+            return _import_excel_streaming(file_path, sheet_name, target_table)
+        
+        # 读取Excel文件（导入外部数据库或无法流式读取时）
+        df = pd.read_excel(file_path, sheet_name=sheet_name, **_excel_read_kwargs(file_path))
         
         # 清理列名（移除特殊字符）
-        df.columns = [col.replace(' ', '_').replace('-', '_').replace('.', '_') for col in df.columns]
+        df.columns = _clean_column_names(df.columns)
         
         # 导入到数据库
         if target_database:
@@ -200,128 +492,461 @@ def _import_excel(config: dict, target_table: str = None, target_database: str =
             return _import_to_external_database(df, target_table, target_database, 'excel', file_path, sheet_name)
         else:
             # 导入到本地SQLite数据库
-            with get_db_connection() as conn:
-                df.to_sql(target_table, conn, if_exists='replace', index=False)
-                
-                # 更新元数据
-                conn.execute("""
-                    INSERT OR REPLACE INTO _metadata 
-                    (table_name, created_at, source_type, source_path, row_count)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    target_table,
-                    datetime.now().isoformat(),
-                    'excel',
-                    file_path,
-                    len(df)
-                ))
-                conn.commit()
-            
-            result = {
+            return _import_to_local_database(df, target_table, 'excel', file_path, {'sheet_name': sheet_name})
+
+    except Exception as e:
+        logger.error(f"Excel导入失败: {e}")
+        raise
+
+def _import_to_external_database(df: pd.DataFrame, target_table: str, target_database: str, source_type: str, source_path: str, source_config: any) -> str:
+    """导入数据到外部数据库"""
+    try:
+        # 使用数据库管理器导入数据
+        result = database_manager.import_dataframe(target_database, target_table, df)
+        
+        if result["success"]:
+            response_data = {
                 "status": "success",
-                "message": "Excel文件已导入到本地SQLite数据库",
+                "message": f"{source_type.upper()}文件已导入到外部数据库",
                 "data": {
                     "table_name": target_table,
+                    "database_name": target_database,
                     "row_count": len(df),
                     "column_count": len(df.columns),
                     "columns": list(df.columns),
-                    "file_path": file_path,
-                    "sheet_name": sheet_name,
-                    "connection_type": "本地数据导入",
-                    "data_location": f"本地SQLite数据库 ({DB_PATH})",
-                    "usage_note": f"使用execute_sql('SELECT * FROM \"{target_table}\"')查询此表数据"
+                    "source_path": source_path,
+                    "source_config": source_config,
+                    "connection_type": "外部数据库导入",
+                    "data_location": f"外部数据库 ({target_database})",
+                    "usage_note": f"使用query_external_database(database_name='{target_database}', query='SELECT * FROM {target_table}')查询此表数据"
                 },
                 "metadata": {
                     "timestamp": datetime.now().isoformat(),
-                    "source_type": "excel"
+                    "source_type": source_type
                 }
             }
-        
-        return f"✅ Excel文件已导入到本地SQLite数据库\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
-        
+            return f"✅ {source_type.upper()}文件已导入到外部数据库\n\n{_dumps(response_data)}"
+        else:
+            raise Exception(result["error"])
+            
     except Exception as e:
-        logger.error(f"Excel导入失败: {e}")
+        logger.error(f"外部数据库导入失败: {e}")
         raise
 
-def _import_csv(config: dict, target_table: str = None, target_database: str = None) -> str:
-    """导入CSV文件到本地SQLite或外部数据库"""
+# to_sql多行INSERT每条语句最多使用的参数个数（SQLite 3.32+的默认上限）
+_MULTI_INSERT_MAX_VARIABLES = 32766
+
+def _to_sql_kwargs(conn: sqlite3.Connection, column_count: int) -> dict:
+    """to_sql的写入参数：参数上限足够大时使用多行INSERT，否则保持pandas默认的executemany"""
     try:
-        file_path = config.get('file_path')
-        encoding = config.get('encoding', 'utf-8')
-        separator = config.get('separator', ',')
-        
-        if not file_path:
-            raise ValueError("缺少file_path参数")
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"文件不存在: {file_path}")
-        
-        # 读取CSV文件
-        df = pd.read_csv(file_path, encoding=encoding, sep=separator)
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    except AttributeError:
+        # Python 3.11之前没有getlimit，按SQLite版本判断默认上限
+        limit = _MULTI_INSERT_MAX_VARIABLES if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+    # 上限只有999时每条语句行数太少，多行INSERT反而比executemany慢
+    if limit < _MULTI_INSERT_MAX_VARIABLES or column_count <= 0:
+        return {}
+    return {'method': 'multi', 'chunksize': max(1, _MULTI_INSERT_MAX_VARIABLES // column_count)}
+
+# 窄表（列数少于该值且无嵌套对象）直接走executemany写入，绕过to_sql的通用类型转换
+_FAST_INSERT_MAX_COLUMNS = 20
+
+def _sqlite_column_type(series: pd.Series) -> Optional[str]:
+    """推断列的SQLite类型，无法直接写入的列返回None"""
+    # 可空整数等扩展类型会产生numpy标量和pd.NA，sqlite3无法直接绑定
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and not pd.api.types.is_string_dtype(series.dtype):
+        return None
+    kind = series.dtype.kind
+    if kind in 'iub':
+        return 'INTEGER'
+    if kind == 'f':
+        return 'REAL'
+    if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+        return 'TEXT'
+    return None
+
+@functools.lru_cache(maxsize=256)
+def _insert_sql(table_name: str, column_count: int) -> str:
+    """生成批量INSERT语句（相同文本可命中连接的预编译语句缓存）"""
+    placeholders = ", ".join("?" * column_count)
+    return f"INSERT INTO {_escape_identifier(table_name)} VALUES ({placeholders})"
+
+# 同一形状（表名、列名、dtype）的重复导入复用已生成的建表/插入语句
+_INSERT_PLAN_CACHE: Dict[tuple, tuple] = {}
+_INSERT_PLAN_CACHE_SIZE = 128
+
+def _get_insert_plan(df: pd.DataFrame, table_name: str) -> Optional[tuple]:
+    """获取(DROP, CREATE, INSERT)语句，不适用快速写入时返回None"""
+    dtypes = tuple(str(dtype) for dtype in df.dtypes)
+    cache_key = (table_name, tuple(df.columns), dtypes)
+    plan = _INSERT_PLAN_CACHE.get(cache_key)
+    if plan is not None:
+        return plan
+
+    column_types = [_sqlite_column_type(df[col]) for col in df.columns]
+    if None in column_types:
+        return None
+
+    escaped_table = _escape_identifier(table_name)
+    column_defs = ", ".join(
+        f"{_escape_identifier(str(col))} {col_type}" for col, col_type in zip(df.columns, column_types)
+    )
+    plan = (
+        f"DROP TABLE IF EXISTS {escaped_table}",
+        f"CREATE TABLE {escaped_table} ({column_defs})",
+        _insert_sql(table_name, len(df.columns))
+    )
+
+    # object列的类型取决于具体取值，每次都要重新推断，不缓存
+    if 'object' not in dtypes:
+        if len(_INSERT_PLAN_CACHE) >= _INSERT_PLAN_CACHE_SIZE:
+            _INSERT_PLAN_CACHE.pop(next(iter(_INSERT_PLAN_CACHE)))
+        _INSERT_PLAN_CACHE[cache_key] = plan
+    return plan
+
+def _write_dataframe_fast(conn: sqlite3.Connection, df: pd.DataFrame, table_name: str) -> bool:
+    """使用executemany在单个事务中写入窄表，不适用时返回False"""
+    if len(df.columns) >= _FAST_INSERT_MAX_COLUMNS or df.columns.has_duplicates:
+        return False
+    if isinstance(df.columns, pd.MultiIndex):
+        return False
+
+    plan = _get_insert_plan(df, table_name)
+    if plan is None:
+        return False
+
+    drop_sql, create_sql, insert_sql = plan
+    # 调用方已开启事务（如目录批量导入）时并入同一个事务
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    conn.execute(drop_sql)
+    conn.execute(create_sql)
+    _bulk_insert(conn, insert_sql, df.itertuples(index=False, name=None))
+    return True
+
+def _append_dataframe_fast(conn: sqlite3.Connection, df: pd.DataFrame, table_name: str) -> bool:
+    """使用executemany向已有表追加窄表数据（不提交事务），不适用时返回False"""
+    if len(df.columns) >= _FAST_INSERT_MAX_COLUMNS or df.columns.has_duplicates:
+        return False
+    if isinstance(df.columns, pd.MultiIndex) or _get_insert_plan(df, table_name) is None:
+        return False
+
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    _bulk_insert(conn, _insert_sql(table_name, len(df.columns)), df.itertuples(index=False, name=None))
+    return True
+
+def _sqlite_rows(df: pd.DataFrame):
+    """按to_sql的规则把各列转换为sqlite3可以绑定的值：缺失值为None，日期时间为ISO字符串，时间差为整数"""
+    columns = []
+    for _, series in df.items():
+        mask = series.isna().to_numpy()
+        if series.dtype.kind == 'M' or isinstance(series.dtype, pd.DatetimeTZDtype):
+            values = [value.isoformat(" ") for value in series.dt.to_pydatetime()]
+        elif series.dtype.kind == 'm':
+            values = series.to_numpy().view('i8').tolist()
+        else:
+            values = series.astype(object).tolist()
+        if mask.any():
+            values = [None if missing else value for value, missing in zip(values, mask)]
+        columns.append(values)
+    return zip(*columns)
+
+def _write_dataframe(conn: sqlite3.Connection, df: pd.DataFrame, table_name: str, create: bool = True):
+    """在调用方的事务中写入任意DataFrame（不提交）：建表语句与to_sql相同
+
+    to_sql在sqlite3连接上写完会自动提交，批量导入的事务中不能使用
+    """
+    if create:
+        conn.execute(f"DROP TABLE IF EXISTS {_escape_identifier(table_name)}")
+        conn.execute(pd.io.sql.get_schema(df, table_name))
+    if len(df):
+        _bulk_insert(conn, _insert_sql(table_name, len(df.columns)), _sqlite_rows(df))
+
+# 批量写入时每次executemany的行数
+BULK_INSERT_BATCH_SIZE = 1000
+
+def _bulk_insert(conn: sqlite3.Connection, insert_sql: str, rows, batch_size: int = BULK_INSERT_BATCH_SIZE) -> int:
+    """分批executemany写入，调用方负责事务（整批只提交一次），返回写入行数"""
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        conn.executemany(insert_sql, batch)
+        total += len(batch)
+    return total
+
+@contextmanager
+def _bulk_load(conn: sqlite3.Connection):
+    """批量导入的事务：开始时即获取写锁，成功后提交并按需更新查询优化统计"""
+    if not conn.in_transaction:
+        # IMMEDIATE：导入中途不会因其他连接持有写锁而升级失败
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    conn.commit()
+    # 只分析统计信息已过时的表，开销很小
+    conn.execute("PRAGMA optimize")
+
+def _upsert_metadata(conn: sqlite3.Connection, rows: List[tuple]):
+    """批量更新_metadata中的导入记录，rows为(表名, 创建时间, 来源类型, 来源路径, 行数)"""
+    # ON CONFLICT原地更新已有记录，不像INSERT OR REPLACE那样先删后插
+    conn.executemany("""
+        INSERT INTO _metadata
+        (table_name, created_at, source_type, source_path, row_count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET
+            created_at = excluded.created_at,
+            source_type = excluded.source_type,
+            source_path = excluded.source_path,
+            row_count = excluded.row_count
+    """, rows)
+
+def _record_import_metadata(conn: sqlite3.Connection, target_table: str, source_type: str, source_path: str, row_count: int):
+    """更新_metadata中的导入记录"""
+    _upsert_metadata(conn, [(target_table, datetime.now().isoformat(), source_type, source_path, row_count)])
+
+def _record_row_count(conn: sqlite3.Connection, table_name: str, row_count: int):
+    """更新_metadata中的行数（保留已有的来源信息），供get_data_info直接读取"""
+    conn.execute("""
+        INSERT INTO _metadata (table_name, created_at, row_count)
+        VALUES (?, ?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET row_count = excluded.row_count
+    """, (table_name, datetime.now().isoformat(), row_count))
+
+def _row_counts_current(conn: sqlite3.Connection) -> bool:
+    """_metadata中的行数是否仍然可信：本连接核对行数后没有其他连接提交过修改
+
+    本进程的导入和处理会同步更新行数，其他连接（或其他进程）的写入只能通过data_version发现
+    """
+    stamp = getattr(_conn_local, 'row_counts_stamp', None)
+    if stamp is None or stamp[0] is not conn:
+        return False
+    return stamp[1] == conn.execute("PRAGMA data_version").fetchone()[0]
+
+def _mark_row_counts_current(conn: sqlite3.Connection):
+    """记录本连接核对完行数时的data_version"""
+    _conn_local.row_counts_stamp = (conn, conn.execute("PRAGMA data_version").fetchone()[0])
+
+def _local_import_response(target_table: str, source_type: str, source_path: str, source_config: any,
+                           row_count: int, columns: List[str]) -> str:
+    """生成本地导入成功的返回结果（columns为列名列表，直接放入结果）"""
+    result = {
+        "status": "success",
+        "message": f"{source_type.upper()}文件已导入到本地SQLite数据库",
+        "data": {
+            "table_name": target_table,
+            "row_count": row_count,
+            "column_count": len(columns),
+            "columns": columns,
+            "source_path": source_path,
+            "source_config": source_config,
+            "connection_type": "本地数据导入",
+            "data_location": f"本地SQLite数据库 ({DB_PATH})",
+            "usage_note": f"使用execute_sql('SELECT * FROM \"{target_table}\"')查询此表数据"
+        },
+        "metadata": {
+            "timestamp": datetime.now().isoformat(),
+            "source_type": source_type
+        }
+    }
+
+    return f"✅ {source_type.upper()}文件已导入到本地SQLite数据库\n\n{_dumps(result)}"
+
+def _import_to_local_database(df: pd.DataFrame, target_table: str, source_type: str, source_path: str, source_config: any) -> str:
+    """导入数据到本地SQLite数据库"""
+    try:
+        row_count = len(df)
+        with _bulk_load(get_db_connection()) as conn:
+            # 窄表走executemany快速路径，其余按to_sql的类型规则转换后写入同一个事务
+            if not _write_dataframe_fast(conn, df, target_table):
+                _write_dataframe(conn, df, target_table)
+
+            # 更新元数据
+            _record_import_metadata(conn, target_table, source_type, source_path, row_count)
+
+        return _local_import_response(target_table, source_type, source_path, source_config, row_count, df.columns.tolist())
+
+    except Exception as e:
+        logger.error(f"本地数据库导入失败: {e}")
+        raise
+
+# CSV分块导入每块的行数（无法获取可用内存时使用）
+CSV_CHUNK_SIZE = 50000
+
+# 列名中的空格、连字符和点统一替换为下划线（一次translate完成）
+_COLUMN_NAME_TRANSLATION = str.maketrans({' ': '_', '-': '_', '.': '_'})
+
+def _clean_column_names(columns) -> List[str]:
+    """清理列名（移除特殊字符）"""
+    return [str(col).translate(_COLUMN_NAME_TRANSLATION) for col in columns]
+
+def _write_import_chunks(conn: sqlite3.Connection, chunks, target_table: str) -> tuple:
+    """把DataFrame分块写入目标表：第一块决定表结构，后续块追加，返回(行数, 列名列表)"""
+    row_count = 0
+    columns = None
+    for chunk in chunks:
+        chunk.columns = _clean_column_names(chunk.columns)
+        if columns is None:
+            # 第一块：建表并写入
+            columns = list(chunk.columns)
+            if not _write_dataframe_fast(conn, chunk, target_table):
+                _write_dataframe(conn, chunk, target_table)
+        elif _get_insert_plan(chunk, target_table) is not None:
+            # 后续块：取值可以直接绑定时追加到同一个事务
+            _bulk_insert(conn, _insert_sql(target_table, len(columns)), chunk.itertuples(index=False, name=None))
+        else:
+            _write_dataframe(conn, chunk, target_table, create=False)
+        row_count += len(chunk)
+    return row_count, columns
+
+def _write_csv_file(conn: sqlite3.Connection, file_path: str, target_table: str, encoding: str, separator: str) -> tuple:
+    """分块读取一个CSV文件写入目标表（不提交事务），返回(行数, 列名列表)"""
+    header = pd.read_csv(file_path, encoding=encoding, sep=separator, nrows=0)
+    chunk_size = _pick_chunk_size(len(header.columns) * _OBJECT_CELL_BYTES, CSV_CHUNK_SIZE)
+    
+    # 内存映射读取：解析器直接读页缓存，不额外复制一份文件内容
+    chunks = pd.read_csv(file_path, encoding=encoding, sep=separator, chunksize=chunk_size, memory_map=True)
+    row_count, columns = _write_import_chunks(conn, chunks, target_table)
+    
+    if columns is None:
+        # 只有表头的文件
+        columns = _clean_column_names(header.columns)
+        header.columns = columns
+        _write_dataframe(conn, header, target_table)
+    return row_count, columns
+
+def _import_csv_streaming(file_path: str, target_table: str, encoding: str, separator: str, config: dict) -> str:
+    """分块读取CSV，第一块决定表结构，所有块在同一个事务中executemany写入"""
+    with _bulk_load(get_db_connection()) as conn:
+        row_count, columns = _write_csv_file(conn, file_path, target_table, encoding, separator)
         
-        # 生成表名
-        if not target_table:
-            file_name = Path(file_path).stem
-            target_table = f"csv_{file_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # 更新元数据
+        _record_import_metadata(conn, target_table, 'csv', file_path, row_count)
+    
+    return _local_import_response(target_table, 'csv', file_path, config, row_count, columns)
+
+def _import_csv_directory(config: dict, target_table: str = None) -> str:
+    """把目录中匹配的CSV文件逐个导入本地SQLite，所有文件和元数据在同一个事务中提交（任一文件失败时全部回滚）"""
+    directory = config.get('directory')
+    pattern = config.get('pattern', '*.csv')
+    encoding = config.get('encoding', 'utf-8')
+    separator = config.get('separator', ',')
+    
+    if not directory:
+        raise ValueError("缺少directory参数")
+    
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"目录不存在: {directory}")
+    
+    file_paths = sorted(path for path in Path(directory).glob(pattern) if path.is_file())
+    if not file_paths:
+        raise FileNotFoundError(f"目录中没有匹配 {pattern} 的文件: {directory}")
+    
+    # 表名：文件名（清理特殊字符），指定target_table时作为前缀
+    imported = []
+    metadata_rows = []
+    imported_at = datetime.now().isoformat()
+    with _bulk_load(get_db_connection()) as conn:
+        for path in file_paths:
+            table_name = path.stem.translate(_COLUMN_NAME_TRANSLATION)
+            if target_table:
+                table_name = f"{target_table}_{table_name}"
+            row_count, columns = _write_csv_file(conn, str(path), table_name, encoding, separator)
+            metadata_rows.append((table_name, imported_at, 'csv', str(path), row_count))
+            imported.append({
+                "table_name": table_name,
+                "source_path": str(path),
+                "row_count": row_count,
+                "column_count": len(columns)
+            })
         
-        # 清理列名
-        df.columns = [col.replace(' ', '_').replace('-', '_').replace('.', '_') for col in df.columns]
+        _upsert_metadata(conn, metadata_rows)
+    
+    result = {
+        "status": "success",
+        "message": f"目录中的 {len(imported)} 个CSV文件已导入到本地SQLite数据库",
+        "data": {
+            "directory": directory,
+            "pattern": pattern,
+            "tables": imported,
+            "table_count": len(imported),
+            "total_rows": sum(item["row_count"] for item in imported),
+            "connection_type": "本地数据导入",
+            "data_location": f"本地SQLite数据库 ({DB_PATH})"
+        },
+        "metadata": {
+            "timestamp": imported_at,
+            "source_type": "directory"
+        }
+    }
+    
+    return f"✅ 目录中的CSV文件已导入到本地SQLite数据库\n\n{_dumps(result)}"
+
+# Parquet/Arrow无ADBC驱动时每批转换为DataFrame的行数（无法获取可用内存时使用）
+ARROW_BATCH_SIZE = 50000
+
+def _read_arrow_table(file_path: str, source_type: str):
+    """以内存映射方式读取Parquet/Arrow文件为pyarrow.Table"""
+    if source_type == 'parquet':
+        return pq.read_table(file_path, memory_map=True)
+    return feather.read_table(file_path, memory_map=True)
+
+def _import_arrow_local(file_path: str, target_table: str, source_type: str, config: dict) -> str:
+    """Parquet/Arrow导入本地SQLite：有ADBC驱动时整表按Arrow批次写入，否则分批转换后写入"""
+    if ADBC_SQLITE_AVAILABLE:
+        table = _read_arrow_table(file_path, source_type)
+        table = table.rename_columns(_clean_column_names(table.column_names))
+        # ADBC通过Arrow C数据接口写入，不逐行创建Python对象
+        with adbc_sqlite.connect(DB_PATH) as adbc_conn:
+            with adbc_conn.cursor() as cursor:
+                cursor.adbc_ingest(target_table, table, mode='replace')
+            adbc_conn.commit()
+        row_count, columns = table.num_rows, list(table.column_names)
         
-        # 导入到数据库
-        if target_database:
-            # 导入到外部数据库
-            return _import_to_external_database(df, target_table, target_database, 'csv', file_path, {'encoding': encoding, 'separator': separator})
-        else:
-            # 导入到本地SQLite数据库
-            with get_db_connection() as conn:
-                df.to_sql(target_table, conn, if_exists='replace', index=False)
-                
-                # 更新元数据
-                conn.execute("""
-                    INSERT OR REPLACE INTO _metadata 
-                    (table_name, created_at, source_type, source_path, row_count)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    target_table,
-                    datetime.now().isoformat(),
-                    'csv',
-                    file_path,
-                    len(df)
-                ))
-                conn.commit()
-            
-            result = {
-                "status": "success",
-                "message": "CSV文件已导入到本地SQLite数据库",
-                "data": {
-                    "table_name": target_table,
-                    "row_count": len(df),
-                    "column_count": len(df.columns),
-                    "columns": list(df.columns),
-                    "file_path": file_path,
-                    "encoding": encoding,
-                    "separator": separator,
-                    "connection_type": "本地数据导入",
-                    "data_location": f"本地SQLite数据库 ({DB_PATH})",
-                    "usage_note": f"使用execute_sql('SELECT * FROM \"{target_table}\"')查询此表数据"
-                },
-                "metadata": {
-                    "timestamp": datetime.now().isoformat(),
-                    "source_type": "csv"
-                }
-            }
+        with get_db_connection() as conn:
+            _record_import_metadata(conn, target_table, source_type, file_path, row_count)
+            conn.commit()
+        return _local_import_response(target_table, source_type, file_path, config, row_count, columns)
+    
+    # 没有ADBC驱动：按批次转换为DataFrame，在同一个事务中写入
+    if source_type == 'parquet':
+        parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        schema = parquet_file.schema_arrow
+        batches = lambda size: parquet_file.iter_batches(batch_size=size)
+    else:
+        table = _read_arrow_table(file_path, source_type)
+        schema = table.schema
+        batches = lambda size: table.to_batches(max_chunksize=size)
+    
+    chunk_size = _pick_chunk_size(len(schema) * _OBJECT_CELL_BYTES, ARROW_BATCH_SIZE)
+    with _bulk_load(get_db_connection()) as conn:
+        chunks = (batch.to_pandas() for batch in batches(chunk_size))
+        row_count, columns = _write_import_chunks(conn, chunks, target_table)
         
-        return f"✅ CSV文件已导入到本地SQLite数据库\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        if columns is None:
+            # 没有数据行的文件
+            empty = schema.empty_table().to_pandas()
+            empty.columns = columns = _clean_column_names(empty.columns)
+            _write_dataframe(conn, empty, target_table)
         
-    except Exception as e:
-        logger.error(f"CSV导入失败: {e}")
-        raise
+        _record_import_metadata(conn, target_table, source_type, file_path, row_count)
+    
+    return _local_import_response(target_table, source_type, file_path, config, row_count, columns)
 
-def _import_json(config: dict, target_table: str = None, target_database: str = None) -> str:
-    """导入JSON文件到本地SQLite或外部数据库"""
+def _import_arrow_file(config: dict, target_table: str = None, target_database: str = None, source_type: str = 'parquet') -> str:
+    """导入Parquet/Arrow(Feather)文件到本地SQLite或外部数据库"""
     try:
+        if not PYARROW_AVAILABLE:
+            raise ImportError("导入Parquet/Arrow文件需要安装pyarrow: pip install pyarrow")
+        
         file_path = config.get('file_path')
-        encoding = config.get('encoding', 'utf-8')
         
         if not file_path:
             raise ValueError("缺少file_path参数")
@@ -329,109 +954,207 @@ def _import_json(config: dict, target_table: str = None, target_database: str =
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
         
-        # 读取JSON文件
-        with open(file_path, 'r', encoding=encoding) as f:
-            data = json.load(f)
-        
-        # 转换为DataFrame
-        if isinstance(data, list):
-            df = pd.json_normalize(data)
-        elif isinstance(data, dict):
-            df = pd.json_normalize([data])
-        else:
-            raise ValueError("JSON文件格式不支持，需要是对象或对象数组")
-        
         # 生成表名
         if not target_table:
-            file_name = Path(file_path).stem
-            target_table = f"json_{file_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            target_table = _default_table_name(source_type, file_path)
         
-        # 清理列名
-        df.columns = [col.replace(' ', '_').replace('-', '_').replace('.', '_') for col in df.columns]
+        if not target_database:
+            return _import_arrow_local(file_path, target_table, source_type, config)
         
-        # 导入到数据库
-        if target_database:
-            # 导入到外部数据库
-            return _import_to_external_database(df, target_table, target_database, 'json', file_path, {'encoding': encoding})
-        else:
-            # 导入到本地SQLite数据库
-            with get_db_connection() as conn:
-                df.to_sql(target_table, conn, if_exists='replace', index=False)
-                
-                # 更新元数据
-                conn.execute("""
-                    INSERT OR REPLACE INTO _metadata 
-                    (table_name, created_at, source_type, source_path, row_count)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    target_table,
-                    datetime.now().isoformat(),
-                    'json',
-                    file_path,
-                    len(df)
-                ))
-                conn.commit()
-            
-            result = {
-                "status": "success",
-                "message": "JSON文件已导入到本地SQLite数据库",
-                "data": {
-                    "table_name": target_table,
-                    "row_count": len(df),
-                    "column_count": len(df.columns),
-                    "columns": list(df.columns),
-                    "file_path": file_path,
-                    "encoding": encoding,
-                    "connection_type": "本地数据导入",
-                    "data_location": f"本地SQLite数据库 ({DB_PATH})",
-                    "usage_note": f"使用execute_sql('SELECT * FROM \"{target_table}\"')查询此表数据"
-                },
-                "metadata": {
-                    "timestamp": datetime.now().isoformat(),
-                    "source_type": "json"
-                }
-            }
-        
-        return f"✅ JSON文件已导入到本地SQLite数据库\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        # 导入到外部数据库
+        df = _read_arrow_table(file_path, source_type).to_pandas()
+        df.columns = _clean_column_names(df.columns)
+        return _import_to_external_database(df, target_table, target_database, source_type, file_path, config)
         
     except Exception as e:
-        logger.error(f"JSON导入失败: {e}")
+        logger.error(f"{source_type}文件导入失败: {e}")
         raise
 
-def _import_to_external_database(df: pd.DataFrame, target_table: str, target_database: str, source_type: str, source_path: str, source_config: any) -> str:
-    """导入数据到外部数据库"""
+# Excel流式导入每批写入的行数（无法获取可用内存时使用）
+EXCEL_BATCH_SIZE = 10000
+
+# 自适应分批的行数范围；每批最多占用可用内存的1/CHUNK_MEMORY_FRACTION
+CHUNK_SIZE_MIN = 1000
+CHUNK_SIZE_MAX = 200000
+CHUNK_MEMORY_FRACTION = 8
+
+# 估算行大小时，数值占8字节，其他值按Python对象（含字符串内容）估算
+_NUMERIC_CELL_BYTES = 8
+_OBJECT_CELL_BYTES = 64
+
+def _available_memory() -> Optional[int]:
+    """获取可用物理内存字节数，无法获取时返回None"""
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.virtual_memory().available
+        except Exception:
+            pass
     try:
-        # 使用数据库管理器导入数据
-        result = database_manager.import_dataframe(target_database, target_table, df)
-        
-        if result["success"]:
-            response_data = {
-                "status": "success",
-                "message": f"{source_type.upper()}文件已导入到外部数据库",
-                "data": {
-                    "table_name": target_table,
-                    "database_name": target_database,
-                    "row_count": len(df),
-                    "column_count": len(df.columns),
-                    "columns": list(df.columns),
-                    "source_path": source_path,
-                    "source_config": source_config,
-                    "connection_type": "外部数据库导入",
-                    "data_location": f"外部数据库 ({target_database})",
-                    "usage_note": f"使用query_external_database(database_name='{target_database}', query='SELECT * FROM {target_table}')查询此表数据"
-                },
-                "metadata": {
-                    "timestamp": datetime.now().isoformat(),
-                    "source_type": source_type
-                }
-            }
-            return f"✅ {source_type.upper()}文件已导入到外部数据库\n\n{json.dumps(response_data, indent=2, ensure_ascii=False)}"
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def _estimate_row_bytes(column_types) -> int:
+    """按SQLite声明类型估算一行在内存中的大小"""
+    total = 0
+    for col_type in column_types:
+        col_type = (col_type or '').upper()
+        if 'INT' in col_type or col_type in ('REAL', 'FLOAT', 'DOUBLE', 'NUMERIC'):
+            total += _NUMERIC_CELL_BYTES
         else:
-            raise Exception(result["error"])
+            total += _OBJECT_CELL_BYTES
+    return total
+
+def _pick_chunk_size(row_bytes: int, default: int) -> int:
+    """按可用内存选择分批行数，无法获取可用内存时返回default"""
+    available = _available_memory()
+    if not available or row_bytes <= 0:
+        return default
+    return max(CHUNK_SIZE_MIN, min(CHUNK_SIZE_MAX, available // (row_bytes * CHUNK_MEMORY_FRACTION)))
+
+# pandas 2.2起支持calamine引擎
+_PANDAS_CALAMINE_ENGINE = tuple(int(part) for part in pd.__version__.split('.')[:2]) >= (2, 2)
+
+def _excel_read_kwargs(file_path: str) -> dict:
+    """整表读取Excel时的pandas参数：可用时使用calamine引擎"""
+    suffix = Path(file_path).suffix.lower()
+    if CALAMINE_AVAILABLE and _PANDAS_CALAMINE_ENGINE and suffix in ('.xlsx', '.xlsm', '.xlsb', '.xls', '.ods'):
+        return {'engine': 'calamine'}
+    return {}
+
+def _excel_streaming_supported(file_path: str) -> bool:
+    """判断该Excel文件能否走流式导入"""
+    suffix = Path(file_path).suffix.lower()
+    if CALAMINE_AVAILABLE and suffix in ('.xlsx', '.xlsm', '.xlsb', '.xls', '.ods'):
+        return True
+    return OPENPYXL_AVAILABLE and suffix in ('.xlsx', '.xlsm')
+
+def _iter_excel_rows(file_path: str, sheet_name: Any = 0):
+    """逐行读取Excel工作表（第一行为表头），优先使用calamine"""
+    if CALAMINE_AVAILABLE:
+        yield from _iter_calamine_rows(file_path, sheet_name)
+        return
+    
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        for row in ws.iter_rows(values_only=True):
+            yield row
+    finally:
+        # 只读模式下必须显式关闭，否则文件句柄会泄漏
+        wb.close()
+
+def _normalize_calamine_cell(value: Any) -> Any:
+    """空单元格转为None，整数值的浮点数转为int（与pandas.read_excel一致）"""
+    if value == "":
+        return None
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+def _iter_calamine_rows(file_path: str, sheet_name: Any = 0):
+    """使用calamine读取工作表"""
+    wb = CalamineWorkbook.from_path(file_path)
+    try:
+        if isinstance(sheet_name, int):
+            sheet = wb.get_sheet_by_index(sheet_name)
+        else:
+            sheet = wb.get_sheet_by_name(sheet_name)
+        for row in sheet.to_python(skip_empty_area=False):
+            yield tuple(map(_normalize_calamine_cell, row))
+    finally:
+        if hasattr(wb, 'close'):
+            wb.close()
+
+def _excel_column_names(header: tuple) -> List[str]:
+    """按pandas.read_excel的规则生成列名，并做与其它导入一致的清理"""
+    columns = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        # 重复列名加序号后缀
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name.translate(_COLUMN_NAME_TRANSLATION))
+    return columns
+
+def _infer_column_affinity(values: list) -> str:
+    """根据样本值推断SQLite列类型"""
+    value_types = {type(v) for v in values if v is not None}
+    if not value_types:
+        return 'TEXT'
+    if value_types <= {bool, int}:
+        return 'INTEGER'
+    if value_types <= {bool, int, float}:
+        return 'REAL'
+    return 'TEXT'
+
+def _normalize_excel_row(row: tuple, column_count: int) -> Optional[tuple]:
+    """补齐/截断行长度并把日期时间转为字符串，空行返回None"""
+    if len(row) != column_count:
+        row = (tuple(row) + (None,) * column_count)[:column_count]
+    if all(v is None for v in row):
+        return None
+    if any(isinstance(v, (datetime, date, dt_time)) for v in row):
+        row = tuple(
+            v.isoformat(sep=' ') if isinstance(v, datetime)
+            else v.isoformat() if isinstance(v, (date, dt_time))
+            else v
+            for v in row
+        )
+    return row
+
+def _import_excel_streaming(file_path: str, sheet_name: Any, target_table: str) -> str:
+    """流式读取xlsx并分批executemany写入本地SQLite"""
+    rows = _iter_excel_rows(file_path, sheet_name)
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("Excel工作表为空")
+        columns = _excel_column_names(header)
+        column_count = len(columns)
+        batch_size = _pick_chunk_size(column_count * _OBJECT_CELL_BYTES, EXCEL_BATCH_SIZE)
+        escaped_table = _escape_identifier(target_table)
+        insert_sql = _insert_sql(target_table, column_count)
+        
+        row_count = 0
+        batch = []
+        table_created = False
+        
+        with _bulk_load(get_db_connection()) as conn:
+            def flush():
+                nonlocal table_created
+                if not table_created:
+                    # 用第一批数据推断列类型
+                    column_defs = ", ".join(
+                        f"{_escape_identifier(col)} {_infer_column_affinity([r[i] for r in batch])}"
+                        for i, col in enumerate(columns)
+                    )
+                    conn.execute(f"DROP TABLE IF EXISTS {escaped_table}")
+                    conn.execute(f"CREATE TABLE {escaped_table} ({column_defs})")
+                    table_created = True
+                _bulk_insert(conn, insert_sql, batch)
+                batch.clear()
             
-    except Exception as e:
-        logger.error(f"外部数据库导入失败: {e}")
-        raise
+            for raw_row in rows:
+                row = _normalize_excel_row(raw_row, column_count)
+                if row is None:
+                    continue
+                batch.append(row)
+                row_count += 1
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+            
+            # 更新元数据
+            _record_import_metadata(conn, target_table, 'excel', file_path, row_count)
+    finally:
+        rows.close()
+    
+    return _local_import_response(target_table, 'excel', file_path, {'sheet_name': sheet_name}, row_count, columns)
 
 def _import_csv(config: dict, target_table: str = None, target_database: str = None) -> str:
     """导入CSV文件到本地SQLite或外部数据库"""
@@ -447,16 +1170,19 @@ def _import_csv(config: dict, target_table: str = None, target_database: str = N
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
         
-        # 读取CSV文件
-        df = pd.read_csv(file_path, encoding=encoding, sep=separator)
-        
         # 生成表名
         if not target_table:
-            file_name = Path(file_path).stem
-            target_table = f"csv_{file_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            target_table = _default_table_name('csv', file_path)
+        
+        # 导入本地时分块读取并在单个事务中写入，不把整个文件载入内存
+        if not target_database:
+            return _import_csv_streaming(file_path, target_table, encoding, separator, config)
+        
+        # 读取CSV文件
+        df = pd.read_csv(file_path, encoding=encoding, sep=separator, memory_map=True)
         
         # 清理列名（移除特殊字符）
-        df.columns = [col.replace(' ', '_').replace('-', '_').replace('.', '_') for col in df.columns]
+        df.columns = _clean_column_names(df.columns)
         
         # 导入到数据库
         if target_database:
@@ -497,11 +1223,10 @@ def _import_json(config: dict, target_table: str = None, target_database: str =
         
         # 生成表名
         if not target_table:
-            file_name = Path(file_path).stem
-            target_table = f"json_{file_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            target_table = _default_table_name('json', file_path)
         
         # 清理列名（移除特殊字符）
-        df.columns = [col.replace(' ', '_').replace('-', '_').replace('.', '_') for col in df.columns]
+        df.columns = _clean_column_names(df.columns)
         
         # 导入到数据库
         if target_database:
@@ -530,6 +1255,11 @@ def _connect_sqlite(config: dict, target_table: str = None) -> str:
         if not os.path.exists(db_path):
             raise FileNotFoundError(f"SQLite文件不存在: {db_path}")
         
+        # 指定了源表和目标表时，直接在SQLite内部复制到本地数据库
+        source_table = config.get('table_name')
+        if source_table and target_table:
+            return _copy_sqlite_table(db_path, source_table, target_table)
+        
         # 测试连接
         conn = sqlite3.connect(db_path)
         cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -552,18 +1282,94 @@ def _connect_sqlite(config: dict, target_table: str = None) -> str:
             }
         }
         
-        return f"✅ SQLite数据库连接成功\n\n{json.dumps(result, indent=2, ensure_ascii=False)}"
+        return f"✅ SQLite数据库连接成功\n\n{_dumps(result)}"
         
     except Exception as e:
         logger.error(f"SQLite连接失败: {e}")
         raise
 
+# CREATE TABLE语句开头的（可带schema限定的）表名
+_SQL_IDENTIFIER = r"""(?:"(?:[^"]|"")*"|'(?:[^']|'')*'|\[[^\]]*\]|`(?:[^`]|``)*`|[^\s(.]+)"""
+_CREATE_TABLE_NAME_RE = re.compile(
+    rf'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:{_SQL_IDENTIFIER}\s*\.\s*)?{_SQL_IDENTIFIER}',
+    re.IGNORECASE
+)
+
+def _copy_sqlite_table(db_path: str, source_table: str, target_table: str) -> str:
+    """通过ATTACH DATABASE将外部SQLite文件中的表复制到本地数据库
+    
+    按源表的建表语句建表，保留主键、NOT NULL、默认值和CHECK等约束（不复制索引和触发器），
+    再用INSERT ... SELECT复制数据；无法改写建表语句时（如虚拟表）退回CREATE TABLE AS。
+    """
+    escaped_target = _escape_identifier(target_table)
+    escaped_source = _escape_identifier(source_table)
+    
+    with get_db_connection() as conn:
+        conn.execute("ATTACH DATABASE ? AS sqlite_src", (db_path,))
+        try:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_src.sqlite_master WHERE type='table' AND name=?",
+                (source_table,)
+            ).fetchone()
+            if not row:
+                raise ValueError(f"源表不存在: {source_table}")
+            
+            # 整个复制过程在SQLite内部完成，不经过DataFrame
+            conn.execute(f"DROP TABLE IF EXISTS main.{escaped_target}")
+            create_sql = row[0] or ""
+            if _CREATE_TABLE_NAME_RE.match(create_sql):
+                conn.execute(_CREATE_TABLE_NAME_RE.sub(lambda m: f"CREATE TABLE main.{escaped_target}", create_sql, count=1))
+                # 生成列不能插入，只复制普通列
+                copy_columns = ", ".join(
+                    _escape_identifier(col[1])
+                    for col in conn.execute(f"PRAGMA sqlite_src.table_xinfo({escaped_source})")
+                    if col[6] == 0
+                )
+                conn.execute(
+                    f"INSERT INTO main.{escaped_target} ({copy_columns}) "
+                    f"SELECT {copy_columns} FROM sqlite_src.{escaped_source}"
+                )
+            else:
+                conn.execute(f"CREATE TABLE main.{escaped_target} AS SELECT * FROM sqlite_src.{escaped_source}")
+            row_count = conn.execute(f"SELECT COUNT(*) FROM main.{escaped_target}").fetchone()[0]
+            columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({escaped_target})")]
+            
+            # 更新元数据
+            _record_import_metadata(conn, target_table, 'sqlite', db_path, row_count)
+            conn.commit()
+        finally:
+            # DETACH不能在事务中执行
+            conn.rollback()
+            conn.execute("DETACH DATABASE sqlite_src")
+    
+    result = {
+        "status": "success",
+        "message": "SQLite表已导入到本地SQLite数据库",
+        "data": {
+            "table_name": target_table,
+            "source_table": source_table,
+            "row_count": row_count,
+            "column_count": len(columns),
+            "columns": columns,
+            "db_path": db_path,
+            "connection_type": "本地数据导入",
+            "data_location": f"本地SQLite数据库 ({DB_PATH})",
+            "usage_note": f"使用execute_sql('SELECT * FROM \"{target_table}\"')查询此表数据"
+        },
+        "metadata": {
+            "timestamp": datetime.now().isoformat(),
+            "source_type": "sqlite"
+        }
+    }
+    
+    return f"✅ SQLite表已导入到本地SQLite数据库\n\n{_dumps(result)}"
+
 def _connect_external_database(db_type: str, config: dict, target_table: str = None) -> str:
     """连接外部数据库（第一步：创建临时配置）"""
     try:
-        # 生成临时配置名称
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        temp_config_name = f"temp_{db_type}_{timestamp}"
+        # 生成临时配置名称（与返回结果使用同一个时间）
+        now = datetime.now()
+        temp_config_name = f"temp_{db_type}_{now.strftime('%Y%m%d_%H%M%S')}"
         
         # 标准化配置参数
         standardized_config = _standardize_db_config(db_type, config)
@@ -585,12 +1391,12 @@ def _connect_external_database(db_type: str, config: dict, target_table: str = N
                     "next_step": f"使用connect_data_source(source_type='database_config', config={{'database_name': '{temp_config_name}'}})建立连接"
                 },
                 "metadata": {
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": now.isoformat(),
                     "source_type": db_type,
                     "step": "第一步：配置创建"
                 }
             }
-            return f"✅ {db_type.upper()}数据库临时配置已创建\n\n{json.dumps(response_data, indent=2, ensure_ascii=False)}"
+            return f"✅ {db_type.upper()}数据库临时配置已创建\n\n{_dumps(response_data)}"
         else:
             raise Exception(result["error"])
             
@@ -638,7 +1444,7 @@ def _connect_from_config(config: dict, target_table: str = None) -> str:
             if len(tables) > 10:
                 response_data["data"]["note"] = f"共有{len(tables)}个表，仅显示前10个"
             
-            return f"✅ 数据库连接已建立\n\n{json.dumps(response_data, indent=2, ensure_ascii=False)}"
+            return f"✅ 数据库连接已建立\n\n{_dumps(response_data)}"
         else:
             raise Exception(result["error"])
             
@@ -677,6 +1483,24 @@ def _standardize_db_config(db_type: str, config: dict) -> dict:
 # 主要工具函数实现
 # ================================
 
+# 数据源类型 -> 处理函数(config, target_table, target_database)
+_SOURCE_HANDLERS = {
+    "excel": _import_excel,
+    "csv": _import_csv,
+    "json": _import_json,
+    "directory": lambda config, target_table, target_database: _import_csv_directory(config, target_table),
+    "parquet": functools.partial(_import_arrow_file, source_type="parquet"),
+    "arrow": functools.partial(_import_arrow_file, source_type="arrow"),
+    "sqlite": lambda config, target_table, target_database: _connect_sqlite(config, target_table),
+    "mysql": lambda config, target_table, target_database: _connect_external_database("mysql", config, target_table),
+    "postgresql": lambda config, target_table, target_database: _connect_external_database("postgresql", config, target_table),
+    "mongodb": lambda config, target_table, target_database: _connect_external_database("mongodb", config, target_table),
+    "database_config": lambda config, target_table, target_database: _connect_from_config(config, target_table),
+}
+
+# 会写入本地数据库的数据源类型
+_LOCAL_IMPORT_SOURCES = frozenset({"excel", "csv", "json", "directory", "parquet", "arrow", "sqlite"})
+
 def connect_data_source_impl(
     source_type: str,
     config: dict,
@@ -685,29 +1509,31 @@ def connect_data_source_impl(
 ) -> str:
     """数据源连接路由器实现"""
     try:
-        if source_type == "excel":
-            return _import_excel(config, target_table, target_database)
-        elif source_type == "csv":
-            return _import_csv(config, target_table, target_database)
-        elif source_type == "json":
-            return _import_json(config, target_table, target_database)
-        elif source_type == "sqlite":
-            return _connect_sqlite(config, target_table)
-        elif source_type in ["mysql", "postgresql", "mongodb"]:
-            return _connect_external_database(source_type, config, target_table)
-        elif source_type == "database_config":
-            return _connect_from_config(config, target_table)
-        else:
+        handler = _SOURCE_HANDLERS.get(source_type)
+        if handler is None:
             raise ValueError(f"不支持的数据源类型: {source_type}")
+        
+        result = handler(config, target_table, target_database)
+        if source_type in _LOCAL_IMPORT_SOURCES:
+            # 导入会写入本地数据库，使缓存的查询结果失效
+            _bump_data_version()
+        return result
     except Exception as e:
         logger.error(f"数据源连接失败: {e}")
-        return json.dumps({
+        return _dumps({
             "status": "error",
             "message": f"数据源连接失败: {str(e)}",
             "source_type": source_type,
             "timestamp": datetime.now().isoformat()
-        }, indent=2, ensure_ascii=False)
+        })
+
+# execute_sql每次从游标取出的行数
+SQL_FETCH_BATCH_SIZE = 1000
 
+# execute_sql结果中data字段的占位符，序列化外层后再替换
+_SQL_DATA_PLACEHOLDER = "__datamaster_sql_data__"
+
+@_cached_result
 def execute_sql_impl(
     query: str,
     params: dict = None,
@@ -720,8 +1546,7 @@ def execute_sql_impl(
         query = _preprocess_sql(query)
         
         # 添加LIMIT限制
-        if limit and limit > 0 and "LIMIT" not in query.upper():
-            query += f" LIMIT {limit}"
+        query = _apply_limit(query, limit)
         
         with get_db_connection() as conn:
             if params:
@@ -732,27 +1557,31 @@ def execute_sql_impl(
             # 获取列名
             columns = [description[0] for description in cursor.description]
             
-            # 获取数据
-            rows = cursor.fetchall()
-            
-            # 转换为字典列表
-            data = [dict(zip(columns, row)) for row in rows]
+            # 分批取出数据，每行直接编码为一行紧凑JSON，不保留整个字典列表
+            row_lines = []
+            while True:
+                rows = cursor.fetchmany(SQL_FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                row_lines.extend(_dumps_compact(dict(zip(columns, row))) for row in rows)
             
             result = {
                 "status": "success",
-                "data": data,
+                "data": _SQL_DATA_PLACEHOLDER,
                 "columns": columns,
-                "row_count": len(data),
+                "row_count": len(row_lines),
                 "query": query,
                 "timestamp": datetime.now().isoformat()
             }
             
-            return json.dumps(result, indent=2, ensure_ascii=False, default=str)
+            # 外层保持缩进格式，用占位符替换为数据部分（每行一条记录）
+            data_json = "[\n    " + ",\n    ".join(row_lines) + "\n  ]" if row_lines else "[]"
+            return _dumps(result).replace(_dumps_compact(_SQL_DATA_PLACEHOLDER), data_json, 1)
             
     except Exception as e:
         logger.error(f"SQL执行失败: {e}")
         error_info = _format_sql_error(e, query)
-        return json.dumps(error_info, indent=2, ensure_ascii=False)
+        return _dumps(error_info)
 
 def query_external_database_impl(
     database_name: str,
@@ -774,19 +1603,19 @@ def query_external_database_impl(
                 "query": query,
                 "timestamp": datetime.now().isoformat()
             }
-            return json.dumps(response_data, indent=2, ensure_ascii=False, default=str)
+            return _dumps(response_data)
         else:
             raise Exception(result["error"])
             
     except Exception as e:
         logger.error(f"外部数据库查询失败: {e}")
-        return json.dumps({
+        return _dumps({
             "status": "error",
             "message": f"外部数据库查询失败: {str(e)}",
             "database_name": database_name,
             "query": query,
             "timestamp": datetime.now().isoformat()
-        }, indent=2, ensure_ascii=False)
+        })
 
 def list_data_sources_impl() -> str:
     """数据源列表实现"""
@@ -813,15 +1642,15 @@ def list_data_sources_impl() -> str:
             "timestamp": datetime.now().isoformat()
         }
         
-        return json.dumps(result, indent=2, ensure_ascii=False)
+        return _dumps(result)
         
     except Exception as e:
         logger.error(f"获取数据源列表失败: {e}")
-        return json.dumps({
+        return _dumps({
             "status": "error",
             "message": f"获取数据源列表失败: {str(e)}",
             "timestamp": datetime.now().isoformat()
-        }, indent=2, ensure_ascii=False)
+        })
 
 def manage_database_config_impl(
     action: str,
@@ -893,16 +1722,16 @@ def manage_database_config_impl(
             raise ValueError(f"不支持的操作类型: {action}")
         
         result["timestamp"] = datetime.now().isoformat()
-        return json.dumps(result, indent=2, ensure_ascii=False)
+        return _dumps(result)
         
     except Exception as e:
         logger.error(f"数据库配置管理失败: {e}")
-        return json.dumps({
+        return _dumps({
             "status": "error",
             "message": f"数据库配置管理失败: {str(e)}",
             "action": action,
             "timestamp": datetime.now().isoformat()
-        }, indent=2, ensure_ascii=False)
+        })
 
 # ================================
 # 模块初始化函数
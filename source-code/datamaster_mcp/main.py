@@ -93,10 +93,6 @@ EXPORTS_DIR = "exports"
 # 创建MCP服务器
 mcp = FastMCP(TOOL_NAME)
 
-# 确保目录存在
-for directory in [DATA_DIR, EXPORTS_DIR]:
-    Path(directory).mkdir(exist_ok=True)
-
 # 初始化所有核心模块
 try:
     init_database_module()
@@ -127,7 +123,10 @@ def connect_data_source(
     - "excel" - Excel文件导入到数据库
     - "csv" - CSV文件导入到数据库
     - "json" - JSON文件导入到数据库（支持嵌套结构自动扁平化）
-    - "sqlite" - SQLite数据库文件连接
+    - "parquet" - Parquet文件导入到数据库（需要pyarrow）
+    - "arrow" - Arrow/Feather文件导入到数据库（需要pyarrow）
+    - "directory" - 目录中的CSV文件批量导入（config: directory, pattern默认"*.csv"；每个文件一张表，target_table作为表名前缀；任一文件导入失败时整批回滚）
+    - "sqlite" - SQLite数据库文件连接（config含table_name且指定target_table时，将该表连同主键、NOT NULL、CHECK等约束复制到本地数据库，不复制索引和触发器）
     - "mysql" - MySQL数据库连接（第一步：创建临时配置）
     - "postgresql" - PostgreSQL数据库连接（第一步：创建临时配置）
     - "mongodb" - MongoDB数据库连接（第一步：创建临时配置）
@@ -797,7 +796,7 @@ def create_api_storage_session(
     return create_api_storage_session_impl(session_name, api_name, endpoint_name, description)
 
 @mcp.tool()
-def list_api_storage_sessions() -> str:
+def list_api_storage_sessions(api_name: str = None, endpoint_name: str = None) -> str:
     """
     📋 API存储会话列表工具 - 查看所有API数据存储会话
     
@@ -806,6 +805,10 @@ def list_api_storage_sessions() -> str:
     - 显示会话详细信息和数据统计
     - 为API数据导入提供会话选择
     
+    Args:
+        api_name: 按API名称过滤 (可选)
+        endpoint_name: 按端点名称过滤，不区分大小写的模糊匹配 (可选)
+    
     Returns:
         str: JSON格式的会话列表，包含会话信息和数据统计
     
@@ -814,7 +817,7 @@ def list_api_storage_sessions() -> str:
     - 选择合适的会话进行数据导入
     - 了解每个会话的数据量和结构
     """
-    return list_api_storage_sessions_impl()
+    return list_api_storage_sessions_impl(api_name, endpoint_name)
 
 # ================================
 # 服务器启动